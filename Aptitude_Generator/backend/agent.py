@@ -1,5 +1,7 @@
 import os
 import json
+import asyncio
+import contextlib
 from openai import OpenAI
 from dotenv import load_dotenv
 
@@ -7,7 +9,32 @@ from dotenv import load_dotenv
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, "../../.env"))
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60")))
+
+# Shared LLM scheduler from the Resume backend (only importable inside the unified server)
+try:
+    from app.services.llm_scheduler import llm_scheduler, PRIORITY_INTERACTIVE
+    from app.services.llm_resilience import call_sync
+except ImportError:
+    llm_scheduler = None
+    call_sync = None
+
+def interactive_llm_slot():
+    """Interactive-priority slot in the process-wide LLM queue (no-op when running standalone)."""
+    if llm_scheduler is None:
+        return contextlib.nullcontext()
+    return llm_scheduler.slot(priority=PRIORITY_INTERACTIVE, flow="aptitude")
+
+def _completion(call_type: str, **kwargs):
+    """Chat completion through the shared circuit breaker + latency stats (plain call when standalone)."""
+    if call_sync is None:
+        return client.chat.completions.create(**kwargs)
+    return call_sync(call_type, lambda: client.chat.completions.create(**kwargs))
+
+async def run_interactive(func, *args):
+    """Run a short blocking agent call off the event loop.
+    Not hedged: a thread can't be cancelled, so the losing duplicate would still run (and be billed)."""
+    return await asyncio.to_thread(func, *args)
 
 def generate_aptitude_questions(jd_text: str):
     """
@@ -55,7 +82,8 @@ def generate_aptitude_questions(jd_text: str):
     print(f"\n--- 🚀 AGENT START: Analysing Job Description ---")
     try:
         print(f"Step 1: Connecting to OpenAI (GPT-4o)...")
-        completion = client.chat.completions.create(
+        completion = _completion(
+            "aptitude_generation",
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a JSON-only generator. You honeslty follow the requested schema and never omit fields."},
@@ -113,7 +141,8 @@ def evaluate_code(problem_text: str, user_code: str, language: str, test_cases:
     """
     
     try:
-        completion = client.chat.completions.create(
+        completion = _completion(
+            "run_code",
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a code execution and evaluation agent. Be strict and accurate."},
@@ -6,8 +6,9 @@ from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from agent import generate_aptitude_questions, evaluate_code
+from agent import generate_aptitude_questions, evaluate_code, interactive_llm_slot, run_interactive
 
+import asyncio
 import json
 import time
 import uuid
@@ -65,12 +66,15 @@ class RunCodeRequest(BaseModel):
 async def run_code(request: RunCodeRequest):
     print(f"\n--- 💻 REQUEST: Evaluating Code ({request.language}) ---")
     try:
-        result = evaluate_code(
-            request.problem_text, 
-            request.code, 
-            request.language, 
-            request.test_cases
-        )
+        # Queue ahead of batch screening
+        async with interactive_llm_slot():
+            result = await run_interactive(
+                evaluate_code,
+                request.problem_text, 
+                request.code, 
+                request.language, 
+                request.test_cases
+            )
         return result
     except Exception as e:
         print(f"Error evaluating code: {e}")
@@ -92,7 +96,8 @@ async def generate_aptitude(request: JDRequest):
         raise HTTPException(status_code=400, detail="Job Description text is empty")
     
     try:
-        result = generate_aptitude_questions(request.jd_text)
+        async with interactive_llm_slot():
+            result = await asyncio.to_thread(generate_aptitude_questions, request.jd_text)
         return result # returns {"mcqs": [...], "coding_questions": [...]}
     except Exception as e:
         print(f"Error generating content: {e}")
@@ -40,11 +40,85 @@ class Settings(BaseSettings):
     
     # Features
     enable_anonymization: bool = True
+    # "llm" (GPT round trip) or "local" (spaCy NER + regex): local is opt-in until
+    # python -m app.services.anonymizer has compared the two on a resume sample
+    anonymizer_backend: str = "llm"
     enable_visual_analysis: bool = True
     enable_semantic_search: bool = True
     enable_skill_exp: bool = True
     enable_project_complexity: bool = True
     
+    # AI Analysis (Pass 3)
+    ai_max_concurrency: int = 5  # LLM calls in flight during the analysis pass
+    ai_max_batch_size: int = 5  # Max resumes packed into one analysis prompt
+    ai_batch_token_budget: int = 9000  # Input tokens per analysis prompt (shared prefix + resumes)
+    resume_token_budget: int = 2000  # Resume content per analysis prompt (most JD-relevant chunks kept)
+    jd_summary_token_budget: int = 400  # JD summary embedded in each analysis prompt
+    jd_token_budget: int = 800  # Raw JD text sent to structured extraction
+    
+    # OpenAI Rate Limits (starting budgets; corrected from x-ratelimit-* response headers)
+    llm_rpm_limit: int = 500
+    llm_tpm_limit: int = 30000
+    llm_max_retries: int = 4  # Retries on 429 (jittered, honours retry-after)
+    llm_max_inflight: int = 8  # Process-wide LLM calls in flight across all jobs & sub-apps
+
+    # LLM Resilience (timeouts, circuit breaker, hedging)
+    llm_timeout_seconds: float = 60.0  # Per-call timeout (also capped by the stage deadline)
+    ai_pass_deadline_seconds: float = 900.0  # Whole analysis pass; unfinished candidates keep their base score
+    llm_breaker_failure_threshold: int = 5  # Consecutive failures before failing fast
+    llm_breaker_reset_seconds: float = 30.0  # Open -> half-open probe delay
+    llm_hedge_delay_seconds: float = 4.0  # Hedge delay until enough latency samples exist (then p95)
+    
+    # LLM Response Cache (temperature-0 calls only)
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "data/llm_cache.sqlite3"
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    llm_cache_max_entries: int = 5000
+    
+    # Structured JD Profiles (fingerprinted JD extractions)
+    jd_profile_db_path: str = "data/jd_profiles.sqlite3"
+    
+    # Job Store (status + compressed results; survives restarts)
+    job_store_backend: str = "sqlite"  # "sqlite" or "memory" (nothing persisted)
+    job_store_path: str = "data/jobs.sqlite3"
+    job_cache_size: int = 50  # Decoded results of recently read finished jobs
+    job_ttl_seconds: int = 7 * 24 * 3600  # Finished jobs older than this are evicted
+    job_store_max_jobs: int = 2000  # Finished jobs kept (oldest evicted first)
+    job_store_max_bytes: int = 512 * 1024 * 1024  # Compressed result bytes kept
+    
+    # Job Queue / Workers
+    job_queue_mode: str = "inline"  # "inline" (API process runs jobs) or "worker" (python -m app.worker processes)
+    max_concurrent_jobs: int = 2  # Analyses running at once (across all workers); the rest wait in priority order
+    job_lease_seconds: int = 120  # A running job whose worker stops heartbeating is re-queued after this
+    job_poll_interval_seconds: float = 1.0  # Worker idle poll / cross-process SSE refresh
+    
+    # Pipeline Stages (see StageGraph in main.py; per-stage timings land in the job result)
+    parse_concurrency: int = 5  # Resume parse worker threads per job
+    role_match_concurrency: int = 1  # Role classifier calls in flight per job (one shared model)
+    candidate_text_storage: str = "compress"  # Resume text after scoring: "memory", "compress" (zlib) or "spill" (temp file)
+    
+    # Report Storage (resumes stored once by content hash; campaign folders link to them)
+    report_blob_dir: str = "data/resume_blobs"
+    report_link_mode: str = "hardlink"  # "hardlink" (falls back to manifest-only if the filesystem refuses) or "manifest"
+    campaign_catalog_path: str = "data/campaigns.sqlite3"  # Indexed campaign list + handoff lists
+    
+    # Gmail Fetch (batched metadata + pooled attachment downloads)
+    gmail_api_root: str = ""  # Empty = Google's endpoint; set to point the client at another Gmail-compatible root (e.g. a local mock)
+    gmail_page_size: int = 100  # messages.list page size (every page is followed; Gmail allows up to 500)
+    gmail_batch_size: int = 50  # messages.get calls per batch HTTP request (Gmail allows 100; 50 avoids rate-limit bursts)
+    gmail_fetch_concurrency: int = 8  # Attachment downloads in flight (one API client per thread)
+    gmail_max_retries: int = 5  # Retries on 429 / 5xx / quota 403s (jittered, honours Retry-After)
+    
+    # Analytics Export (one row per candidate; per-job CSV/XLSX/Parquet + cross-campaign Parquet dataset)
+    analytics_dataset_enabled: bool = True  # Needs pyarrow; skipped when it isn't installed
+    analytics_dataset_dir: str = "data/analytics/candidates"
+    
+    # Logging (queue-based; per-file lines are sampled per job)
+    log_file: str = "backend.log"
+    log_level: str = "INFO"
+    log_sample_first: int = 5  # Per-file lines logged in full at the start of each job
+    log_sample_every: int = 25  # ...then one in every N
+    
     # Paths (Flexible)
     data_dir: str = "data"
     resume_dir: str = "data/resumes"
@@ -81,6 +155,11 @@ class Settings(BaseSettings):
             
         if 'advanced' in config:
             self.enable_anonymization = config.getboolean('advanced', 'enable_anonymization', fallback=self.enable_anonymization)
+            self.anonymizer_backend = config.get('advanced', 'anonymizer_backend', fallback=self.anonymizer_backend)
+
+        if 'jobs' in config:
+            self.job_queue_mode = config.get('jobs', 'queue_mode', fallback=self.job_queue_mode)
+            self.max_concurrent_jobs = config.getint('jobs', 'max_concurrent_jobs', fallback=self.max_concurrent_jobs)
 
 @lru_cache()
 def get_settings():
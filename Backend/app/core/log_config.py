@@ -0,0 +1,98 @@
+"""
+Non-Blocking Logging
+Every logger writes into an in-memory queue (QueueHandler); one background QueueListener thread
+does the console/file I/O, so log writes never block the event loop or the parse workers.
+  - Per-job context: records emitted while a job is bound (bind_job_context, inherited by the
+    job's tasks and worker threads) carry its id, shown as [job_id] in every line.
+  - Sampling: per-file lines go to FILE_LOGGER, which keeps the first `sample_first` lines of
+    each job and then one in every `sample_every` (warnings and errors always pass).
+"""
+
+import atexit
+import queue
+import logging
+import threading
+import contextvars
+import logging.handlers
+from collections import OrderedDict
+from typing import Optional
+
+FILE_LOGGER = "ResumeAgent.files"
+
+_current_job: contextvars.ContextVar[str] = contextvars.ContextVar("log_job_id", default="-")
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def bind_job_context(job_id: str):
+    """Tag every log record from the current task (and tasks / threads it spawns) with this job."""
+    return _current_job.set(job_id)
+
+
+class JobContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "job_id"):
+            record.job_id = _current_job.get()
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Pass the first `first` records per job, then one in `every`. Warnings and above always pass."""
+
+    def __init__(self, first: int, every: int, max_jobs: int = 1000):
+        super().__init__()
+        self.first = first
+        self.every = max(1, every)
+        self.max_jobs = max_jobs
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        job_id = getattr(record, "job_id", None) or _current_job.get()
+        with self._lock:
+            seen = self._counts.get(job_id, 0) + 1
+            self._counts[job_id] = seen
+            self._counts.move_to_end(job_id)
+            while len(self._counts) > self.max_jobs:
+                self._counts.popitem(last=False)
+        return seen <= self.first or (seen - self.first) % self.every == 0
+
+
+def setup_logging(log_file: Optional[str] = "backend.log", level: str = "INFO", sample_first: int = 5, sample_every: int = 25):
+    """Route the root logger through a queue to a background writer. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(job_id)s] %(message)s')
+    sinks = [logging.StreamHandler()]
+    if log_file:
+        sinks.append(logging.FileHandler(log_file, encoding="utf-8"))
+    for sink in sinks:
+        sink.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Runs in the emitting thread, where the job context is still bound
+    queue_handler.addFilter(JobContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    logging.getLogger(FILE_LOGGER).addFilter(SampleFilter(sample_first, sample_every))
+
+    _listener = logging.handlers.QueueListener(log_queue, *sinks, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush what is still queued and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
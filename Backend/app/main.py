@@ -1,5 +1,6 @@
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Dict, Optional
 import shutil
@@ -10,6 +11,7 @@ import logging
 import asyncio
 import warnings
 import re
+import hashlib
 from datetime import datetime
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
@@ -17,19 +19,32 @@ from .core.config import get_settings
 from .services import pdf_service, vector_service, ai_service, utils
 from .services.gmail_fetch_service import gmail_fetch_service
 from .services.jd_extractor import jd_extractor
-from .services.score_service import calculate_score
-from .models.schemas import LLMOutput, JobStatusResponse
-
-# Configure Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("backend.log", encoding="utf-8")
-    ]
+from .services.jd_profile_store import jd_profile_store
+from .services.prompt_builder import prompt_builder
+from .services.llm_scheduler import llm_scheduler, bind_llm_flow, PRIORITY_BATCH
+from .services.llm_resilience import deadline_scope, llm_circuit_breaker, health_snapshot
+from .services.job_events import job_events, format_sse
+from .services.job_store import job_store
+from .services.job_queue import job_queue, JobCancelled
+from .services.pipeline_graph import Stage, StageGraph
+from .services.candidate_pool import Candidate, CandidatePool
+from .services.json_response import compact_json_response
+from .services.report_store import blob_store, CampaignWriter, stream_campaign_zip
+from .services.campaign_catalog import campaign_catalog, LIST_SELECTED, LIST_NOT_SELECTED
+from .services import result_export
+from .services.job_checkpoints import (
+    checkpoint_store, STAGE_JD, STAGE_GMAIL, STAGE_PARSE, STAGE_ROLE_MATCH, STAGE_SCORE, STAGE_AI_VERDICT
 )
+from .services.jd_extractor import ExtractedJD
+from .services.score_service import calculate_score
+from .models.schemas import CandidateAnalysis, JobStatusResponse
+from .core.log_config import setup_logging, bind_job_context, FILE_LOGGER
+
+# Configure Logging (queue + background writer; see core/log_config.py)
+_log_settings = get_settings()
+setup_logging(_log_settings.log_file, _log_settings.log_level, _log_settings.log_sample_first, _log_settings.log_sample_every)
 logger = logging.getLogger("ResumeAgent")
+file_logger = logging.getLogger(FILE_LOGGER)  # Per-file lines (sampled)
 
 from fastapi.staticfiles import StaticFiles
 
@@ -44,493 +59,140 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount Reports for Static Access
-os.makedirs("Reports", exist_ok=True)
-app.mount("/reports", StaticFiles(directory="Reports"), name="reports")
-
 settings = get_settings()
 
-# --- JOB MANAGER (In-Memory for MVP) ---
-# In production, use Redis.
-jobs: Dict[str, Dict] = {}
+# --- JOB MANAGER ---
+# Job state lives in job_store (SQLite write-through + LRU of finished results), not process memory.
+
+def update_job_progress(job_id: str, progress: int, step: str, per_file: bool = False):
+    """per_file: one of many per-resume updates (logged through the sampled file logger)."""
+    if job_store.update(job_id, progress=progress, current_step=step):
+        (file_logger if per_file else logger).info(f"{progress}% - {step}", extra={"job_id": job_id})
+        job_events.publish(job_id, "progress", {"progress": progress, "current_step": step})
+
+# --- PARTIAL RESULTS ---
+# Each stage upserts a lightweight row per candidate (no resume text) stamped with a job-wide,
+# increasing seq. Readers pass the last seq they saw as a cursor and only get what changed.
+def _partial_row(c: dict, stage: str) -> dict:
+    score = c.get('score', {})
+    if stage == "final":
+        has_verdict = c.get('ai_analyzed', False)
+    else:
+        has_verdict = stage == "ai_verdict"
+    return {
+        "filename": c['filename'],
+        "name": c.get('candidate_name', c.get('name')),
+        "email": c.get('email'),
+        "stage": stage,
+        "status": c.get('status'),
+        "total": score.get('total', 0),
+        "semantic_score": score.get('semantic_score'),
+        "experience_score": score.get('experience_score'),
+        "is_rejected": score.get('is_rejected', False),
+        "rejection_reason": score.get('rejection_reason'),
+        "ai_analyzed": has_verdict,
+        "reasoning": c.get('reasoning'),
+        "strengths": c.get('strengths', []),
+        "weaknesses": c.get('weaknesses', []),
+    }
 
-def update_job_progress(job_id: str, progress: int, step: str):
-    if job_id in jobs:
-        jobs[job_id]["progress"] = progress
-        jobs[job_id]["current_step"] = step
-        logger.info(f"[Job {job_id}] {progress}% - {step}")
+def _partial_rank_key(row: dict):
+    # Same order as the final report: AI verdicts first, then by score; hard rejections last
+    return (not row["is_rejected"], row["ai_analyzed"], row["total"])
+
+def publish_candidates(job_id: str, stage: str, candidates: List[Dict]):
+    """Upsert stage output for these candidates into the job's growing ranked list."""
+    if not candidates:
+        return
+    job = job_store.get(job_id, with_result=False)
+    if job is None:
+        return
+    if job["stage"] != stage:
+        job_events.publish(job_id, "stage", {"stage": stage})
+    for row in job_store.upsert_candidates(job_id, stage, [_partial_row(c, stage) for c in candidates]):
+        job_events.publish(job_id, "candidate", row)
 
 def fail_job(job_id: str, error: str):
-    if job_id in jobs:
-        jobs[job_id]["status"] = "error"
-        jobs[job_id]["error"] = error
-        logger.error(f"[Job {job_id}] FAILED: {error}")
-
-def complete_job(job_id: str, result: dict):
-    if job_id in jobs:
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["current_step"] = "Analysis Complete"
-        jobs[job_id]["result"] = result
-        logger.info(f"[Job {job_id}] COMPLETED Successfully.")
-
-# --- CORE PIPELINE (Async Worker) ---
-async def _run_async_analysis(job_id: str, jd_text: str, source_dir: str, top_n: int, jd_source_name: str, gmail_metadata: Dict = {}):
-    try:
-        update_job_progress(job_id, 5, "Initializing Pipeline...")
-        
-        # 2. PROCESS JOB DESCRIPTION (LLM Extraction)
-        update_job_progress(job_id, 10, "Extracting Requirements from JD (LLM)...")
-        # Use LLM to get structured data
-        jd_struct = await jd_extractor.extract_structured_jd(jd_text)
-        
-        # Use the LLM's clean summary for vector search (High Signal)
-        jd_clean = jd_struct.summary_for_vector_search
-        
-        jd_data = {
-            "title": jd_struct.job_title,
-            "text": jd_clean,
-            "keywords": jd_struct.technical_skills, # Clean List!
-            "required_years": jd_struct.required_years_experience,
-            "education": jd_struct.education_level
-        }
-        
-        logger.info(f"✅ JD Processed: {jd_data['title']} | Exp: {jd_data['required_years']}y | Skills: {len(jd_data['keywords'])}")
-        
-        # 2. FILE INGESTION (Parallel Stream)
-        import hashlib
-        import concurrent.futures
-
-        # Scan the temp directory for files
-        all_files = [f for f in os.listdir(source_dir) if os.path.isfile(os.path.join(source_dir, f))]
-        total_files = len(all_files)
-        
-        if total_files == 0:
-            fail_job(job_id, "No files found to process.")
-            return
-
-        resume_texts = {}
-        resume_pages = {}
-        processed_candidates = []
-        file_hashes = {}  # Store {filename: md5_hash}
-        
-        # Batch Process to prevent Memory Spikes
-        update_job_progress(job_id, 15, f"Parsing {total_files} Resumes (Parallel)...")
-        await asyncio.sleep(0.01) # Yield
-        
-        def process_single_file(fname):
-            """Worker function for parallel processing"""
-            file_path = os.path.join(source_dir, fname)
-            try:
-                # Read Content
-                if fname.lower().endswith(".pdf"):
-                    with open(file_path, "rb") as f:
-                        file_bytes = f.read()
-                        text, pages = pdf_service.pdf_service.extract_text(file_bytes)
-                else:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        file_bytes = f.read().encode('utf-8')
-                        text = f.read()
-                        pages = 1
-                
-                # Calculate Hash
-                file_hash = hashlib.md5(file_bytes).hexdigest()
-                
-                # Extract Email (Advanced + Regex Fallback)
-                extracted_email = ""
-                if fname.lower().endswith(".pdf"):
-                    try:
-                         extracted_email = pdf_service.pdf_service.extract_emails_advanced(file_bytes)
-                    except Exception as e:
-                        print(f"Advanced Email Extraction Error for {fname}: {e}")
-
-                if not extracted_email:
-                    # Fallback to Regex on text
-                    # Clean garbled icon text that PDF extractors produce from icon glyphs
-                    # e.g. ✉ icon → "envelpe", 📞 → "phone", etc.
-                    cleaned_for_email = re.sub(
-                        r'(?:envelpe|envelope|envel|envlp|phone|linkedinlinkedin|githubgithub|ὑ7)',
-                        ' ',
-                        text,
-                        flags=re.IGNORECASE
-                    )
-                    email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', cleaned_for_email)
-                    if email_match:
-                        raw_email = email_match.group(0)
-                        # Extra safety: strip any prefix that isn't valid email chars
-                        # Valid email local part starts with alphanumeric
-                        # Remove leading chars that look like icon remnants (e.g., "pe")
-                        at_pos = raw_email.find('@')
-                        if at_pos > 0:
-                            local_part = raw_email[:at_pos]
-                            domain_part = raw_email[at_pos:]
-                            # If local part starts with "pe" followed by a likely real name,
-                            # and original text has "envelpe" pattern, strip "pe"
-                            if re.search(r'envelpe\s*' + re.escape(raw_email), text, re.IGNORECASE):
-                                local_part = local_part[2:]  # Strip "pe" prefix
-                                raw_email = local_part + domain_part
-                        extracted_email = raw_email
-                    else:
-                        extracted_email = ""
-                
-                # DEBUG LOG
-                print(f"   🕵️ DEBUG: Extracted Email for {fname}: '{extracted_email}'")
-                
-                clean_text = utils.clean_text(text)
-                
-                # IMMEDIATE SCORING (Pass 1 - The Fast Scan)
-                score_data = calculate_score(clean_text, jd_data, semantic_score=0.0, page_count=pages)
-                
-                return {
-                    "status": "success",
-                    "fname": fname,
-                    "text": clean_text,
-                    "pages": pages,
-                    "hash": file_hash,
-                    "score_data": score_data,
-                    "email": extracted_email
-                }
-            except Exception as e:
-                return {"status": "error", "fname": fname, "error": str(e)}
-
-        # Run Parallel
-        processed_filenames = set()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_file = {executor.submit(process_single_file, f): f for f in all_files}
-            
-            for idx, future in enumerate(concurrent.futures.as_completed(future_to_file)):
-                result = future.result()
-                fname = result['fname']
-                
-                if result['status'] == 'error':
-                    logger.error(f"Error reading {fname}: {result['error']}")
-                    continue
-                
-                # Success
-                text = result['text']
-                pages = result['pages']
-                score_data = result['score_data']
-                file_hashes[fname] = result['hash']
-                
-                resume_texts[fname] = text
-                resume_pages[fname] = pages
-                
-                # Dynamic parsing progress (15% to 40% range)
-                parse_prog = 15 + int((idx + 1) / total_files * 25)
-                update_job_progress(job_id, parse_prog, f"Parsed {idx+1}/{total_files}: {fname}")
-                
-                logger.info(f"   📄 Parsed: {fname} ({len(text)} chars) | Pages: {pages}")
-
-                # STRICT EMAIL LOGIC: Only from PDF Content
-                final_email = result['email']
-                
-                # if not final_email and gmail_metadata... REMOVED AS REQUESTED
-
-                # Prevent Duplicates
-                if fname in processed_filenames:
-                    continue
-                processed_filenames.add(fname)
-
-                if score_data.get("is_rejected"):
-                     reason = score_data.get("rejection_reason", "Unknown")
-                     logger.warning(f"   ❌ REJECTED (Hard Rule): {fname} | Reason: {reason}")
-                     processed_candidates.append({
-                         "filename": fname,
-                         "name": utils.extract_name(text, fname),
-                         "score": score_data, 
-                         "status": "Rejected",
-                         "file_hash": result['hash'],
-                         "email": final_email
-                     })
-                else:
-                    processed_candidates.append({
-                        "filename": fname,
-                         "name": utils.extract_name(text, fname),
-                         "score": score_data,
-                         "text": text,
-                         "status": "Pending",
-                         "extracted_skills": score_data.get('matched_keywords', []),
-                         "years_of_experience": 0.0,
-                        "file_hash": result['hash'],
-                         "email_subject": gmail_metadata.get(fname, {}).get("email_subject", ""),
-                         "email_body": gmail_metadata.get(fname, {}).get("email_body", ""),
-                         "email": final_email
-                    })
-                
-                # Progress Update
-                if idx % 5 == 0:
-                    prog = 15 + int((idx / total_files) * 35) 
-                    update_job_progress(job_id, prog, f"Parsed {idx+1}/{total_files} Resumes")
-
-
-        # 3. VECTOR ANALYSIS (PURE SEMANTIC - ALL VALID CANDIDATES)
-        # Ensure Update Job Store with Initial Parse Results (CRITICAL FIX)
-        jobs[job_id]["candidates"] = processed_candidates
-
-        # Filter strictly those who passed the Page Check
-        valid_candidates = [c for c in processed_candidates if not c['score'].get('is_rejected', False)]
-        rejected_candidates = [c for c in processed_candidates if c['score'].get('is_rejected', False)]
-        
-        logger.info(f"   🛑 Pass 1 (Page Filter) Complete: {len(processed_candidates)} Processed. (Valid: {len(valid_candidates)})")
-        if rejected_candidates:
-             logger.info(f"      ❌ Rejected (Page Filter): {[c['filename'] for c in rejected_candidates]}")
-
-        # 3. PASS 2: ROLE FILTERING (Semantic - Zero Cost)
-        # Filter resumes by job title match BEFORE expensive AI analysis
-        from .services.role_matcher import detect_and_match_role, get_text_embedding
-        
-        # Use LLM extracted title directly
-        jd_title = jd_data.get("title", "Unknown Role")
-        
-        logger.info(f"   🎯 Pass 2: Filtering resumes for role '{jd_title}'...")
-        
-        # OPTIMIZATION: Embed JD Title ONCE to save time
-        jd_title_vector = get_text_embedding(jd_title)
-
-        role_matched = []
-        role_skipped = []
-        role_unclear = []
-        
-        for candidate in valid_candidates:
-            # Detect role from email + resume
-            try:
-                match_result = detect_and_match_role(
-                    jd_title=jd_title,
-                    email_subject=candidate.get('email_subject', ''),
-                    email_body=candidate.get('email_body', ''),
-                    resume_text=candidate['text'],
-                    threshold=0.45,  # Lowered threshold to catch more candidates (0.6 -> 0.45)
-                    jd_title_embedding=jd_title_vector # PASS PRE-COMPUTED VECTOR
-                )
-            except Exception as e:
-                logger.error(f"Role Match Error for {candidate['filename']}: {e}")
-                match_result = {"is_match": True, "detected_role": "Error", "similarity": 0.0}
-            
-            # Store detection metadata
-            candidate['applied_for'] = match_result.get('detected_role') or "Unknown"
-            candidate['role_match'] = match_result
-            
-            # Categorize
-            if match_result['is_match']:
-                role_matched.append(candidate)
-            elif match_result['detected_role']:
-                role_skipped.append(candidate)
-                candidate['score']['is_rejected'] = True
-                candidate['score']['rejection_reason'] = f"ROLE MISMATCH: Applied for '{match_result['detected_role']}' but JD is for '{jd_title}'"
-            else:
-                # If we can't detect role, give them a chance (process as normal)
-                role_unclear.append(candidate)
-        
-        logger.info(f"   📊 Role Filter: ✅ {len(role_matched)} matched | ❌ {len(role_skipped)} skipped (wrong role) | ⚠️ {len(role_unclear)} unclear")
-        if role_matched:
-             logger.info(f"      ✅ Matched: {[c['filename'] for c in role_matched]}")
-        if role_skipped:
-             logger.info(f"      ❌ Skipped: {[c['filename'] for c in role_skipped]}")
-        if role_unclear:
-             logger.info(f"      ⚠️ Unclear: {[c['filename'] for c in role_unclear]}")
-        
-        # Combine matched + unclear for further processing
-        vector_candidates = role_matched + role_unclear
-
-        update_job_progress(job_id, 30, "Semantic Analysis (Whole JD vs Resumes)...")
-        
-        if not vector_candidates:
-             logger.warning("No candidates passed the Role Filter.")
-        else:
-            logger.info(f"   🧠 Running Pure Semantic Match on {len(vector_candidates)} candidates...")
-            
-            try:
-                # 1. Identify which files need embedding (New Hashes)
-                candidate_hashes = [c['file_hash'] for c in vector_candidates]
-                existing_hashes = vector_service.vector_service.check_existing_hashes(candidate_hashes)
-                
-                new_docs = []
-                new_metas = []
-                
-                for c in vector_candidates:
-                    if c['file_hash'] not in existing_hashes:
-                        new_docs.append(c['text'])
-                        new_metas.append({
-                            "filename": c['filename'], 
-                            "file_hash": c['file_hash']
-                        })
-                
-                # 2. Add ONLY new texts
-                if new_docs:
-                    update_job_progress(job_id, 45, f"Embedding {len(new_docs)} new resumes...")
-                    logger.info(f"   📥 Embedding {len(new_docs)} new resumes into Vector DB...")
-                    vector_service.vector_service.add_texts(new_docs, new_metas)
-                    await asyncio.sleep(0.01)
-                else:
-                    logger.info("   ⏩ All resumes already in Vector DB. Skipping embedding.")
-                
-                # 3. Search matched results (SCOPED to current candidates)
-                candidate_filenames = [c['filename'] for c in vector_candidates]
-                
-                # Create Filter to ignore global DB noise
-                if len(candidate_filenames) == 1:
-                    search_filter = {"filename": candidate_filenames[0]}
-                else:
-                    search_filter = {"filename": {"$in": candidate_filenames}}
-                
-                results = vector_service.vector_service.search(
-                    jd_clean, 
-                    k=len(vector_candidates),
-                    filter=search_filter
-                )
-                
-                # Debug: Log raw distances
-                debug_raw_scores = [(doc.metadata['filename'], score) for doc, score in results]
-                logger.info(f"   📊 Raw Vector Distances: {debug_raw_scores}")
-                
-                # Map Results {filename: distance}
-                # Chroma Cosine Distance: 0 to 2. 
-                # 0 = Identical, 1 = Orthogonal, 2 = Opposite.
-                # Formula: Similarity = 1 - (distance / 2) -> Maps 0..2 to 1..0
-                sem_map = {}
-                for doc, dist in results:
-                    sim = max(0.0, 1.0 - (dist / 2))
-                    sem_map[doc.metadata['filename']] = sim
-
-                # OPTIMIZATION: Pre-compute Skill Vectors ONCE
-                jd_keywords = jd_data.get('keywords', [])
-                skill_vectors_cache = {}
-                if jd_keywords:
-                    try:
-                        logger.info(f"   ⚡ Pre-computing vectors for {len(jd_keywords)} skills...")
-                        # Batch embed all skills
-                        _vecs = vector_service.vector_service.embeddings.embed_documents(jd_keywords)
-                        # Create Map {skill: vector}
-                        skill_vectors_cache = {k: v for k, v in zip(jd_keywords, _vecs)}
-                    except Exception as e:
-                        logger.error(f"Skill Vector Pre-compute Failed: {e}")
-
-                for c in vector_candidates:
-                    fname = c['filename']
-                    
-                    # 1. Document-Level Semantic Score
-                    final_sem_score = sem_map.get(fname, 0.0)
-                    if final_sem_score == 0.0:
-                        logger.warning(f"   ⚠️ Semantic Score 0.0 for {fname}. Dist > 2.2?")
-
-                    # 2. Skill-Level Semantic Check (Slower but Precise)
-                    full_text = resume_texts.get(fname, "")
-                    
-                    try:
-                        # Pass the pre-computed cache
-                        found_skills, missing_skills = vector_service.vector_service.check_semantic_skills(
-                            full_text, 
-                            jd_keywords, 
-                            threshold=0.45,
-                            precomputed_skill_vectors=skill_vectors_cache
-                        )
-                    except Exception as e:
-                        logger.error(f"   ⚠️ Skill Check Error for {fname}: {e}")
-                        found_skills, missing_skills = [], jd_keywords
-                    
-                    # 3. Update Scoring Data
-                    c['score']['matched_keywords'] = found_skills
-                    c['score']['missing_keywords'] = missing_skills
-                    
-                    c['score']['semantic_score'] = final_sem_score
-                    c['score']['semantic_points'] = round(final_sem_score * 70, 1)
-                    
-                    # 4. Final Total Calculation (70 Sem + 30 Exp)
-                    # Note: Key/Struct scores are 0 by default now.
-                    exp_score = c['score'].get('experience_score', 0)
-                    
-                    new_total = c['score']['semantic_points'] + exp_score
-                    c['score']['total'] = round(min(100, new_total), 1)
-                    
-                    # Update progress during scoring (50% to 65%)
-                    score_prog = 50 + int((idx + 1) / len(vector_candidates) * 15)
-                    update_job_progress(job_id, score_prog, f"Scoring: {fname}")
-                    await asyncio.sleep(0.01)
-
-                    logger.info(f"   🧠 {fname} | Final: {c['score']['total']} (Sem: {final_sem_score:.2f}, Exp: {exp_score})")
-                    if found_skills:
-                        logger.info(f"      ✅ Semantic Found: {len(found_skills)}/{len(jd_data['keywords'])} ({', '.join(found_skills[:5])}...)")
-                    else:
-                        logger.info("      ❌ No Skills Found Semantically.")
-
-            except Exception as e:
-                logger.error(f"Vector Analysis Failed: {str(e)}")
-                # Fallback
-                for c in vector_candidates:
-                    c['score']['total'] = 0
-
-        # Re-Sort Final List
-        # Re-Sort Final List (Using Filtered Role Match Candidates Only)
-        vector_candidates.sort(key=lambda x: x['score']['total'], reverse=True)
-        top_candidates = vector_candidates[:top_n]
-        remaining = vector_candidates[top_n:]
-
-        update_job_progress(job_id, 70, f"Identified Top {len(top_candidates)} Candidates. Running AI Pass...")
-        await asyncio.sleep(0.01)
-
-        # 4. AI ANALYSIS (Pass 3 - The Deep Dive)
-        # Smart Selection: Analyze Top N + 2 candidates (Conservative to avoid Rate Limits)
-        analysis_limit = min(15, top_n + 5) 
-        if len(vector_candidates) < analysis_limit:
-            ai_target = vector_candidates
-            not_analyzed = []
-        else:
-            ai_target = vector_candidates[:analysis_limit]
-            not_analyzed = vector_candidates[analysis_limit:]
-        
-        # Mark candidates with analysis flags
-        for candidate in ai_target:
-            candidate['ai_analyzed'] = True
-            candidate['analysis_method'] = 'full_ai'
-        
-        for candidate in not_analyzed:
-            candidate['ai_analyzed'] = False
-            candidate['analysis_method'] = 'similarity_only'
-            # Keep basic data but no AI reasoning
-            if 'reasoning' not in candidate:
-                candidate['reasoning'] = None
-
-        logger.info(f"   🎯 Pass 3: Selecting Top {len(ai_target)} for AI Analysis (Buffer: {analysis_limit} vs Request: {top_n}).")
-        if not_analyzed:
-            logger.info(f"   📊 Skipping AI for {len(not_analyzed)} candidates (ranked by similarity only)")
-        
-        img_analysis = []
-        
-        # INDIVIDUAL PROCESSING (1 Resume = 1 AI Call)
-        BATCH_SIZE = 1
-        import time 
-
-        for i in range(0, len(ai_target), BATCH_SIZE):
-            batch = ai_target[i : i+BATCH_SIZE]
-            c = batch[0] # Single candidate
-            logger.info(f"   🤖 Processing AI for: {c['filename']}...")
-            
-            # TOKEN SAVING: Truncate very long resumes to ~6000 chars (approx 1500 tokens)
-            source_text = c['text']
-            if len(source_text) > 8000:
-                logger.warning(f"   ⚠️ Resume too long ({len(source_text)} chars). Truncating to 8000.")
-                source_text = source_text[:8000] + "\n[...Truncated...]"
+    checkpoint_store.clear(job_id)
+    if job_store.update(job_id, status="error", error=error):
+        logger.error(f"FAILED: {error}", extra={"job_id": job_id})
+        job_events.publish(job_id, "error", {"error": error})
+
+def mark_job_cancelled(job_id: str):
+    checkpoint_store.clear(job_id)
+    if job_store.update(job_id, status="cancelled", current_step="Cancelled"):
+        logger.info("CANCELLED.", extra={"job_id": job_id})
+        job_events.publish(job_id, "cancelled", {})
+
+def _raise_if_cancelled(job_id: str):
+    """Stage boundary: stop here if /cancel was requested (work already done is kept in partial results)."""
+    if job_queue.cancel_requested(job_id):
+        raise JobCancelled(job_id)
+
+# --- JOB DISPATCHER (inline mode) ---
+# Jobs always go through the shared queue; in inline mode this process drains it itself,
+# with the same global max_concurrent_jobs admission limit the worker processes use.
+_dispatcher_task: Optional[asyncio.Task] = None
+
+def start_job_dispatcher():
+    global _dispatcher_task
+    if settings.job_queue_mode != "inline" or (_dispatcher_task is not None and not _dispatcher_task.done()):
+        return
+    from .worker import worker_loop
+    _dispatcher_task = asyncio.get_running_loop().create_task(
+        worker_loop(f"inline-{os.getpid()}", settings.max_concurrent_jobs)
+    )
 
-            # Dynamic AI Progress (70% - 95%)
-            ai_prog = 70 + int((i + 1) / len(ai_target) * 25)
-            update_job_progress(job_id, ai_prog, f"AI Analysis: {c['filename']}")
+@app.on_event("startup")
+async def _start_dispatcher_on_startup():
+    start_job_dispatcher()
+
+@app.on_event("startup")
+async def _backfill_campaign_catalog():
+    # Campaign folders written before the catalog existed (one-time scan; no-op afterwards)
+    added = await asyncio.to_thread(campaign_catalog.backfill, "Reports")
+    if added:
+        logger.info(f"🗂️ Indexed {added} existing campaign folder(s) into the campaign catalog")
+
+def _completion_summary(result: dict) -> dict:
+    # Only a summary is pushed; the full payload is fetched once from /status
+    return {
+        "campaign_folder": result.get("campaign_folder"),
+        "report_path": result.get("report_path"),
+        "candidate_count": len(result.get("candidates", [])),
+        "rejected_count": result.get("rejected_count", 0),
+    }
 
-            anon_text = ai_service.ai_service.anonymize(source_text) 
-            
-            # LOG EXTRACTED TEXT PREVIEW (With Exp Info)
-            raw_exp = c['score'].get('years_of_experience', 0)
-            logger.info(f"   📄 [DEBUG] {c['filename']} | Base Exp: {raw_exp}y | Full Text Len: {len(anon_text)}")
-            
-            prompt = f"""
-            You are a Senior Technical Recruiter. Analyze this candidate for the Job Description below.
-            
-            JD Summary: {jd_clean[:1500]}
-            
-            CANDIDATE:
+def complete_job(job_id: str, result: dict):
+    checkpoint_store.clear(job_id)
+    if job_store.complete(job_id, result):
+        logger.info("COMPLETED Successfully.", extra={"job_id": job_id})
+        job_events.publish(job_id, "complete", _completion_summary(result))
+
+# --- AI ANALYSIS HELPERS (Pass 3) ---
+def _build_analysis_prompt(batch: List[tuple], jd_summary: str) -> str:
+    """
+    One prompt for a packed batch of (candidate_id, candidate, anon_text).
+    The JD + instructions prefix is shared, so batching pays for it once per call.
+    """
+    candidate_blocks = "".join(f"""
+            --- CANDIDATE {cid} ---
+            Candidate ID: {cid}
             Filename: {c['filename']}
             Score: {c['score']['total']}
             Content:
             {anon_text}
+            """ for cid, c, anon_text in batch)
+    example_id, example_c, _ = batch[0]
+    subject = "this candidate" if len(batch) == 1 else f"EACH of these {len(batch)} candidates independently"
+
+    return f"""
+            You are a Senior Technical Recruiter. Analyze {subject} for the Job Description below.
+            
+            JD Summary: {jd_summary}
+            
+            CANDIDATES:
+            {candidate_blocks}
             
             INSTRUCTIONS:
             1. Evaluate relevance to the JD (Skills, Experience, Role Fit).
@@ -544,12 +206,14 @@ async def _run_async_analysis(job_id: str, jd_text: str, source_dir: str, top_n:
              4. Assign "achievement_bonus" (0-20 points) for exceptional achievements.
              5. "hobbies_and_achievements": A list of hobbies or key achievements. Return [] if none found.
              6. "reasoning": A 1-line explanation of why this candidate was selected or rejected.
+             7. Return EXACTLY one entry per candidate ({len(batch)} total). Copy "candidate_id" and "filename" from its header.
 
             OUTPUT FORMAT (Strict JSON):
             {{
               "candidates": [
                 {{
-                  "filename": "{c['filename']}", 
+                  "candidate_id": "{example_id}",
+                  "filename": "{example_c['filename']}", 
                   "candidate_name": "Name",
                   "email": "email@example.com",
                   "phone": "+91...",
@@ -566,278 +230,1042 @@ async def _run_async_analysis(job_id: str, jd_text: str, source_dir: str, top_n:
             }}
             Ensure the JSON is valid.
             """
-            
-            max_retries = 2
-            success = False
-            
-            for attempt in range(max_retries):
-                try:
-                    # Call LLM (Strict Mode: temp=0)
-                    llm_response = ai_service.ai_service.query(prompt, json_mode=True, temperature=0.0)
-                    
-                    # LOG RAW RESPONSE
-                    # logger.info(f"   🤖 [DEBUG] AI Raw JSON Response:\n{llm_response}\n")
-                    
-                    # Parse Result
-                    json_str = llm_response
-                    match = re.search(r"```json(.*?)```", llm_response, re.DOTALL)
-                    if match: json_str = match.group(1).strip()
-                    elif "{" in llm_response:
-                        s = llm_response.find("{")
-                        e = llm_response.rfind("}")
-                        json_str = llm_response[s:e+1]
-                    
-                    parsed = LLMOutput.model_validate_json(json_str)
-                    
-                    # Ensure filename match (AI sometimes forgets)
-                    if parsed.candidates:
-                        parsed.candidates[0].filename = c['filename']
-                        batch_results = [parsed.candidates[0].model_dump()]
-                        img_analysis.extend(batch_results)
-                        logger.info(f"      ✅ Analyzed: {c['filename']}")
-                    
-                    success = True
-                    break 
 
-                except Exception as e:
-                    error_msg = str(e)
-                    if "429" in error_msg or "Rate limit" in error_msg:
-                        wait = 20 * (attempt + 1)
-                        logger.warning(f"   ⚠️ Rate Limit Hit (429). Retrying in {wait}s... (Attempt {attempt+1}/{max_retries})")
-                        time.sleep(wait)
-                    else:
-                        logger.error(f"AI Parse Error ({c['filename']}): {e}") 
-                        break # Don't retry on non-rate-limit errors
-            
-            if not success:
-               logger.warning(f"   ⚠️ Skipping AI analysis for {c['filename']} due to repeated errors. Using Base Score.")
-
-            # Rate Limit Prevention Check
-            await asyncio.sleep(1.0) # NON-BLOCKING sleep 1s between requests
-
-        # 4b. Apply AI Results & Bonus
-        if img_analysis:
-            for ai_res in img_analysis:
-                # Find original candidate object
-                # SEARCH IN vector_candidates to ensure we update the main list directly
-                target_cand = next((c for c in vector_candidates if c["filename"] == ai_res.get("filename")), None)
-                
-                if target_cand:
-                    # SAFEGUARD: Capture Original Email
-                    original_email = target_cand.get('email', '')
-
-                    # Update Fields
-                    new_name = ai_res.get('candidate_name')
-                    if new_name and "CANDIDATE" not in new_name.upper() and "NAME" not in new_name.upper() and "[" not in new_name:
-                         target_cand['candidate_name'] = new_name
-                    
-                    # ---------------------------------------------------------
-                    # EMAIL LOGIC: WE DO NOT UPDATE EMAIL FROM AI
-                    # PyMuPDF/Regex is authoritative. AI often returns placeholders.
-                    # ---------------------------------------------------------
-                    logger.info(f"      🕵️ DEBUG: AI found email '{ai_res.get('email')}' for {target_cand['filename']} but ignoring it. Keeping: '{target_cand.get('email')}'")
-                    
-                    target_cand['phone'] = ai_res.get('phone', target_cand.get('phone'))
-                    target_cand['extracted_skills'] = ai_res.get('extracted_skills', [])
-                    target_cand['status'] = ai_res.get('status', 'Review Required')
-                    target_cand['reasoning'] = ai_res.get('reasoning', '')
-                    target_cand['strengths'] = ai_res.get('strengths', [])
-                    target_cand['weaknesses'] = ai_res.get('weaknesses', [])
-                    target_cand['hobbies_and_achievements'] = ai_res.get('hobbies_and_achievements', [])
-
-                    # Apply Achievement Bonus from AI
-                    bonus = ai_res.get('achievement_bonus', 0)
-                    target_cand['achievement_bonus'] = bonus
-                    
-                    # Update Final Score
-                    current_total = target_cand['score']['total']
-                    new_total = min(100, current_total + bonus)
-                    target_cand['score']['total'] = round(new_total, 1)
-                    
-                    # Update score details for display
-                    ai_exp = ai_res.get("years_of_experience", 0)
-                    ai_skills = ai_res.get("extracted_skills", [])
-                    
-                    target_cand["score"]["years"] = ai_exp
-                    target_cand["score"]["matched_keywords"] = ai_skills
-                    req_years = jd_data.get("required_years", 2)
-                    new_exp_score = min(30, (ai_exp / req_years) * 30) if req_years else 0
-                    target_cand["score"]["experience_score"] = round(new_exp_score, 1)
-                    target_cand["score"]["keyword_score"] = len(ai_skills) # Just count for display
-                    
-                    # FINAL RESTORE: Force Email Back
-                    target_cand['email'] = original_email
-                    
-                    logger.info(f"   🤖 Re-Ranked {target_cand['filename']}: {current_total} -> {new_total} (Bonus: +{bonus}) | Email Kept: '{original_email}'")
-        update_job_progress(job_id, 90, "Generating Final Reports...")
-
-        # 5. GENERATE REPORTS
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        report_dir = f"Reports/Campaign_{timestamp}"
-        
-        # Copy files from temp to report dir (Organized)
-        os.makedirs(f"{report_dir}/All_Resumes", exist_ok=True)
-        # We need to copy from source_dir
-        for f in all_files:
-            try:
-                shutil.copy2(os.path.join(source_dir, f), f"{report_dir}/All_Resumes/{f}")
-            except: pass
+def _analysis_max_tokens(batch_size: int) -> int:
+    """Output budget grows with the batch (~700 tokens of JSON per candidate)."""
+    return min(4096, max(2000, 700 * batch_size))
+
+def _pack_batches(prepared: List[tuple], jd_summary: str) -> List[List[tuple]]:
+    """
+    Greedy packing of (candidate, anon_text, tokens) into batches that fit ai_batch_token_budget.
+    Returns batches of (candidate_id, candidate, anon_text) with ids unique within each batch.
+    """
+    if not prepared:
+        return []
+    budget = settings.ai_batch_token_budget
+    max_size = max(1, settings.ai_max_batch_size)
+    # Shared prefix (JD + instructions + output schema), measured once
+    base_tokens = prompt_builder.count_tokens(_build_analysis_prompt([("C1", prepared[0][0], "")], jd_summary))
+    per_candidate_overhead = 40  # header lines + filename
+
+    batches, current, used = [], [], base_tokens
+    for c, anon_text, n_tokens in prepared:
+        block = n_tokens + per_candidate_overhead
+        if current and (used + block > budget or len(current) >= max_size):
+            batches.append(current)
+            current, used = [], base_tokens
+        current.append((c, anon_text))
+        used += block
+    if current:
+        batches.append(current)
+
+    return [[(f"C{i + 1}", c, text) for i, (c, text) in enumerate(b)] for b in batches]
+
+def _parse_llm_candidates(llm_response: str) -> List[CandidateAnalysis]:
+    """
+    Pull the JSON object out of a raw LLM reply (handles ```json fences).
+    Entries are validated one by one, so one malformed candidate doesn't sink the batch.
+    """
+    json_str = llm_response
+    match = re.search(r"```json(.*?)```", llm_response, re.DOTALL)
+    if match: json_str = match.group(1).strip()
+    elif "{" in llm_response:
+        s = llm_response.find("{")
+        e = llm_response.rfind("}")
+        json_str = llm_response[s:e+1]
+    
+    data = json.loads(json_str)
+    parsed = []
+    for item in data.get("candidates", []):
+        try:
+            parsed.append(CandidateAnalysis.model_validate(item))
+        except Exception as e:
+            logger.warning(f"   ⚠️ Dropping invalid AI entry ({item.get('filename', '?') if isinstance(item, dict) else '?'}): {e}")
+    return parsed
+
+def _normalize_filename(name: str) -> str:
+    name = re.sub(r'\[.*?\]', '', name or '')
+    name = name.rsplit('.', 1)[0] if '.' in name else name
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+def _match_batch_results(batch: List[tuple], results: List[CandidateAnalysis]) -> Dict[str, dict]:
+    """
+    Map AI results back to candidates: candidate_id -> exact filename -> normalized filename,
+    then by position only when the reply has exactly one entry per candidate.
+    """
+    by_id = {cid: c for cid, c, _ in batch}
+    by_name = {c['filename']: c for _, c, _ in batch}
+    by_norm = {_normalize_filename(c['filename']): c for _, c, _ in batch}
+
+    matched = {}
+    leftovers = []
+    for res in results:
+        target = (
+            by_id.get((res.candidate_id or "").strip().upper())
+            or by_name.get(res.filename)
+            or by_norm.get(_normalize_filename(res.filename))
+        )
+        if target is not None and target['filename'] not in matched:
+            res.filename = target['filename']
+            matched[target['filename']] = res.model_dump()
+        else:
+            leftovers.append(res)
+
+    if len(results) == len(batch):
+        unmatched = [c for _, c, _ in batch if c['filename'] not in matched]
+        if len(unmatched) == len(leftovers):
+            for c, res in zip(unmatched, leftovers):
+                res.filename = c['filename']
+                matched[c['filename']] = res.model_dump()
+    return matched
+
+def _apply_ai_result(target_cand: dict, ai_res: dict, jd_data: dict):
+    """Merge one AI verdict into its candidate: profile fields, achievement bonus and re-scored experience."""
+    # SAFEGUARD: Capture Original Email
+    original_email = target_cand.get('email', '')
+
+    # Update Fields
+    new_name = ai_res.get('candidate_name')
+    if new_name and "CANDIDATE" not in new_name.upper() and "NAME" not in new_name.upper() and "[" not in new_name:
+         target_cand['candidate_name'] = new_name
+    
+    # ---------------------------------------------------------
+    # EMAIL LOGIC: WE DO NOT UPDATE EMAIL FROM AI
+    # PyMuPDF/Regex is authoritative. AI often returns placeholders.
+    # ---------------------------------------------------------
+    file_logger.debug(f"      🕵️ AI found email '{ai_res.get('email')}' for {target_cand['filename']} but ignoring it. Keeping: '{target_cand.get('email')}'")
+    
+    target_cand['phone'] = ai_res.get('phone', target_cand.get('phone'))
+    target_cand['extracted_skills'] = ai_res.get('extracted_skills', [])
+    target_cand['status'] = ai_res.get('status', 'Review Required')
+    target_cand['reasoning'] = ai_res.get('reasoning', '')
+    target_cand['strengths'] = ai_res.get('strengths', [])
+    target_cand['weaknesses'] = ai_res.get('weaknesses', [])
+    target_cand['hobbies_and_achievements'] = ai_res.get('hobbies_and_achievements', [])
+
+    # Apply Achievement Bonus from AI
+    bonus = ai_res.get('achievement_bonus', 0)
+    target_cand['achievement_bonus'] = bonus
+    
+    # Update Final Score
+    current_total = target_cand['score']['total']
+    new_total = min(100, current_total + bonus)
+    target_cand['score']['total'] = round(new_total, 1)
+    
+    # Update score details for display
+    ai_exp = ai_res.get("years_of_experience", 0)
+    ai_skills = ai_res.get("extracted_skills", [])
+    
+    target_cand["score"]["years"] = ai_exp
+    target_cand["score"]["matched_keywords"] = ai_skills
+    req_years = jd_data.get("required_years", 2)
+    new_exp_score = min(30, (ai_exp / req_years) * 30) if req_years else 0
+    target_cand["score"]["experience_score"] = round(new_exp_score, 1)
+    target_cand["score"]["keyword_score"] = len(ai_skills) # Just count for display
+    
+    # FINAL RESTORE: Force Email Back
+    target_cand['email'] = original_email
+    
+    logger.info(f"   🤖 Re-Ranked {target_cand['filename']}: {current_total} -> {new_total} (Bonus: +{bonus}) | Email Kept: '{original_email}'")
 
-        # Shortlisted
-        os.makedirs(f"{report_dir}/Shortlisted_Resumes", exist_ok=True)
-        for c in top_candidates:
+# --- PIPELINE STAGES ---
+# Each stage is a function of the job context (ctx). Batch stages return {output: value};
+# item stages get one item and return what flows downstream (None drops it). The wiring,
+# executors and concurrency limits are declared in _build_analysis_graph.
+
+def _parse_resume_file(source_dir: str, fname: str) -> dict:
+    """Read, hash and email-extract one resume (runs in a parse worker thread; no JD needed)."""
+    file_path = os.path.join(source_dir, fname)
+    try:
+        # Read Content
+        if fname.lower().endswith(".pdf"):
+            with open(file_path, "rb") as f:
+                file_bytes = f.read()
+                text, pages = pdf_service.pdf_service.extract_text(file_bytes)
+        else:
+            with open(file_path, "rb") as f:
+                file_bytes = f.read()
+            text = file_bytes.decode("utf-8", errors="ignore")
+            pages = 1
+        
+        # Calculate Hash (of the raw bytes: it is also the report blob store key, see report_store.hash_file)
+        file_hash = hashlib.md5(file_bytes).hexdigest()
+        
+        # Extract Email (Advanced + Regex Fallback)
+        extracted_email = ""
+        if fname.lower().endswith(".pdf"):
             try:
-                shutil.copy2(os.path.join(source_dir, c['filename']), f"{report_dir}/Shortlisted_Resumes/{c['filename']}")
-            except: pass
-            
-        # Not Selected
-        os.makedirs(f"{report_dir}/Not_Selected_Resumes", exist_ok=True)
-        for c in remaining:
-             try:
-                shutil.copy2(os.path.join(source_dir, c['filename']), f"{report_dir}/Not_Selected_Resumes/{c['filename']}")
-             except: pass
+                 extracted_email = pdf_service.pdf_service.extract_emails_advanced(file_bytes)
+            except Exception as e:
+                file_logger.warning(f"Advanced Email Extraction Error for {fname}: {e}")
+
+        if not extracted_email:
+            # Fallback to Regex on text
+            # Clean garbled icon text that PDF extractors produce from icon glyphs
+            # e.g. ✉ icon → "envelpe", 📞 → "phone", etc.
+            cleaned_for_email = re.sub(
+                r'(?:envelpe|envelope|envel|envlp|phone|linkedinlinkedin|githubgithub|ὑ7)',
+                ' ',
+                text,
+                flags=re.IGNORECASE
+            )
+            email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', cleaned_for_email)
+            if email_match:
+                raw_email = email_match.group(0)
+                # Extra safety: strip any prefix that isn't valid email chars
+                # Valid email local part starts with alphanumeric
+                # Remove leading chars that look like icon remnants (e.g., "pe")
+                at_pos = raw_email.find('@')
+                if at_pos > 0:
+                    local_part = raw_email[:at_pos]
+                    domain_part = raw_email[at_pos:]
+                    # If local part starts with "pe" followed by a likely real name,
+                    # and original text has "envelpe" pattern, strip "pe"
+                    if re.search(r'envelpe\s*' + re.escape(raw_email), text, re.IGNORECASE):
+                        local_part = local_part[2:]  # Strip "pe" prefix
+                        raw_email = local_part + domain_part
+                extracted_email = raw_email
+            else:
+                extracted_email = ""
+        
+        # DEBUG LOG
+        file_logger.debug(f"   🕵️ Extracted Email for {fname}: '{extracted_email}'")
+        
+        clean_text = utils.clean_text(text)
+        
+        return {
+            "status": "success",
+            "fname": fname,
+            "text": clean_text,
+            "pages": pages,
+            "hash": file_hash,
+            "email": extracted_email
+        }
+    except Exception as e:
+        return {"status": "error", "fname": fname, "error": str(e)}
+
+async def _stage_jd(ctx: dict) -> dict:
+    """Structured JD extraction (LLM, or a stored JD profile)."""
+    job_id, ckpt = ctx["job_id"], ctx["ckpt"]
+    jd_text, jd_profile_id = ctx["jd_text"], ctx["jd_profile_id"]
+    update_job_progress(job_id, 10, "Extracting Requirements from JD (LLM)...")
+    # Use LLM to get structured data (stored profiles skip the LLM entirely)
+    jd_struct = None
+    saved_jd = ckpt.load(STAGE_JD).get("jd")
+    if saved_jd:
+        jd_struct = ExtractedJD.model_validate(saved_jd)
+        logger.info("   ♻️ Resuming job: JD extraction restored from checkpoint.")
+    elif jd_profile_id:
+        jd_struct = jd_extractor.get_profile(jd_profile_id)
+        if jd_struct is None:
+            logger.warning(f"JD Profile {jd_profile_id} not found. Extracting from text.")
+    if jd_struct is None:
+        jd_struct = await jd_extractor.extract_structured_jd(jd_text)
+    if not saved_jd:
+        ckpt.save(STAGE_JD, "jd", jd_struct.model_dump())
+    
+    # Use the LLM's clean summary for vector search (High Signal)
+    jd_clean = jd_struct.summary_for_vector_search
+    
+    jd_data = {
+        "title": jd_struct.job_title,
+        "text": jd_clean,
+        "keywords": jd_struct.technical_skills, # Clean List!
+        "required_years": jd_struct.required_years_experience,
+        "education": jd_struct.education_level
+    }
+    
+    logger.info(f"✅ JD Processed: {jd_data['title']} | Exp: {jd_data['required_years']}y | Skills: {len(jd_data['keywords'])}")
+
+    from .services.role_matcher import get_text_embedding
+    # OPTIMIZATION: Embed JD Title ONCE to save time
+    jd_title_vector = get_text_embedding(jd_data["title"])
+
+    return {"jd_clean": jd_clean, "jd_data": jd_data, "jd_title_vector": jd_title_vector}
+
+GMAIL_PREFIX = "[Gmail] "  # Distinguishes fetched attachments from uploads in the temp dir
+
+def _stage_ingest(ctx: dict):
+    """
+    Source of the resume stream: uploads already in the temp dir, then Gmail attachments as each
+    one finishes downloading (parsing starts on the first file, not after the whole mailbox).
+    Every file name is also recorded in ctx["files"] (the complete list once this stage ends).
+    """
+    job_id, ckpt, source_dir = ctx["job_id"], ctx["ckpt"], ctx["source_dir"]
+    gmail_range, gmail_metadata = ctx["gmail_range"], ctx["gmail_metadata"]
+
+    # A re-claimed job keeps what a finished fetch wrote; an interrupted fetch is redone
+    refetch = bool(gmail_range) and not ckpt.is_done(STAGE_GMAIL)
+    if gmail_range and not refetch:
+        gmail_metadata.update(ckpt.load(STAGE_GMAIL))
+
+    # Scan the temp directory for files
+    for f in sorted(os.listdir(source_dir)):
+        if not os.path.isfile(os.path.join(source_dir, f)) or (refetch and f.startswith(GMAIL_PREFIX)):
+            continue
+        ctx["files"].append(f)
+        yield f
+
+    if refetch:
+        # Runs alongside JD extraction and parsing: same progress band as parsing, so it never steps back
+        update_job_progress(job_id, 15, "Fetching Resumes from Gmail...")
+        for item in gmail_fetch_service.iter_resumes(gmail_range["start_date"], gmail_range["end_date"],
+                                                     source_dir, filename_prefix=GMAIL_PREFIX):
+            fname = item["filename"]
+            gmail_metadata[fname] = {
+                "email_subject": item["email_subject"],
+                "email_body": item["email_body"],
+                "sender_email": item.get("sender", ""),
+            }
+            ckpt.save(STAGE_GMAIL, fname, gmail_metadata[fname])
+            file_logger.info(f"  📧 From: '{item['email_subject']}'")
+            ctx["files"].append(fname)
+            yield fname
+        ckpt.mark_done(STAGE_GMAIL)
+
+    # From here on ctx["files"] is final: progress can be reported as x/total
+    ctx["files_total"] = len(ctx["files"])
+    if not ctx["files"]:
+        raise ValueError("No files found to process.")
+
+async def _stage_restore(ctx: dict) -> dict:
+    """Load what a previous attempt already parsed / role-matched."""
+    job_id, ckpt = ctx["job_id"], ctx["ckpt"]
+
+    # Resumes parsed before a restart come back from their checkpoints; only the rest are parsed
+    parsed_ckpt = ckpt.load(STAGE_PARSE)
+    if parsed_ckpt:
+        logger.info(f"   ♻️ Resuming job: {len(parsed_ckpt)} resumes restored from checkpoint.")
+
+    update_job_progress(job_id, 15, "Parsing Resumes (Parallel)...")
+    return {"parsed_ckpt": parsed_ckpt, "role_ckpt": ckpt.load(STAGE_ROLE_MATCH)}
+
+def _stage_parse(ctx: dict, fname: str) -> dict:
+    restored = ctx["parsed_ckpt"].get(fname)
+    if restored is not None:
+        return restored
+    result = _parse_resume_file(ctx["source_dir"], fname)
+    if result['status'] != 'error':
+        ctx["ckpt"].save(STAGE_PARSE, fname, result)
+    return result
+
+def _stage_scan(ctx: dict, result: dict) -> dict:
+    """IMMEDIATE SCORING (Pass 1 - The Fast Scan): hard rules + keyword match against the extracted JD."""
+    if result['status'] != 'error':
+        result['score_data'] = calculate_score(result['text'], ctx["jd_data"], semantic_score=0.0, page_count=result['pages'])
+    return result
+
+async def _stage_candidates(ctx: dict, result: dict) -> Optional[Candidate]:
+    """Pass 1 per parsed resume: build the candidate record (hard-rule rejects included)."""
+    job_id, gmail_metadata, pool = ctx["job_id"], ctx["gmail_metadata"], ctx["pool"]
+    total_files = ctx["files_total"]  # None while ingest is still receiving files
+    idx = ctx["parse_count"]
+    ctx["parse_count"] += 1
+    fname = result['fname']
+
+    if result['status'] == 'error':
+        logger.error(f"Error reading {fname}: {result['error']}")
+        return None
+
+    # Success
+    text = result['text']
+    pages = result['pages']
+    score_data = result['score_data']
+
+    # Dynamic parsing progress (15% to 40% range), only against the final file count
+    if total_files:
+        parse_prog = 15 + int((idx + 1) / total_files * 25)
+        update_job_progress(job_id, parse_prog, f"Parsed {idx+1}/{total_files}: {fname}", per_file=True)
+    else:
+        update_job_progress(job_id, 15, f"Parsed {idx+1} (more files arriving): {fname}", per_file=True)
+
+    file_logger.info(f"   📄 Parsed: {fname} ({len(text)} chars) | Pages: {pages}")
+
+    # STRICT EMAIL LOGIC: Only from PDF Content
+    final_email = result['email']
+
+    # if not final_email and gmail_metadata... REMOVED AS REQUESTED
+
+    # Prevent Duplicates
+    if fname in pool:
+        return None
+
+    name, name_source = utils.extract_name_with_source(text, fname)
+
+    if score_data.get("is_rejected"):
+         reason = score_data.get("rejection_reason", "Unknown")
+         logger.warning(f"   ❌ REJECTED (Hard Rule): {fname} | Reason: {reason}")
+         candidate = Candidate(
+             filename=fname,
+             name=name,
+             name_source=name_source,
+             score=score_data,
+             status="Rejected",
+             file_hash=result['hash'],
+             email=final_email
+         )
+         pool.add(candidate)
+    else:
+        candidate = Candidate(
+            filename=fname,
+            name=name,
+            name_source=name_source,
+            score=score_data,
+            status="Pending",
+            extracted_skills=score_data.get('matched_keywords', []),
+            years_of_experience=0.0,
+            file_hash=result['hash'],
+            email_subject=gmail_metadata.get(fname, {}).get("email_subject", ""),
+            email_body=gmail_metadata.get(fname, {}).get("email_body", ""),
+            email=final_email
+        )
+        # Text is stored once in the pool (shared by duplicate uploads), not on the record
+        pool.add(candidate, text)
+    publish_candidates(job_id, "parsed", [candidate])
+
+    # Progress Update
+    if idx % 5 == 0 and total_files:
+        prog = 15 + int((idx / total_files) * 35) 
+        update_job_progress(job_id, prog, f"Parsed {idx+1}/{total_files} Resumes")
+    return candidate
+
+def _stage_role_match(ctx: dict, candidate: Candidate) -> Candidate:
+    """Pass 2 per candidate (role detection); page-rejected candidates pass through untouched."""
+    if candidate['score'].get('is_rejected', False):
+        return candidate
+    from .services.role_matcher import detect_and_match_role
+
+    # Detect role from email + resume (reuse the checkpointed match after a restart)
+    match_result = ctx["role_ckpt"].get(candidate['filename'])
+    if match_result is None:
+        try:
+            match_result = detect_and_match_role(
+                jd_title=ctx["jd_data"].get("title", "Unknown Role"),
+                email_subject=candidate.get('email_subject', ''),
+                email_body=candidate.get('email_body', ''),
+                resume_text=candidate['text'],
+                threshold=0.45,  # Lowered threshold to catch more candidates (0.6 -> 0.45)
+                jd_title_embedding=ctx["jd_title_vector"] # PASS PRE-COMPUTED VECTOR
+            )
+            ctx["ckpt"].save(STAGE_ROLE_MATCH, candidate['filename'], match_result)
+        except Exception as e:
+            logger.error(f"Role Match Error for {candidate['filename']}: {e}")
+            match_result = {"is_match": True, "detected_role": "Error", "similarity": 0.0}
+    
+    # Store detection metadata
+    candidate['applied_for'] = match_result.get('detected_role') or "Unknown"
+    candidate['role_match'] = match_result
+    return candidate
+
+async def _stage_role_filter(ctx: dict) -> dict:
+    """Split parsed candidates into page-rejected, wrong-role and those that go on to scoring."""
+    job_id = ctx["job_id"]
+    processed_candidates = ctx["role_checked"]
+
+    # Filter strictly those who passed the Page Check
+    valid_candidates = [c for c in processed_candidates if 'role_match' in c]
+    rejected_candidates = [c for c in processed_candidates if 'role_match' not in c]
+    
+    logger.info(f"   🛑 Pass 1 (Page Filter) Complete: {len(processed_candidates)} Processed. (Valid: {len(valid_candidates)})")
+    if rejected_candidates:
+         logger.info(f"      ❌ Rejected (Page Filter): {[c['filename'] for c in rejected_candidates]}")
+
+    # 3. PASS 2: ROLE FILTERING (Semantic - Zero Cost)
+    # Filter resumes by job title match BEFORE expensive AI analysis
+    jd_title = ctx["jd_data"].get("title", "Unknown Role")
+    logger.info(f"   🎯 Pass 2: Filtering resumes for role '{jd_title}'...")
+
+    role_matched = []
+    role_skipped = []
+    role_unclear = []
+    
+    for candidate in valid_candidates:
+        match_result = candidate['role_match']
+        # Categorize
+        if match_result['is_match']:
+            role_matched.append(candidate)
+        elif match_result['detected_role']:
+            role_skipped.append(candidate)
+            candidate['score']['is_rejected'] = True
+            candidate['score']['rejection_reason'] = f"ROLE MISMATCH: Applied for '{match_result['detected_role']}' but JD is for '{jd_title}'"
+        else:
+            # If we can't detect role, give them a chance (process as normal)
+            role_unclear.append(candidate)
+    
+    logger.info(f"   📊 Role Filter: ✅ {len(role_matched)} matched | ❌ {len(role_skipped)} skipped (wrong role) | ⚠️ {len(role_unclear)} unclear")
+    if role_matched:
+         logger.info(f"      ✅ Matched: {[c['filename'] for c in role_matched]}")
+    if role_skipped:
+         logger.info(f"      ❌ Skipped: {[c['filename'] for c in role_skipped]}")
+    if role_unclear:
+         logger.info(f"      ⚠️ Unclear: {[c['filename'] for c in role_unclear]}")
+    
+    publish_candidates(job_id, "role_filter", role_skipped)
 
+    # Combine matched + unclear for further processing
+    return {"vector_candidates": role_matched + role_unclear, "rejected_candidates": rejected_candidates}
 
+def _stage_score(ctx: dict) -> dict:
+    """Semantic scoring (whole JD vs resumes + per-skill check), then rank."""
+    job_id, ckpt = ctx["job_id"], ctx["ckpt"]
+    jd_data, jd_clean = ctx["jd_data"], ctx["jd_clean"]
+    vector_candidates = ctx["vector_candidates"]
+    update_job_progress(job_id, 30, "Semantic Analysis (Whole JD vs Resumes)...")
 
-        # Prepare Final Result Payload
-        # 5b. PREPARE FINAL RESULT PAYLOAD (Display Logic Only)
-        # The scores and data were already updated in the AI loop above (Pass 4b).
-        # This block ensures UI fields (breakdown, etc.) are populated without double-counting.
+    saved_scores = ckpt.load(STAGE_SCORE) if ckpt.is_done(STAGE_SCORE) else {}
+    
+    if saved_scores:
+        logger.info(f"   ♻️ Resuming job: semantic scores restored from checkpoint ({len(saved_scores)} candidates).")
+        for c in vector_candidates:
+            if c['filename'] in saved_scores:
+                c['score'] = saved_scores[c['filename']]
+        publish_candidates(job_id, "scored", vector_candidates)
+    elif not vector_candidates:
+         logger.warning("No candidates passed the Role Filter.")
+    else:
+        logger.info(f"   🧠 Running Pure Semantic Match on {len(vector_candidates)} candidates...")
         
-        updated_top_candidates = []
-        for c in top_candidates:
-            # Check if AI result exists for this candidate
-            # We can check 'achievement_bonus' key which is set in AI loop
-            is_analyzed = c.get('ai_analyzed', False)
+        try:
+            # 1. Identify which files need embedding (New Hashes)
+            candidate_hashes = [c['file_hash'] for c in vector_candidates]
+            existing_hashes = vector_service.vector_service.check_existing_hashes(candidate_hashes)
             
-            current_total = c['score']['total']
-            bonus = c.get('achievement_bonus', 0)
-            base_score = max(0, current_total - bonus) # Reverse calc for display
+            new_docs = []
+            new_metas = []
             
-            if is_analyzed:
-                status = c.get('status', 'Review Required')
-                
-                # Detailed breakdown for Frontend "View Details"
-                c['score']['breakdown'] = {
-                    "Base Score": round(base_score, 1),
-                    "AI Bonus": bonus,
-                    "Final Score": current_total,
-                    "Status": status
-                }
-                c['score']['breakdown_text'] = f"Base: {base_score:.1f} | Bonus: {bonus:+d} | Final: {current_total:.1f}"
+            for c in vector_candidates:
+                if c['file_hash'] not in existing_hashes:
+                    new_docs.append(c['text'])
+                    new_metas.append({
+                        "filename": c['filename'], 
+                        "file_hash": c['file_hash']
+                    })
+            
+            # 2. Add ONLY new texts
+            if new_docs:
+                update_job_progress(job_id, 45, f"Embedding {len(new_docs)} new resumes...")
+                logger.info(f"   📥 Embedding {len(new_docs)} new resumes into Vector DB...")
+                vector_service.vector_service.add_texts(new_docs, new_metas)
+            else:
+                logger.info("   ⏩ All resumes already in Vector DB. Skipping embedding.")
+            
+            # 3. Search matched results (SCOPED to current candidates)
+            candidate_filenames = [c['filename'] for c in vector_candidates]
+            
+            # Create Filter to ignore global DB noise
+            if len(candidate_filenames) == 1:
+                search_filter = {"filename": candidate_filenames[0]}
+            else:
+                search_filter = {"filename": {"$in": candidate_filenames}}
+            
+            results = vector_service.vector_service.search(
+                jd_clean, 
+                k=len(vector_candidates),
+                filter=search_filter
+            )
+            
+            # Debug: Log raw distances
+            debug_raw_scores = [(doc.metadata['filename'], score) for doc, score in results]
+            logger.info(f"   📊 Raw Vector Distances: {debug_raw_scores}")
+            
+            # Map Results {filename: distance}
+            # Chroma Cosine Distance: 0 to 2. 
+            # 0 = Identical, 1 = Orthogonal, 2 = Opposite.
+            # Formula: Similarity = 1 - (distance / 2) -> Maps 0..2 to 1..0
+            sem_map = {}
+            for doc, dist in results:
+                sim = max(0.0, 1.0 - (dist / 2))
+                sem_map[doc.metadata['filename']] = sim
+
+            # OPTIMIZATION: Pre-compute Skill Vectors ONCE
+            jd_keywords = jd_data.get('keywords', [])
+            skill_vectors_cache = {}
+            if jd_keywords:
+                try:
+                    logger.info(f"   ⚡ Pre-computing vectors for {len(jd_keywords)} skills...")
+                    # Batch embed all skills
+                    _vecs = vector_service.vector_service.embeddings.embed_documents(jd_keywords)
+                    # Create Map {skill: vector}
+                    skill_vectors_cache = {k: v for k, v in zip(jd_keywords, _vecs)}
+                except Exception as e:
+                    logger.error(f"Skill Vector Pre-compute Failed: {e}")
+
+            for i, c in enumerate(vector_candidates):
+                fname = c['filename']
                 
-                # FALLBACK: Ensure skills are present
-                if not c.get('extracted_skills'):
-                    c['extracted_skills'] = c['score'].get('matched_keywords', [])
+                # 1. Document-Level Semantic Score
+                final_sem_score = sem_map.get(fname, 0.0)
+                if final_sem_score == 0.0:
+                    logger.warning(f"   ⚠️ Semantic Score 0.0 for {fname}. Dist > 2.2?")
 
-            else:
-                 # No AI Analysis
-                 c['score']['breakdown'] = { 
-                     "Base Score": current_total, 
-                     "AI Bonus": 0, 
-                     "Final": current_total,
-                     "Status": "Pending"
-                 }
-                 c['score']['breakdown_text'] = f"Base: {current_total} (No AI Analysis)"
+                # 2. Skill-Level Semantic Check (Slower but Precise)
+                full_text = c.get('text', "")
+                
+                try:
+                    # Pass the pre-computed cache
+                    found_skills, missing_skills = vector_service.vector_service.check_semantic_skills(
+                        full_text, 
+                        jd_keywords, 
+                        threshold=0.45,
+                        precomputed_skill_vectors=skill_vectors_cache
+                    )
+                except Exception as e:
+                    logger.error(f"   ⚠️ Skill Check Error for {fname}: {e}")
+                    found_skills, missing_skills = [], jd_keywords
+                
+                # 3. Update Scoring Data
+                c['score']['matched_keywords'] = found_skills
+                c['score']['missing_keywords'] = missing_skills
+                
+                c['score']['semantic_score'] = final_sem_score
+                c['score']['semantic_points'] = round(final_sem_score * 70, 1)
                 
-            updated_top_candidates.append(c)
+                # 4. Final Total Calculation (70 Sem + 30 Exp)
+                # Note: Key/Struct scores are 0 by default now.
+                exp_score = c['score'].get('experience_score', 0)
+                
+                new_total = c['score']['semantic_points'] + exp_score
+                c['score']['total'] = round(min(100, new_total), 1)
+                publish_candidates(job_id, "scored", [c])
+                
+                # Update progress during scoring (50% to 65%)
+                score_prog = 50 + int((i + 1) / len(vector_candidates) * 15)
+                update_job_progress(job_id, score_prog, f"Scoring: {fname}", per_file=True)
+
+                file_logger.info(f"   🧠 {fname} | Final: {c['score']['total']} (Sem: {final_sem_score:.2f}, Exp: {exp_score})")
+                if found_skills:
+                    file_logger.info(f"      ✅ Semantic Found: {len(found_skills)}/{len(jd_data['keywords'])} ({', '.join(found_skills[:5])}...)")
+                else:
+                    file_logger.info(f"      ❌ No Skills Found Semantically ({fname}).")
+
+            ckpt.save_many(STAGE_SCORE, {c['filename']: c['score'] for c in vector_candidates})
+            ckpt.mark_done(STAGE_SCORE)
+
+        except Exception as e:
+            logger.error(f"Vector Analysis Failed: {str(e)}")
+            # Fallback
+            for c in vector_candidates:
+                c['score']['total'] = 0
+
+    # Re-Sort Final List
+    # Re-Sort Final List (Using Filtered Role Match Candidates Only)
+    vector_candidates.sort(key=lambda x: x['score']['total'], reverse=True)
+
+    # Only the AI pass still reads resume text (a few candidates); pack the rest away
+    ctx["pool"].texts.compact()
+
+    update_job_progress(job_id, 70, f"Identified Top {len(vector_candidates[:ctx['top_n']])} Candidates. Running AI Pass...")
+    return {"ranked": vector_candidates}
+
+async def _stage_ai_verdict(ctx: dict) -> dict:
+    """Pass 3: batched LLM verdicts for the top of the ranking (bonus + re-scored experience)."""
+    job_id, ckpt, top_n = ctx["job_id"], ctx["ckpt"], ctx["top_n"]
+    jd_data, jd_clean = ctx["jd_data"], ctx["jd_clean"]
+    vector_candidates = ctx["ranked"]
+
+    # 4. AI ANALYSIS (Pass 3 - The Deep Dive)
+    # Smart Selection: Analyze Top N + 2 candidates (Conservative to avoid Rate Limits)
+    analysis_limit = min(15, top_n + 5) 
+    if len(vector_candidates) < analysis_limit:
+        ai_target = vector_candidates
+        not_analyzed = []
+    else:
+        ai_target = vector_candidates[:analysis_limit]
+        not_analyzed = vector_candidates[analysis_limit:]
+    
+    # Mark candidates with analysis flags
+    for candidate in ai_target:
+        candidate['ai_analyzed'] = True
+        candidate['analysis_method'] = 'full_ai'
+    
+    for candidate in not_analyzed:
+        candidate['ai_analyzed'] = False
+        candidate['analysis_method'] = 'similarity_only'
+        # Keep basic data but no AI reasoning
+        if 'reasoning' not in candidate:
+            candidate['reasoning'] = None
+
+    logger.info(f"   🎯 Pass 3: Selecting Top {len(ai_target)} for AI Analysis (Buffer: {analysis_limit} vs Request: {top_n}).")
+    if not_analyzed:
+        logger.info(f"   📊 Skipping AI for {len(not_analyzed)} candidates (ranked by similarity only)")
+    
+    img_analysis = []
+    
+    # CONCURRENT + BATCHED PROCESSING (N Resumes = 1 AI Call, up to M calls in flight)
+    ai_semaphore = asyncio.Semaphore(max(1, settings.ai_max_concurrency))
+
+    # TOKEN BUDGETS: JD summary is shared by every prompt; embed it ONCE for chunk ranking
+    # (MiniLM is CPU-bound: embeddings run in a thread, never on the event loop)
+    jd_prompt_summary = prompt_builder.truncate_to_tokens(jd_clean, settings.jd_summary_token_budget)
+    try:
+        jd_summary_vector = await asyncio.to_thread(vector_service.vector_service.embeddings.embed_query, jd_clean)
+    except Exception as e:
+        logger.error(f"JD Summary Embedding Failed: {e}")
+        jd_summary_vector = None
+
+    async def prepare_candidate(c):
+        """Compress + anonymize one resume. Returns (candidate, anon_text, token_count)."""
+        async with ai_semaphore:
+            # TOKEN SAVING: Keep the most JD-relevant chunks within the resume token budget
+            source_text = await asyncio.to_thread(
+                prompt_builder.compress_resume,
+                c['text'], jd_clean, settings.resume_token_budget, jd_summary_vector
+            )
+            anon_text = await ai_service.ai_service.aanonymize(
+                source_text, known_pii={"name": c.get('name', ''), "name_source": c.get('name_source', ''), "email": c.get('email', '')}
+            )
             
-        # Re-Sort Top Candidates after AI Adjustment
-        updated_top_candidates.sort(key=lambda x: x['score']['total'], reverse=True)
-        
-        # Merge lists: AI-analyzed and Remaining (Top N + the rest)
-        for r in remaining:
-            if 'score' in r and 'breakdown' not in r['score']:
-                r['score']['breakdown'] = {
-                    "Base Score": r['score']['total'],
-                    "AI Bonus": 0,
-                    "Final": r['score']['total']
-                }
-                r['score']['breakdown_text'] = f"Base: {r['score']['total']} (No AI Analysis)"
-
-        # Combine into one global list
-        final_list = updated_top_candidates + remaining
-        
-        # FINAL GLOBAL SORT: AI-analyzed first (by score), then not-analyzed (by score)
-        final_list.sort(
-            key=lambda x: (
-                x.get('ai_analyzed', False),  # True (1) before False (0)
-                x['score']['total']
-            ),
-            reverse=True
-        )
+            # LOG EXTRACTED TEXT PREVIEW (With Exp Info)
+            raw_exp = c['score'].get('years_of_experience', 0)
+            logger.info(f"   📄 [DEBUG] {c['filename']} | Base Exp: {raw_exp}y | Full Text Len: {len(anon_text)}")
+            return c, anon_text, prompt_builder.count_tokens(anon_text)
+
+    async def analyze_batch(batch):
+        """One LLM call for a packed batch. Returns {filename: ai_result} for the results it could verify."""
+        async with ai_semaphore:
+            names = [c['filename'] for _, c, _ in batch]
+            logger.info(f"   🤖 Processing AI for: {', '.join(names)}...")
+            prompt = _build_analysis_prompt(batch, jd_prompt_summary)
+            
+            try:
+                # Call LLM (Strict Mode: temp=0). 429s are paced & retried inside AIService.
+                # Cached only when every candidate of the batch comes back valid
+                llm_response = await ai_service.ai_service.aquery(
+                    prompt, json_mode=True, temperature=0.0, max_tokens=_analysis_max_tokens(len(batch)),
+                    call_type="analysis",
+                    validate=lambda reply: len(_match_batch_results(batch, _parse_llm_candidates(reply))) == len(batch)
+                )
+                matched = _match_batch_results(batch, _parse_llm_candidates(llm_response))
+                for fname in matched:
+                    logger.info(f"      ✅ Analyzed: {fname}")
+                return matched
+
+            except Exception as e:
+                logger.error(f"AI Parse Error ({', '.join(names)}): {e}") 
+                return {}
+
+    async def run_batch(batch):
+        results = await analyze_batch(batch)
+        # VERIFY: candidates missing from a multi-candidate reply get their own call
+        missing = [item for item in batch if item[1]['filename'] not in results]
+        # (not while the circuit is open - those calls would only fail fast again)
+        if missing and len(batch) > 1 and llm_circuit_breaker.state != "open":
+            logger.warning(f"   ⚠️ Batch reply missing {len(missing)}/{len(batch)} candidates. Retrying individually...")
+            retried = await asyncio.gather(*(analyze_batch([item]) for item in missing))
+            for r in retried:
+                results.update(r)
+        for _, c, _ in batch:
+            if c['filename'] not in results:
+                logger.warning(f"   ⚠️ Skipping AI analysis for {c['filename']} due to repeated errors. Using Base Score.")
+        return batch, results
+
+    # DEADLINE: every LLM call in this pass is capped by the pass budget; late candidates keep their base score
+    with deadline_scope(settings.ai_pass_deadline_seconds):
+        # RESUME: verdicts paid for before a restart are re-applied, only the rest go to the LLM
+        ai_ckpt = ckpt.load(STAGE_AI_VERDICT)
+        pending_ai = []
+        for c in ai_target:
+            ai_res = ai_ckpt.get(c['filename'])
+            if ai_res:
+                img_analysis.append(ai_res)
+                _apply_ai_result(c, ai_res, jd_data)
+                publish_candidates(job_id, "ai_verdict", [c])
+            else:
+                pending_ai.append(c)
+        if ai_ckpt:
+            logger.info(f"   ♻️ Resuming job: {len(ai_target) - len(pending_ai)}/{len(ai_target)} AI verdicts restored from checkpoint.")
+
+        prepared = await asyncio.gather(*(prepare_candidate(c) for c in pending_ai))
+        ai_batches = _pack_batches(prepared, jd_prompt_summary)
+        if ai_batches:
+            logger.info(f"   📦 Packed {len(prepared)} candidates into {len(ai_batches)} AI calls (sizes: {[len(b) for b in ai_batches]})")
+
+        # 4b. Apply AI Results & Bonus (as each batch finishes)
+        ai_tasks = [asyncio.create_task(run_batch(b)) for b in ai_batches]
+        done_count = len(ai_target) - len(pending_ai)
+        for next_done in asyncio.as_completed(ai_tasks):
+            batch, results = await next_done
+            done_count += len(batch)
         
+            # Dynamic AI Progress (70% - 95%)
+            ai_prog = 70 + int(done_count / len(ai_target) * 25)
+            update_job_progress(job_id, ai_prog, f"AI Analysis: {done_count}/{len(ai_target)} candidates")
         
-        # --- EXPORT DATA FOR APTITUDE SYSTEM & REJECTION ---
-        cutoff = int(top_n)
-        true_selected = final_list[:cutoff] # Rank 1 to N
-        true_rejected = final_list[cutoff:] # Rank N+1 to End
-
-        selected_export = []
-        logger.info(f"\n--- 🟢 SELECTED CANDIDATES (Top {cutoff}) ---")
-        for c in true_selected:
-             email = c.get("email", "")
-             logger.info(f"   ✅ {c['filename']} -> Email: {email} (Score: {c['score']['total']})")
-             selected_export.append({
-                 "name": c.get("candidate_name", c["name"]),
-                 "email": email, 
-                 "role": jd_data['title'],
-                 "resume": os.path.abspath(f"{report_dir}/Shortlisted_Resumes/{c['filename']}") if c.get('ai_analyzed') else ""
-             })
+            for _, c, _ in batch:
+                ai_res = results.get(c['filename'])
+                if ai_res:
+                    ckpt.save(STAGE_AI_VERDICT, c['filename'], ai_res)
+                    img_analysis.append(ai_res)
+                    _apply_ai_result(c, ai_res, jd_data)
+                    publish_candidates(job_id, "ai_verdict", [c])
+
+    return {"ai_analysis": img_analysis}
+
+def _stage_reports(ctx: dict) -> dict:
+    """Campaign folder (resume copies + handoff JSONs) and the final result payload."""
+    job_id, source_dir, top_n = ctx["job_id"], ctx["source_dir"], ctx["top_n"]
+    jd_data, img_analysis = ctx["jd_data"], ctx["ai_analysis"]
+    rejected_candidates = ctx["rejected_candidates"]
+    top_candidates = ctx["ranked"][:top_n]
+    remaining = ctx["ranked"][top_n:]
+    update_job_progress(job_id, 90, "Generating Final Reports...")
+
+    # 5. GENERATE REPORTS
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    report_dir = f"Reports/Campaign_{timestamp}"
+    
+    # Organize resumes: each unique file is stored once in the blob store (by content hash);
+    # the campaign folders hardlink to it (or list it in manifest.json if links aren't possible)
+    campaign = CampaignWriter(blob_store, report_dir, settings.report_link_mode)
+    pool = ctx["pool"]
+    hashes = {}
+    for f in ctx["files"]:
+        known = pool.get(f)
+        try:
+            hashes[f] = campaign.store(os.path.join(source_dir, f), known.file_hash if known else None)
+            campaign.add("All_Resumes", f, hashes[f])
+        except OSError as e:
+            logger.warning(f"Could not store {f} in the report: {e}")
+
+    resume_paths = {}
+    for folder, group in (("Shortlisted_Resumes", top_candidates), ("Not_Selected_Resumes", remaining)):
+        os.makedirs(f"{report_dir}/{folder}", exist_ok=True)
+        for c in group:
+            if c['filename'] in hashes:
+                resume_paths[c['filename']] = campaign.add(folder, c['filename'], hashes[c['filename']])
+    campaign.write_manifest()
+    logger.info(f"🗂️ Report files: {campaign.stats['blobs_written']} new blobs, {campaign.stats['blobs_reused']} reused, "
+                f"{campaign.stats['linked']} linked, {campaign.stats['manifest_only']} manifest-only")
+
+    # Prepare Final Result Payload
+    # 5b. PREPARE FINAL RESULT PAYLOAD (Display Logic Only)
+    # The scores and data were already updated in the AI loop above (Pass 4b).
+    # This block ensures UI fields (breakdown, etc.) are populated without double-counting.
+    
+    updated_top_candidates = []
+    for c in top_candidates:
+        # Check if AI result exists for this candidate
+        # We can check 'achievement_bonus' key which is set in AI loop
+        is_analyzed = c.get('ai_analyzed', False)
         
-        rejected_export = []
-        logger.info(f"\n--- 🔴 NOT SELECTED CANDIDATES (Rank {cutoff+1}+) ---")
-        for c in true_rejected:
-             c['status'] = "Not Selected" # FORCE STATUS for Frontend
-             email = c.get("email", "")
-             logger.info(f"   ❌ {c['filename']} -> Email: {email} (Score: {c['score']['total']})")
-             rejected_export.append({
-                 "name": c.get("candidate_name", c["name"]),
-                 "email": email,
-                 "role": jd_data['title'],
-                 "reason": "Not Selected (Low Score)"
-             })
-             
-        # Save JSONs
-        with open(f"{report_dir}/selected_candidates.json", "w") as f:
-            json.dump(selected_export, f, indent=4)
+        current_total = c['score']['total']
+        bonus = c.get('achievement_bonus', 0)
+        base_score = max(0, current_total - bonus) # Reverse calc for display
         
-        with open(f"{report_dir}/not_selected_candidates.json", "w") as f:
-            json.dump(rejected_export, f, indent=4)
+        if is_analyzed:
+            status = c.get('status', 'Review Required')
             
-        logger.info(f"✅ Generated Handoff Files: selected_candidates.json ({len(selected_export)}) & not_selected_candidates.json ({len(rejected_export)})")
+            # Detailed breakdown for Frontend "View Details"
+            c['score']['breakdown'] = {
+                "Base Score": round(base_score, 1),
+                "AI Bonus": bonus,
+                "Final Score": current_total,
+                "Status": status
+            }
+            c['score']['breakdown_text'] = f"Base: {base_score:.1f} | Bonus: {bonus:+d} | Final: {current_total:.1f}"
+            
+            # FALLBACK: Ensure skills are present
+            if not c.get('extracted_skills'):
+                c['extracted_skills'] = c['score'].get('matched_keywords', [])
+
+        else:
+             # No AI Analysis
+             c['score']['breakdown'] = { 
+                 "Base Score": current_total, 
+                 "AI Bonus": 0, 
+                 "Final": current_total,
+                 "Status": "Pending"
+             }
+             c['score']['breakdown_text'] = f"Base: {current_total} (No AI Analysis)"
+            
+        updated_top_candidates.append(c)
         
-        # Rejections
-        final_rejected = []
-        for c in rejected_candidates:
-            final_rejected.append({
-                "filename": c['filename'],
-                "name": c['name'],
-                "reason": c['score'].get('rejection_reason'),
-                "score": 0
-            })
-
-        result_payload = {
-            "status": "success",
-            "candidates": final_list,
-            "rejected_count": len(final_rejected),
-            "rejected_candidates": final_rejected,
-            "ai_analysis": img_analysis,
-            "report_path": os.path.abspath(report_dir),
-            "campaign_folder": os.path.basename(report_dir)
+    # Re-Sort Top Candidates after AI Adjustment
+    updated_top_candidates.sort(key=lambda x: x['score']['total'], reverse=True)
+    
+    # Merge lists: AI-analyzed and Remaining (Top N + the rest)
+    for r in remaining:
+        if 'score' in r and 'breakdown' not in r['score']:
+            r['score']['breakdown'] = {
+                "Base Score": r['score']['total'],
+                "AI Bonus": 0,
+                "Final": r['score']['total']
+            }
+            r['score']['breakdown_text'] = f"Base: {r['score']['total']} (No AI Analysis)"
+
+    # Combine into one global list
+    final_list = updated_top_candidates + remaining
+    
+    # FINAL GLOBAL SORT: AI-analyzed first (by score), then not-analyzed (by score)
+    final_list.sort(
+        key=lambda x: (
+            x.get('ai_analyzed', False),  # True (1) before False (0)
+            x['score']['total']
+        ),
+        reverse=True
+    )
+    
+    
+    # --- EXPORT DATA FOR APTITUDE SYSTEM & REJECTION ---
+    cutoff = int(top_n)
+    true_selected = final_list[:cutoff] # Rank 1 to N
+    true_rejected = final_list[cutoff:] # Rank N+1 to End
+
+    selected_export = []
+    logger.info(f"\n--- 🟢 SELECTED CANDIDATES (Top {cutoff}) ---")
+    for c in true_selected:
+         email = c.get("email", "")
+         logger.info(f"   ✅ {c['filename']} -> Email: {email} (Score: {c['score']['total']})")
+         selected_export.append({
+             "name": c.get("candidate_name", c["name"]),
+             "email": email, 
+             "role": jd_data['title'],
+             "resume": os.path.abspath(resume_paths[c['filename']]) if c.get('ai_analyzed') and c['filename'] in resume_paths else ""
+         })
+    
+    rejected_export = []
+    logger.info(f"\n--- 🔴 NOT SELECTED CANDIDATES (Rank {cutoff+1}+) ---")
+    for c in true_rejected:
+         c['status'] = "Not Selected" # FORCE STATUS for Frontend
+         email = c.get("email", "")
+         logger.info(f"   ❌ {c['filename']} -> Email: {email} (Score: {c['score']['total']})")
+         rejected_export.append({
+             "name": c.get("candidate_name", c["name"]),
+             "email": email,
+             "role": jd_data['title'],
+             "reason": "Not Selected (Low Score)"
+         })
+         
+    # Save JSONs
+    with open(f"{report_dir}/selected_candidates.json", "w") as f:
+        json.dump(selected_export, f, indent=4)
+    
+    with open(f"{report_dir}/not_selected_candidates.json", "w") as f:
+        json.dump(rejected_export, f, indent=4)
+        
+    logger.info(f"✅ Generated Handoff Files: selected_candidates.json ({len(selected_export)}) & not_selected_candidates.json ({len(rejected_export)})")
+    
+    # Rejections
+    final_rejected = []
+    for c in rejected_candidates:
+        final_rejected.append({
+            "filename": c['filename'],
+            "name": c['name'],
+            "reason": c['score'].get('rejection_reason'),
+            "score": 0
+        })
+
+    campaign_catalog.record(
+        os.path.basename(report_dir), os.path.abspath(report_dir), jd_data['title'], selected_export, rejected_export,
+        job_id=job_id, jd_profile_id=ctx["jd_profile_id"], top_n=cutoff, total_files=len(ctx["files"]),
+        rejected_count=len(final_rejected),
+    )
+
+    result_payload = {
+        "status": "success",
+        "candidates": [c.to_dict() for c in final_list],
+        "rejected_count": len(final_rejected),
+        "rejected_candidates": final_rejected,
+        # Verdicts are already merged into "candidates"; only their count is kept here
+        "ai_analyzed_count": len(img_analysis),
+        "report_path": os.path.abspath(report_dir),
+        "campaign_folder": os.path.basename(report_dir)
+    }
+
+    if settings.analytics_dataset_enabled:
+        try:
+            rows = result_export.candidate_rows(result_payload, job_id=job_id, jd_title=jd_data['title'])
+            result_export.append_to_dataset(rows, settings.analytics_dataset_dir, f"{result_payload['campaign_folder']}_{job_id}")
+        except result_export.ExportUnavailable as e:
+            logger.debug(f"Analytics dataset skipped: {e}")
+        except Exception as e:
+            logger.warning(f"Analytics dataset append failed: {e}")
+
+    publish_candidates(job_id, "final", final_list + rejected_candidates)
+    return {"result": result_payload}
+
+def _build_analysis_graph() -> StageGraph:
+    """
+    restore ──────────┐                 jd ──┐
+    ingest ~~~~~~~~~~~┴~~> parse ~~~~~~~~~~~~┴~~> scan ~~> candidates ~~> role_match ──> role_filter ──> score ──> ai_verdict ──> reports
+    (~~> streams item by item: a resume is parsed as soon as it lands, while the JD is still being
+    extracted; the fast scan and everything after it start once the JD is in)
+    """
+    return StageGraph([
+        Stage("jd", _stage_jd, inputs=("jd_text",), outputs=("jd_clean", "jd_data", "jd_title_vector")),
+        # Files stream in while the JD is still being extracted (Gmail attachments as they download)
+        Stage("ingest", _stage_ingest, inputs=("source_dir", "gmail_range"), outputs=("incoming",),
+              executor="thread", source=True),
+        Stage("restore", _stage_restore, inputs=("ckpt",), outputs=("parsed_ckpt", "role_ckpt")),
+        # Parsing needs no JD: it overlaps the JD extraction, not just the downloads
+        Stage("parse", _stage_parse, inputs=("incoming", "parsed_ckpt"), outputs=("parsed",),
+              executor="thread", concurrency=settings.parse_concurrency, per_item=True),
+        Stage("scan", _stage_scan, inputs=("parsed", "jd_data"), outputs=("scanned",),
+              executor="thread", per_item=True),
+        Stage("candidates", _stage_candidates, inputs=("scanned", "files"), outputs=("candidates",), per_item=True),
+        # Zero-shot classifier: off the event loop, one call at a time unless configured otherwise
+        Stage("role_match", _stage_role_match, inputs=("candidates", "jd_data", "jd_title_vector", "role_ckpt"),
+              outputs=("role_checked",), executor="thread", concurrency=settings.role_match_concurrency, per_item=True),
+        Stage("role_filter", _stage_role_filter, inputs=("role_checked", "jd_data"),
+              outputs=("vector_candidates", "rejected_candidates")),
+        # Whole-JD + per-skill MiniLM embeddings: CPU-bound, so off the event loop
+        Stage("score", _stage_score, inputs=("vector_candidates", "jd_data", "jd_clean"), outputs=("ranked",),
+              executor="thread"),
+        Stage("ai_verdict", _stage_ai_verdict, inputs=("ranked", "jd_data", "jd_clean"), outputs=("ai_analysis",)),
+        Stage("reports", _stage_reports, inputs=("ranked", "rejected_candidates", "ai_analysis", "files"),
+              outputs=("result",), executor="thread"),
+    ])
+
+# --- CORE PIPELINE (Async Worker) ---
+async def _run_async_analysis(job_id: str, jd_text: str, source_dir: str, top_n: int, jd_source_name: str, gmail_metadata: Optional[Dict] = None, jd_profile_id: Optional[str] = None, gmail_range: Optional[Dict] = None):
+    graph = _build_analysis_graph()
+    pool = CandidatePool(settings.candidate_text_storage)
+    try:
+        # Every LLM call below (incl. spawned tasks) queues as batch work under this job's flow
+        bind_llm_flow(priority=PRIORITY_BATCH, flow=job_id)
+        bind_job_context(job_id)
+        update_job_progress(job_id, 5, "Initializing Pipeline...")
+
+        ctx = {
+            "job_id": job_id,
+            "jd_text": jd_text,
+            "jd_profile_id": jd_profile_id,
+            "source_dir": source_dir,
+            "top_n": top_n,
+            "gmail_range": gmail_range,  # {"start_date", "end_date"}: fetched by the ingest stage
+            "gmail_metadata": dict(gmail_metadata or {}),
+            "files": [],
+            "files_total": None,  # Set by the ingest stage once every file has arrived
+            # CHECKPOINTS: stages save their outputs; a re-claimed job (crash/deploy) picks up from them
+            "ckpt": checkpoint_store.for_job(job_id),
+            "parse_count": 0,
+            "pool": pool,
         }
+        # Stage boundaries are also the cancellation points
+        await graph.run(ctx, before_stage=lambda stage: _raise_if_cancelled(job_id))
 
+        result_payload = ctx["result"]
+        result_payload["stage_timings"] = graph.timings()
+        for stage, t in result_payload["stage_timings"].items():
+            logger.info(f"   ⏱️ Stage {stage}: {t['wall_seconds']}s wall | {t['cpu_seconds']}s CPU | {t['items']} items")
         complete_job(job_id, result_payload)
-        
+
         # Cleanup Temp
         try:
             shutil.rmtree(source_dir)
         except: pass
 
+    except JobCancelled:
+        mark_job_cancelled(job_id)
+        shutil.rmtree(source_dir, ignore_errors=True)
+
     except Exception as e:
         logger.error(f"FATAL PIPELINE ERROR: {e}")
         fail_job(job_id, str(e))
 
+    finally:
+        pool.close()
+
 # --- ENDPOINTS ---
 
 @app.get("/")
@@ -846,25 +1274,20 @@ def root():
 
 @app.post("/analyze")
 async def start_analysis(
-    background_tasks: BackgroundTasks,
     jd_file: UploadFile = File(None),
     jd_text_input: str = Form(None),
     resume_files: List[UploadFile] = File(None),
     start_date: str = Form(None),
     end_date: str = Form(None),
-    top_n: int = Form(5)
+    top_n: int = Form(5),
+    jd_profile_id: str = Form(None),
+    priority: int = Form(0)
 ):
     job_id = str(uuid.uuid4())
     logger.info(f"Starting Analysis Job: {job_id}")
 
     # 1. Create Job State
-    jobs[job_id] = {
-        "status": "processing",
-        "progress": 0,
-        "current_step": "Uploading Files...",
-        "result": None,
-        "error": None
-    }
+    job_store.create(job_id, current_step="Uploading Files...")
 
     try:
         # 2. Setup Temp Directory
@@ -874,6 +1297,7 @@ async def start_analysis(
         # 3. Handle JD
         jd_text = ""
         jd_source = ""
+        reuse_profile_id = None
         
         if jd_file:
             content = await jd_file.read()
@@ -885,12 +1309,19 @@ async def start_analysis(
         elif jd_text_input:
             jd_text = jd_text_input
             jd_source = "Pasted Text"
+        elif jd_profile_id:
+            stored_profile = jd_profile_store.get(jd_profile_id)
+            if stored_profile is None:
+                raise HTTPException(status_code=404, detail="JD profile not found")
+            jd_text = stored_profile["jd_text"]
+            jd_source = f"JD Profile {jd_profile_id}"
+            reuse_profile_id = jd_profile_id
         else:
             raise HTTPException(status_code=400, detail="JD Required")
 
         # 4. Handle Files (Stream to Disk immediately)
         files_found = False
-        gmail_metadata = {} # Initialize to avoid UnboundLocalError
+        gmail_range = None
         
         # Source A: Manual
         if resume_files:
@@ -900,7 +1331,7 @@ async def start_analysis(
                     shutil.copyfileobj(file.file, f) # Efficient stream copy
             files_found = True
         
-        # Source B: Gmail (OAuth)
+        # Source B: Gmail (OAuth) - fetched inside the job, attachments stream straight into parsing
         if start_date and end_date:
             update_job_progress(job_id, 2, "Checking Gmail Connection...")
             
@@ -911,60 +1342,27 @@ async def start_analysis(
                     status_code=400,
                     detail="Gmail not connected. Please connect your Gmail account first by clicking 'Connect Gmail' button."
                 )
-            
-            try:
-                update_job_progress(job_id, 3, "Fetching Resumes from Gmail...")
-                gmail_resumes = gmail_fetch_service.fetch_resumes(start_date, end_date)
-                
-                if gmail_resumes:
-                    logger.info(f"✅ Fetched {len(gmail_resumes)} resumes from Gmail")
-                    
-                    # Create Metadata Map {filename: {subject, body}}
-                    # gmail_metadata is already dict
-                    
-                    for item in gmail_resumes:
-                        # Save with [Gmail] prefix to distinguish source
-                        safe_fname = f"[Gmail] {item['filename']}"
-                        fpath = os.path.join(temp_dir, safe_fname)
-                        
-                        gmail_metadata[safe_fname] = {
-                            "email_subject": item["email_subject"],
-                            "email_body": item["email_body"],
-                            "sender_email": item.get('sender', '')
-                        }
-                        
-                        with open(fpath, "wb") as f:
-                            f.write(item["content"])
-                        
-                        # Store email metadata for role matching (done in pipeline)
-                        # We'll pass this through somehow - for now just log
-                        logger.info(f"  📧 From: '{item['email_subject']}'")
-                        
-                else: 
-                     logger.info("No resumes found in Gmail range.")
-                     
-                if gmail_resumes:
-                    files_found = True
-            
-            except ValueError as e:
-                # Gmail not connected error
-                logger.error(f"Gmail connection error: {e}")
-                raise HTTPException(status_code=400, detail=str(e))
-            except Exception as e:
-                logger.error(f"Gmail Fetch Error: {e}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to fetch emails from Gmail: {str(e)}"
-                )
+            gmail_range = {"start_date": start_date, "end_date": end_date}
+            files_found = True
         
         if not files_found:
              raise HTTPException(status_code=400, detail="No resumes provided. Please upload files or select a valid date range for Gmail.")
 
-        # 5. Spawn Background Task
-        # (job_id: str, jd_text: str, source_dir: str, top_n: int, jd_source_name: str, gmail_metadata: dict)
-        background_tasks.add_task(_run_async_analysis, job_id, jd_text, temp_dir, top_n, jd_source, gmail_metadata)
+        # 5. Admit via the shared queue: run by this process (inline) or a worker process
+        job_args = {
+            "jd_text": jd_text,
+            "source_dir": temp_dir,
+            "top_n": top_n,
+            "jd_source_name": jd_source,
+            "gmail_range": gmail_range,
+            "jd_profile_id": reuse_profile_id,
+        }
+        # Status first: once enqueued, a worker may claim the job (and mark it processing) at any moment
+        job_store.update(job_id, status="queued", progress=4, current_step="Waiting for a free analysis slot...")
+        job_queue.enqueue(job_id, job_args, priority=priority)
+        start_job_dispatcher()  # Mounted sub-apps never see startup events; make sure inline mode is draining
 
-        return {"job_id": job_id, "status": "processing"}
+        return {"job_id": job_id, "status": "queued", "queue_position": job_queue.position(job_id)}
 
     except Exception as e:
         fail_job(job_id, str(e))
@@ -973,20 +1371,270 @@ async def start_analysis(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/status/{job_id}", response_model=JobStatusResponse)
-def get_status(job_id: str):
-    if job_id not in jobs:
+def get_status(job_id: str, candidates: bool = True):
+    """candidates=false returns the result without its candidate list (page it from /jobs/{job_id}/candidates)."""
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
+
+    result = job["result"]
+    if result is not None and not candidates:
+        result = {k: v for k, v in result.items() if k != "candidates"}
+        result["candidate_count"] = len(job["result"].get("candidates", []))
     
-    job = jobs[job_id]
     return JobStatusResponse(
         job_id=job_id,
         status=job["status"],
         progress=job["progress"],
         current_step=job["current_step"],
-        result=job["result"],
-        error=job["error"]
+        result=result,
+        error=job["error"],
+        queue_position=job_queue.position(job_id) if job["status"] == "queued" else None
+    )
+
+@app.post("/cancel/{job_id}")
+def cancel_job(job_id: str):
+    """Drop a queued job, or stop a running one at its next stage boundary."""
+    job = job_store.get(job_id, with_result=False)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] in ("completed", "error", "cancelled"):
+        return {"job_id": job_id, "status": job["status"], "cancelled": False}
+
+    outcome = job_queue.cancel(job_id)
+    if outcome == "cancelled":
+        mark_job_cancelled(job_id)
+        return {"job_id": job_id, "status": "cancelled", "cancelled": True}
+    if outcome == "cancelling":
+        update_job_progress(job_id, job["progress"], "Cancelling (stopping after the current stage)...")
+        return {"job_id": job_id, "status": "cancelling", "cancelled": True}
+    return {"job_id": job_id, "status": job["status"], "cancelled": False}
+
+def _terminal_event(job_id: str, job: dict) -> Optional[dict]:
+    """The closing SSE event for a finished job (None while it is still queued / running)."""
+    if job["status"] == "completed":
+        result = job_store.get(job_id)["result"] or {}
+        return {"id": None, "event": "complete", "data": _completion_summary(result)}
+    if job["status"] == "error":
+        return {"id": None, "event": "error", "data": {"error": job["error"]}}
+    if job["status"] == "cancelled":
+        return {"id": None, "event": "cancelled", "data": {}}
+    return None
+
+async def _bus_events(job_id: str, last_event_id: int):
+    """In-process bus events, checked against the store while the bus is quiet: a job that finished
+    out of this process's sight (restart, evicted history, another replica) still gets its ending."""
+    async for message in job_events.subscribe(job_id, last_event_id):
+        if message is None:
+            job = job_store.get(job_id, with_result=False)
+            terminal = _terminal_event(job_id, job) if job else None
+            if terminal is not None:
+                yield terminal
+                return
+        yield message
+
+async def _store_events(job_id: str, cursor: int):
+    """Poll the shared job store and emit the same event stream the in-process bus would."""
+    last_progress = None
+    last_stage = None
+    while True:
+        job = job_store.get(job_id, with_result=False)
+        if job is None:
+            yield {"id": None, "event": "error", "data": {"error": "Job not found"}}
+            return
+        if (job["progress"], job["current_step"]) != last_progress:
+            last_progress = (job["progress"], job["current_step"])
+            yield {"id": None, "event": "progress", "data": {"progress": job["progress"], "current_step": job["current_step"]}}
+        if job["stage"] and job["stage"] != last_stage:
+            last_stage = job["stage"]
+            yield {"id": None, "event": "stage", "data": {"stage": job["stage"]}}
+        # Candidate events carry their row seq as event id, so Last-Event-ID resumes the delta stream
+        for row in job_store.candidates_since(job_id, cursor):
+            cursor = row["seq"]
+            yield {"id": row["seq"], "event": "candidate", "data": row}
+        terminal = _terminal_event(job_id, job)
+        if terminal is not None:
+            yield terminal
+            return
+        yield None  # keep-alive (also lets the caller notice disconnects)
+        await asyncio.sleep(settings.job_poll_interval_seconds)
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events: progress, stage and per-candidate delta events, ending with
+    "complete" or "error". Reconnects resume from the Last-Event-ID header.
+    """
+    if not job_store.exists(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        last_event_id = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        last_event_id = 0
+
+    async def event_stream():
+        job = job_store.get(job_id, with_result=False) or {"status": "error", "progress": 0, "current_step": "", "error": "Job evicted"}
+        yield format_sse({"id": None, "event": "snapshot", "data": {
+            "status": job["status"],
+            "progress": job["progress"],
+            "current_step": job["current_step"],
+            "error": job["error"],
+        }})
+        # Already finished: the bus may never replay its ending (restart, evicted history, another replica)
+        terminal = _terminal_event(job_id, job) if job_store.exists(job_id) else None
+        if terminal is not None:
+            yield format_sse(terminal)
+            return
+        # Worker mode: the pipeline runs in another process, so events are derived from the shared store
+        source = _store_events(job_id, last_event_id) if settings.job_queue_mode == "worker" else _bus_events(job_id, last_event_id)
+        async for message in source:
+            if await request.is_disconnected():
+                break
+            yield format_sse(message)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+@app.get("/jobs/{job_id}/results")
+def get_partial_results(job_id: str, cursor: int = 0, limit: int = 50):
+    """
+    Growing ranked candidate list while the job runs.
+    Returns rows changed since `cursor` (oldest change first) plus the current top `limit`
+    ranking; pass the returned cursor back to fetch the next delta.
+    """
+    job = job_store.get(job_id, with_result=False)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    limit = max(1, min(limit, 500))
+
+    ranked = sorted(job_store.candidates(job_id), key=_partial_rank_key, reverse=True)
+    ranks = {row["filename"]: i + 1 for i, row in enumerate(ranked)}
+    changed = sorted((row for row in ranked if row["seq"] > cursor), key=lambda row: row["seq"])
+    page = changed[:limit]
+
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "stage": job["stage"],
+        "cursor": page[-1]["seq"] if page else max(cursor, 0),
+        "has_more": len(changed) > len(page),
+        "total_candidates": len(ranked),
+        "ranking": [row["filename"] for row in ranked[:limit]],
+        "candidates": [dict(row, rank=ranks[row["filename"]]) for row in page],
+    }
+
+# Sort keys for the final candidate list ("rank" keeps the pipeline's own order)
+_CANDIDATE_SORTS = {
+    "score": lambda c: (c.get("score") or {}).get("total", 0),
+    "name": lambda c: (c.get("candidate_name") or c.get("name") or "").lower(),
+    "filename": lambda c: c.get("filename", "").lower(),
+    "status": lambda c: c.get("status") or "",
+}
+
+@app.get("/jobs/{job_id}/candidates")
+def get_job_candidates(job_id: str, request: Request, offset: int = 0, limit: int = 50, fields: Optional[str] = None, sort: str = "rank"):
+    """
+    One page of a finished job's final candidate list, read from the job store.
+    fields: comma-separated top-level keys to return (default: all; resume text is never included)
+    sort: rank (default), score, name, filename or status; prefix "-" to reverse (e.g. -score)
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "completed" or not job["result"]:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}; partial rows are at /jobs/{job_id}/results")
+
+    sort_key = sort.lstrip("-")
+    if sort_key != "rank" and sort_key not in _CANDIDATE_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}'")
+    offset = max(0, offset)
+    limit = max(1, min(limit, 500))
+
+    ranked = job["result"].get("candidates", [])
+    rows = list(enumerate(ranked, start=1))
+    if sort_key != "rank":
+        # Highest score first; text keys A-Z
+        descending = (sort_key == "score") != sort.startswith("-")
+        rows.sort(key=lambda item: _CANDIDATE_SORTS[sort_key](item[1]), reverse=descending)
+    elif sort.startswith("-"):
+        rows.reverse()
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    items = []
+    for rank, c in rows[offset:offset + limit]:
+        if selected is None:
+            item = {k: v for k, v in c.items() if k != "text"}
+        else:
+            item = {k: c[k] for k in selected if k in c and k != "text"}
+        item["rank"] = rank
+        items.append(item)
+
+    return compact_json_response(request, {
+        "job_id": job_id,
+        "total": len(ranked),
+        "offset": offset,
+        "limit": limit,
+        "sort": sort,
+        "has_more": offset + len(items) < len(ranked),
+        "items": items,
+    })
+
+@app.get("/jobs/{job_id}/export")
+def export_job_results(job_id: str, format: str = "csv"):
+    """A finished job's candidates as one flat table (one row per candidate): csv, xlsx or parquet."""
+    if format not in result_export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(result_export.EXPORT_FORMATS)}")
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "completed" or not job["result"]:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+    campaign = job["result"].get("campaign_folder")
+    catalog_entry = campaign_catalog.get(campaign) if campaign else None
+    rows = result_export.candidate_rows(job["result"], job_id=job_id, jd_title=catalog_entry["jd_title"] if catalog_entry else None)
+    try:
+        body, media_type = result_export.export(rows, format)
+    except result_export.ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return Response(content=body, media_type=media_type,
+                    headers={"Content-Disposition": f'attachment; filename="{campaign or job_id}.{format}"'})
+
+@app.get("/job-store/stats")
+def job_store_stats():
+    return {**job_store.stats(), "queue_mode": settings.job_queue_mode, "queue": job_queue.stats()}
+
+@app.get("/jd-profiles")
+def list_jd_profiles(limit: int = 50):
+    return {"profiles": jd_profile_store.list(limit)}
+
+@app.get("/jd-profiles/{profile_id}")
+def get_jd_profile(profile_id: str):
+    stored = jd_profile_store.get(profile_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="JD profile not found")
+    return stored
+
+@app.get("/llm/scheduler")
+def llm_scheduler_stats():
+    return llm_scheduler.stats()
+
+@app.get("/llm/rate-limit")
+def llm_rate_limit():
+    return ai_service.ai_service.rate_limit_stats()
+
+@app.get("/llm/health")
+def llm_health():
+    """Circuit breaker state and p50/p99 latency per call type."""
+    return health_snapshot()
+
+@app.get("/llm-cache/stats")
+def llm_cache_stats():
+    return ai_service.ai_service.cache_stats()
+
 @app.post("/open_report")
 def open_report(path: str = Form(...)):
     try:
@@ -997,6 +1645,49 @@ def open_report(path: str = Form(...)):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.get("/campaigns")
+def list_campaigns(title: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+                   email: Optional[str] = None, limit: int = 50, offset: int = 0):
+    """Past campaigns, newest first. since/until are unix timestamps; email finds campaigns with that candidate."""
+    if limit < 1 or limit > 500 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be 1-500 and offset >= 0")
+    return campaign_catalog.list(title=title, since=since, until=until, email=email, limit=limit, offset=offset)
+
+@app.get("/campaigns/{campaign}")
+def get_campaign(campaign: str):
+    summary = campaign_catalog.get(campaign)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return {
+        **summary,
+        "selected": campaign_catalog.candidates(campaign, LIST_SELECTED),
+        "not_selected": campaign_catalog.candidates(campaign, LIST_NOT_SELECTED),
+    }
+
+@app.get("/campaigns/{campaign}/{list_name}")
+def get_campaign_list(campaign: str, list_name: str):
+    """Same JSON as the campaign's selected_candidates.json / not_selected_candidates.json."""
+    if list_name not in (LIST_SELECTED, LIST_NOT_SELECTED) or campaign_catalog.get(campaign) is None:
+        raise HTTPException(status_code=404, detail="Campaign list not found")
+    return campaign_catalog.candidates(campaign, list_name)
+
+@app.get("/reports/{campaign}/archive")
+def campaign_archive(campaign: str, shortlisted_only: bool = False):
+    """The campaign as one ZIP (resumes + handoff JSONs), streamed while it is built."""
+    report_dir = os.path.join("Reports", campaign)
+    if campaign in ("", ".", "..") or os.path.basename(campaign) != campaign or not os.path.isdir(report_dir):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    archive_name = f"{campaign}_shortlisted.zip" if shortlisted_only else f"{campaign}.zip"
+    return StreamingResponse(
+        stream_campaign_zip(report_dir, blob_store, shortlisted_only=shortlisted_only),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{archive_name}"'},
+    )
+
+# Mount Reports for Static Access (after the routes above, so /reports/{campaign}/archive isn't shadowed)
+os.makedirs("Reports", exist_ok=True)
+app.mount("/reports", StaticFiles(directory="Reports"), name="reports")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -27,6 +27,7 @@ class ProcessingStatus(BaseModel):
 
 # LLM Analysis Models
 class CandidateAnalysis(BaseModel):
+    candidate_id: Optional[str] = None # Echoed batch id (e.g. "C2") for multi-candidate prompts
     filename: str
     candidate_name: str
     email: Optional[str] = "Not Found"
@@ -45,8 +46,9 @@ class LLMOutput(BaseModel):
 
 class JobStatusResponse(BaseModel):
     job_id: str
-    status: str  # "processing", "completed", "error"
+    status: str  # "queued", "processing", "completed", "error", "cancelled"
     progress: int  # 0-100
     current_step: str
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    queue_position: Optional[int] = None  # 1-based while status is "queued"
@@ -1,40 +1,20 @@
 import os
 import json
-from openai import OpenAI
+import asyncio
+import logging
+from typing import Callable, Optional
+from openai import OpenAI, AsyncOpenAI, RateLimitError
 from ..core.config import get_settings
+from .llm_cache import llm_cache
+from .rate_limiter import RateLimiter
+from .llm_scheduler import llm_scheduler
+from .llm_resilience import resilient_call, call_sync, remaining_timeout
+from .prompt_builder import prompt_builder
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
-class AIService:
-    def __init__(self):
-        # DIRECT OPENAI INTEGRATION
-        self.client = OpenAI(api_key=settings.openai_api_key)
-        self.provider = "openai"
-        self.model = settings.llm_model # "gpt-4o"
-
-    def query(self, prompt: str, temperature: float = 0.3, json_mode: bool = False) -> str:
-        try:
-            kwargs = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": "You are a helpful HR assistant designed to analyze resumes. " + ("You MUST output valid JSON." if json_mode else "")},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": temperature,
-                "max_tokens": 2000,
-            }
-            
-            if json_mode:
-                kwargs["response_format"] = {"type": "json_object"}
-
-            completion = self.client.chat.completions.create(**kwargs)
-            return completion.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"AI API Error ({self.provider}): {e}")
-            return ""
-
-    def anonymize(self, text: str) -> str:
-        prompt = f"""
+ANONYMIZE_PROMPT = """
         Task: Anonymize the following resume text.
         Instructions:
         1. Replace the Candidate Name with [CANDIDATE_NAME].
@@ -44,12 +24,184 @@ class AIService:
         5. Replace University Names (e.g. 'Harvard University') with [UNIVERSITY].
         6. DO NOT remove Skills, Experience, Projects, or Job Titles.
         7. Return ONLY the anonymized text. Do not add any preamble.
-        
+
         Resume Text:
         Resume Text:
         {text}
         """
-        return self.query(prompt, temperature=0.1)
+
+class AIService:
+    def __init__(self):
+        # DIRECT OPENAI INTEGRATION
+        # SDK retries are off: 429s are retried here, in step with the shared rate limiter
+        self.client = OpenAI(api_key=settings.openai_api_key, max_retries=0, timeout=settings.llm_timeout_seconds)
+        # Async client for the concurrent analysis pass (does not block the event loop)
+        self.async_client = AsyncOpenAI(api_key=settings.openai_api_key, max_retries=0, timeout=settings.llm_timeout_seconds)
+        self.rate_limiter = RateLimiter(settings.llm_rpm_limit, settings.llm_tpm_limit)
+        self.provider = "openai"
+        self.model = settings.llm_model # "gpt-4o"
+
+    def _build_request(self, prompt: str, temperature: float, json_mode: bool, max_tokens: int = 2000) -> dict:
+        kwargs = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful HR assistant designed to analyze resumes. " + ("You MUST output valid JSON." if json_mode else "")},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
+    def _estimate_tokens(self, kwargs: dict) -> int:
+        """TPM cost as the provider counts it: prompt tokens + requested max_tokens."""
+        prompt_tokens = sum(prompt_builder.count_tokens(m["content"]) for m in kwargs["messages"])
+        return prompt_tokens + kwargs["max_tokens"]
+
+    def _on_rate_limited(self, e: RateLimitError, attempt: int):
+        """Shared 429 handling: re-raise when out of retries/quota, else push the limiter back."""
+        if attempt >= settings.llm_max_retries or getattr(e, "code", None) == "insufficient_quota":
+            raise e
+        headers = e.response.headers if getattr(e, "response", None) is not None else None
+        delay = self.rate_limiter.backoff_delay(attempt, headers)
+        self.rate_limiter.update_from_headers(headers)
+        self.rate_limiter.penalize(delay)
+        logger.warning(f"⚠️ Rate Limit Hit (429). Retrying in {delay:.1f}s... (Attempt {attempt+1}/{settings.llm_max_retries})")
+
+    def _create(self, kwargs: dict, call_type: str = "default"):
+        tokens = self._estimate_tokens(kwargs)
+        for attempt in range(settings.llm_max_retries + 1):
+            self.rate_limiter.acquire_sync(tokens)
+            try:
+                raw = call_sync(call_type, lambda: self.client.chat.completions.with_raw_response.create(
+                    **kwargs, timeout=remaining_timeout(settings.llm_timeout_seconds)
+                ))
+                self.rate_limiter.update_from_headers(raw.headers)
+                return raw.parse()
+            except RateLimitError as e:
+                self._on_rate_limited(e, attempt)
+
+    async def _acreate(self, kwargs: dict, call_type: str = "default", hedge: bool = False):
+        tokens = self._estimate_tokens(kwargs)
+        # Fair share of the process-wide LLM quota (priority/flow come from the caller's bound flow)
+        async with llm_scheduler.slot(cost=tokens):
+            for attempt in range(settings.llm_max_retries + 1):
+                # Waits just long enough for RPM/TPM budget (and any 429 penalty) - no fixed sleeps
+                await self.rate_limiter.acquire(tokens)
+                try:
+                    # Timeout is capped by the caller's deadline; an open circuit raises without calling out
+                    raw = await resilient_call(
+                        call_type,
+                        lambda timeout: self.async_client.chat.completions.with_raw_response.create(**kwargs, timeout=timeout),
+                        hedge=hedge
+                    )
+                    self.rate_limiter.update_from_headers(raw.headers)
+                    return raw.parse()
+                except RateLimitError as e:
+                    self._on_rate_limited(e, attempt)
+
+    def _cache_key(self, kwargs: dict, use_cache: bool):
+        """Cache key for deterministic (temperature 0) calls, else None."""
+        if llm_cache is None or not use_cache or kwargs["temperature"] != 0:
+            return None
+        return llm_cache.make_key(kwargs)
+
+    @staticmethod
+    def _cacheable(content: Optional[str], validate: Optional[Callable[[str], object]]) -> bool:
+        """Only replies the caller can use are cached (and replayed): a malformed one would come back on every rerun."""
+        if not content:
+            return False
+        if validate is None:
+            return True
+        try:
+            return bool(validate(content))
+        except Exception:
+            return False
+
+    def query(self, prompt: str, temperature: float = 0.3, json_mode: bool = False, use_cache: bool = True, max_tokens: int = 2000, call_type: str = "default", validate: Optional[Callable[[str], object]] = None) -> str:
+        try:
+            kwargs = self._build_request(prompt, temperature, json_mode, max_tokens)
+            cache_key = self._cache_key(kwargs, use_cache)
+            if cache_key:
+                cached = llm_cache.get(cache_key)
+                if self._cacheable(cached, validate):
+                    return cached
+
+            completion = self._create(kwargs, call_type)
+            content = completion.choices[0].message.content.strip()
+            if cache_key and self._cacheable(content, validate):
+                llm_cache.set(cache_key, content)
+            return content
+        except Exception as e:
+            logger.error(f"AI API Error ({self.provider}): {e}")
+            return ""
+
+    async def aquery(
+        self,
+        prompt: str,
+        temperature: float = 0.3,
+        json_mode: bool = False,
+        use_cache: bool = True,
+        max_tokens: int = 2000,
+        call_type: str = "default",
+        hedge: bool = False,
+        validate: Optional[Callable[[str], object]] = None
+    ) -> str:
+        """
+        Async variant of query() - safe to run many at once from the event loop.
+        call_type labels latency stats; hedge=True duplicates slow calls (short interactive calls only).
+        validate: raises or returns falsy for replies the caller can't use; those are neither cached nor
+        served from the cache.
+        Returns "" on any failure (timeout, open circuit, API error) so callers fall back to base scores.
+        """
+        try:
+            kwargs = self._build_request(prompt, temperature, json_mode, max_tokens)
+            cache_key = self._cache_key(kwargs, use_cache)
+            if cache_key:
+                # SQLite I/O stays off the event loop
+                cached = await asyncio.to_thread(llm_cache.get, cache_key)
+                if self._cacheable(cached, validate):
+                    return cached
+
+            completion = await self._acreate(kwargs, call_type, hedge)
+            content = completion.choices[0].message.content.strip()
+            if cache_key and self._cacheable(content, validate):
+                await asyncio.to_thread(llm_cache.set, cache_key, content)
+            return content
+        except Exception as e:
+            logger.error(f"AI API Error ({self.provider}): {e}")
+            return ""
+
+    def rate_limit_stats(self) -> dict:
+        return self.rate_limiter.snapshot()
+
+    def cache_stats(self) -> dict:
+        return llm_cache.stats() if llm_cache is not None else {"enabled": False}
+
+    def anonymize(self, text: str, known_pii: dict = None) -> str:
+        """Mask PII using the configured backend (settings.anonymizer_backend: "local" or "llm")."""
+        if not settings.enable_anonymization:
+            return text
+        if settings.anonymizer_backend == "local":
+            from .anonymizer import local_anonymizer
+            return local_anonymizer.anonymize(text, known_pii)
+        return self.llm_anonymize(text)
+
+    async def aanonymize(self, text: str, known_pii: dict = None) -> str:
+        if not settings.enable_anonymization:
+            return text
+        if settings.anonymizer_backend == "local":
+            from .anonymizer import local_anonymizer
+            # spaCy is CPU-bound: keep it off the event loop
+            return await asyncio.to_thread(local_anonymizer.anonymize, text, known_pii)
+        return await self.aquery(ANONYMIZE_PROMPT.format(text=text), temperature=0.1, call_type="anonymize")
+
+    def llm_anonymize(self, text: str) -> str:
+        """Original GPT-based anonymizer (kept for validation runs and as a fallback backend)."""
+        return self.query(ANONYMIZE_PROMPT.format(text=text), temperature=0.1, call_type="anonymize")
 
     def extract_location(self, text: str) -> str:
         prompt = f"""
@@ -57,10 +209,10 @@ class AIService:
         If Remote, return 'Remote'.
         If multiple locations, return the primary one.
         Return ONLY the location string.
-        
+
         Job Description:
         {text[:1000]}
         """
-        return self.query(prompt, temperature=0.1).strip()
+        return self.query(prompt, temperature=0.1, call_type="extract_location").strip()
 
 ai_service = AIService()
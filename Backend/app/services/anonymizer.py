@@ -0,0 +1,247 @@
+"""
+Local PII Anonymizer - spaCy NER + Compiled Regexes
+Masks candidate name, email, phone, profile links and universities without an LLM round trip.
+Output uses the same placeholders as the LLM prompt ([CANDIDATE_NAME], [EMAIL], ...) so
+downstream prompts do not change.
+"""
+
+import re
+import logging
+from typing import Dict, List, Optional
+
+from .utils import nlp
+
+logger = logging.getLogger(__name__)
+
+# --- Compiled Patterns (built once at import) ---
+EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Digit runs with optional separators. Digit count is validated in _mask_phone
+# so that year ranges ("2019 2023") and IDs are left alone.
+PHONE_RE = re.compile(r'(?<![\w])(?:\+?\d[\d\s().-]{8,18}\d)(?![\w])')
+YEAR_RE = re.compile(r'^(?:19|20)\d{2}$')
+
+# Profile links survive clean_text() as e.g. "linkedincominjohndoe"
+PROFILE_RE = re.compile(r'\b(?:https?://)?(?:www\.)?(?:linkedin|github)(?:\.com)?/?(?:in/)?[\w/-]*', re.IGNORECASE)
+
+# Words that end a university name when scanning backwards ("... from xyz university")
+_UNI_BOUNDARY = (
+    r'(?:from|at|in|of|the|and|with|to|for|b|m|bachelor|bachelors|master|masters|degree|'
+    r'btech|mtech|be|me|bsc|msc|ba|ma|bca|mca|mba|phd|diploma|education|graduated|studied|'
+    # Fields of study sit right before the institution name ("computer science xyz university")
+    r'science|sciences|engineering|computer|technology|information|electronics|electrical|'
+    r'mechanical|civil|chemical|commerce|arts|management|business|data|mathematics|physics)'
+)
+_UNI_KEYWORD = r'(?i:university|college|institute|polytechnic)'
+# Cased text: the name is the run of Capitalized tokens around the keyword
+UNIVERSITY_RE = re.compile(
+    rf'\b(?:(?!(?i:{_UNI_BOUNDARY})\b)[A-Z][\w&\'.-]*\s+){{0,4}}'
+    rf'{_UNI_KEYWORD}'
+    r'(?:\s+of(?:\s+the)?(?:\s+[A-Z][a-z]+){1,3})?\b'
+)
+# clean_text() output is lowercased, so case can't delimit the name: take at most two
+# preceding words that aren't boundary / field-of-study words. After "of" only connector and
+# field words follow ("institute of science and technology"): the tail stops at the first
+# other token, so "institute of technology delhi cgpa 85" keeps "delhi cgpa 85" (cities are
+# not masked, same as the LLM prompt)
+_UNI_OF_WORD = (
+    r'(?:the|and|science|sciences|technology|engineering|management|arts|commerce|'
+    r'information|applied|advanced|studies|research|education|medical|medicine|law|'
+    r'business|economics|pharmacy|architecture|design|fashion|mines|petroleum|energy|'
+    r'agriculture|agricultural|veterinary|computer|electronics|mathematics|statistics)'
+)
+UNIVERSITY_LOWER_RE = re.compile(
+    rf'\b(?:(?!{_UNI_BOUNDARY}\b)[a-z][\w&\'.-]*\s+){{0,2}}'
+    r'(?:university|college|institute|polytechnic)'
+    rf'(?:\s+of(?:\s+{_UNI_OF_WORD}\b){{1,4}})?\b'
+)
+# Abbreviations only where they can't be ordinary words: upper case, plus the campus when capitalized
+INSTITUTE_ABBR_RE = re.compile(r'\b(?:IIIT|IIT|NIT|IIM)s?\b(?:[ ,-]+[A-Z][a-z]+)?|\bBITS(?:[ ,-]+[A-Z][a-z]+)')
+# Lowercased text: "bits" is an English word, so it needs a BITS campus after it; the others don't.
+# The campus city itself is kept (cities are not masked, same as the LLM prompt)
+INSTITUTE_ABBR_LOWER_RE = re.compile(r'\b(?:iiit|iit|nit|iim)s?\b|\bbits\s+(?:pilani|goa|hyderabad|dubai)\b')
+EDU_ORG_KEYWORDS = ("university", "college", "institute", "school", "academy", "polytechnic")
+
+
+class LocalAnonymizer:
+    """Deterministic replacement for AIService.anonymize (no network, ~ms per resume)."""
+
+    def __init__(self):
+        self.header_chars = 500  # Names are only trusted from NER in the resume header
+
+    def anonymize(self, text: str, known_pii: Optional[Dict[str, str]] = None) -> str:
+        """
+        Mask PII in resume text.
+
+        Args:
+            text: Raw or clean_text()'d resume text
+            known_pii: Already-extracted contact fields, e.g. {"name": ..., "name_source": ..., "email": ...}.
+                       These are masked first since they are the most reliable signal.
+        """
+        if not text:
+            return ""
+        known_pii = known_pii or {}
+
+        # 1. Known contact fields (also in the punctuation-stripped form clean_text produces)
+        email = (known_pii.get("email") or "").strip()
+        if email:
+            for variant in {email, re.sub(r'[^\w]', '', email)}:
+                if len(variant) > 5:
+                    text = re.sub(re.escape(variant), '[EMAIL]', text, flags=re.IGNORECASE)
+
+        text = EMAIL_RE.sub('[EMAIL]', text)
+        text = PROFILE_RE.sub('[PROFILE_LINK]', text)
+        text = PHONE_RE.sub(self._mask_phone, text)
+
+        # 2. Universities (regex first, NER ORGs below catch the rest)
+        if text == text.lower():
+            text = UNIVERSITY_LOWER_RE.sub('[UNIVERSITY]', text)
+            text = INSTITUTE_ABBR_LOWER_RE.sub('[UNIVERSITY]', text)
+        else:
+            text = UNIVERSITY_RE.sub('[UNIVERSITY]', text)
+            text = INSTITUTE_ABBR_RE.sub('[UNIVERSITY]', text)
+
+        # 3. NER: PERSON in header, education ORGs anywhere
+        names = []
+        persons = set()
+        try:
+            doc = nlp(text)
+            for ent in doc.ents:
+                ent_text = ent.text.strip()
+                if ent.label_ == "PERSON":
+                    persons.add(ent_text.lower())
+                    if ent.start_char < self.header_chars and len(ent_text.split()) >= 2:
+                        names.append(ent_text)
+                elif ent.label_ == "ORG" and any(k in ent_text.lower() for k in EDU_ORG_KEYWORDS):
+                    text = text.replace(ent_text, '[UNIVERSITY]')
+        except Exception as e:
+            logger.warning(f"NER pass failed during anonymization: {e}")
+
+        # A name NER already found in this resume's header is masked as is (lowercased text
+        # rarely gets a PERSON tag a second time). extract_name()'s filename fallback may be
+        # "Python Developer": only trust that one when NER also tags it as a person here
+        known_name = (known_pii.get("name") or "").strip()
+        if known_name and (known_pii.get("name_source") == "resume" or known_name.lower() in persons):
+            names.append(known_name)
+
+        # Full names everywhere, longest first so "John Doe" wins over "John"
+        for name in sorted(set(names), key=len, reverse=True):
+            text = re.sub(rf'\b{re.escape(name)}\b', '[CANDIDATE_NAME]', text, flags=re.IGNORECASE)
+
+        # Single name parts only in the header: elsewhere they are as likely to be a skill or a word
+        parts = {part for name in names for part in self._name_parts(name)}
+        if parts:
+            header, body = text[:self.header_chars], text[self.header_chars:]
+            for part in sorted(parts, key=len, reverse=True):
+                header = re.sub(rf'\b{re.escape(part)}\b', '[CANDIDATE_NAME]', header, flags=re.IGNORECASE)
+            text = header + body
+
+        return text
+
+    def _mask_phone(self, match: re.Match) -> str:
+        raw = match.group(0)
+        digits = re.sub(r'\D', '', raw)
+        if not 10 <= len(digits) <= 13:
+            return raw
+        # "2018 2019 2020" style runs are dates, not phones
+        groups = re.findall(r'\d+', raw)
+        if all(YEAR_RE.match(g) for g in groups):
+            return raw
+        return '[PHONE]'
+
+    def _name_parts(self, name: str) -> List[str]:
+        """Individual name parts long enough not to collide with common words."""
+        return [part for part in name.split() if len(part) > 2 and not nlp.vocab[part.lower()].is_stop]
+
+    def validate_against_llm(self, samples: List[Dict[str, str]], llm_anonymize) -> Dict:
+        """
+        Compare local output with the LLM anonymizer on a sample corpus.
+
+        Args:
+            samples: [{"text": ..., "name": ..., "email": ...}, ...]
+            llm_anonymize: Callable(text) -> str (e.g. ai_service.query-based anonymize)
+
+        Returns:
+            Summary with PII leak counts for both backends and how much non-PII content each kept.
+        """
+        report = {"samples": len(samples), "local_leaks": 0, "llm_leaks": 0,
+                  "local_token_retention": 0.0, "llm_token_retention": 0.0, "details": []}
+        if not samples:
+            return report
+
+        for sample in samples:
+            text = sample["text"]
+            pii = [v for v in (sample.get("name"), sample.get("email")) if v]
+            pii += EMAIL_RE.findall(text)
+            pii += [m.group(0) for m in PHONE_RE.finditer(text) if self._mask_phone(m) == '[PHONE]']
+
+            local_out = self.anonymize(text, sample)
+            llm_out = llm_anonymize(text) or ""
+
+            local_leaks = [p for p in pii if p.lower() in local_out.lower()]
+            llm_leaks = [p for p in pii if p.lower() in llm_out.lower()]
+            report["local_leaks"] += len(local_leaks)
+            report["llm_leaks"] += len(llm_leaks)
+
+            local_ret = self._token_retention(text, local_out)
+            llm_ret = self._token_retention(text, llm_out)
+            report["local_token_retention"] += local_ret
+            report["llm_token_retention"] += llm_ret
+            report["details"].append({
+                "name": sample.get("name", ""),
+                "local_leaks": local_leaks,
+                "llm_leaks": llm_leaks,
+                "local_token_retention": round(local_ret, 3),
+                "llm_token_retention": round(llm_ret, 3),
+            })
+
+        report["local_token_retention"] = round(report["local_token_retention"] / len(samples), 3)
+        report["llm_token_retention"] = round(report["llm_token_retention"] / len(samples), 3)
+        return report
+
+    @staticmethod
+    def _token_retention(original: str, anonymized: str) -> float:
+        """Share of original word tokens still present (skills, titles etc. should survive)."""
+        orig_tokens = set(re.findall(r'\w{3,}', original.lower()))
+        if not orig_tokens:
+            return 1.0
+        kept = set(re.findall(r'\w{3,}', anonymized.lower()))
+        return len(orig_tokens & kept) / len(orig_tokens)
+
+
+local_anonymizer = LocalAnonymizer()
+
+
+if __name__ == "__main__":
+    # Validation run: python -m app.services.anonymizer <resume_dir> [limit]
+    import os
+    import sys
+    import json
+    from .pdf_service import pdf_service
+    from .ai_service import ai_service
+    from . import utils
+
+    resume_dir = sys.argv[1] if len(sys.argv) > 1 else "data/resumes"
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    samples = []
+    for fname in sorted(os.listdir(resume_dir))[:limit]:
+        path = os.path.join(resume_dir, fname)
+        if fname.lower().endswith(".pdf"):
+            with open(path, "rb") as f:
+                raw = f.read()
+            text, _ = pdf_service.extract_text(raw)
+            email = pdf_service.extract_emails_advanced(raw)
+        elif fname.lower().endswith(".txt"):
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+            match = EMAIL_RE.search(text)
+            email = match.group(0) if match else ""
+        else:
+            continue
+        clean = utils.clean_text(text)
+        name, name_source = utils.extract_name_with_source(clean, fname)
+        samples.append({"text": clean, "name": name, "name_source": name_source, "email": email})
+
+    result = local_anonymizer.validate_against_llm(samples, ai_service.llm_anonymize)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,168 @@
+"""
+Campaign Catalog (SQLite)
+One row per finished campaign (JD title, counts, report folder) plus its selected / not-selected
+handoff lists, written when the job's reports are generated. Listing, filtering and loading past
+campaigns are indexed queries instead of walking Reports/ and parsing the JSON files.
+Campaign folders from before the catalog existed are indexed once by backfill().
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ..core.config import get_settings
+
+settings = get_settings()
+
+LIST_SELECTED = "selected"
+LIST_NOT_SELECTED = "not_selected"
+_HANDOFF_FILES = {LIST_SELECTED: "selected_candidates.json", LIST_NOT_SELECTED: "not_selected_candidates.json"}
+
+
+class CampaignCatalog:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS campaigns (
+                campaign TEXT PRIMARY KEY,
+                job_id TEXT,
+                jd_title TEXT,
+                jd_profile_id TEXT,
+                created_at REAL NOT NULL,
+                top_n INTEGER,
+                total_files INTEGER NOT NULL DEFAULT 0,
+                selected_count INTEGER NOT NULL DEFAULT 0,
+                not_selected_count INTEGER NOT NULL DEFAULT 0,
+                rejected_count INTEGER NOT NULL DEFAULT 0,
+                report_path TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_campaigns_created ON campaigns (created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_campaigns_title ON campaigns (jd_title COLLATE NOCASE)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS campaign_candidates (
+                campaign TEXT NOT NULL,
+                list TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                name TEXT,
+                email TEXT,
+                role TEXT,
+                resume TEXT,
+                reason TEXT,
+                PRIMARY KEY (campaign, list, position)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_campaign_candidates_email ON campaign_candidates (email)")
+        self._conn.commit()
+
+    def record(self, campaign: str, report_path: str, jd_title: Optional[str], selected: List[Dict],
+               not_selected: List[Dict], job_id: Optional[str] = None, jd_profile_id: Optional[str] = None,
+               top_n: Optional[int] = None, total_files: int = 0, rejected_count: int = 0,
+               created_at: Optional[float] = None):
+        """Insert (or replace) a campaign and its handoff lists in one transaction."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM campaign_candidates WHERE campaign = ?", (campaign,))
+                self._conn.execute(
+                    """INSERT OR REPLACE INTO campaigns
+                       (campaign, job_id, jd_title, jd_profile_id, created_at, top_n, total_files,
+                        selected_count, not_selected_count, rejected_count, report_path)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (campaign, job_id, jd_title, jd_profile_id, created_at or time.time(), top_n, total_files,
+                     len(selected), len(not_selected), rejected_count, report_path)
+                )
+                self._conn.executemany(
+                    """INSERT INTO campaign_candidates (campaign, list, position, name, email, role, resume, reason)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    [(campaign, list_name, i, c.get("name"), c.get("email"), c.get("role"), c.get("resume"), c.get("reason"))
+                     for list_name, rows in ((LIST_SELECTED, selected), (LIST_NOT_SELECTED, not_selected))
+                     for i, c in enumerate(rows)]
+                )
+
+    def list(self, title: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+             email: Optional[str] = None, limit: int = 50, offset: int = 0) -> Dict:
+        """Newest first. title: case-insensitive substring of the JD title; email: campaigns containing that candidate."""
+        clauses, params = [], []
+        if title:
+            clauses.append("jd_title LIKE ? COLLATE NOCASE")
+            params.append(f"%{title}%")
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if email:
+            clauses.append("campaign IN (SELECT campaign FROM campaign_candidates WHERE email = ? COLLATE NOCASE)")
+            params.append(email)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM campaigns {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM campaigns {where} ORDER BY created_at DESC LIMIT ? OFFSET ?", params + [limit, offset]
+            ).fetchall()
+        return {"total": total, "offset": offset, "campaigns": [dict(row) for row in rows]}
+
+    def get(self, campaign: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM campaigns WHERE campaign = ?", (campaign,)).fetchone()
+        return dict(row) if row else None
+
+    def candidates(self, campaign: str, list_name: str) -> List[Dict]:
+        """A handoff list in the same shape as its JSON file."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM campaign_candidates WHERE campaign = ? AND list = ? ORDER BY position",
+                (campaign, list_name)
+            ).fetchall()
+        if list_name == LIST_SELECTED:
+            return [{"name": r["name"], "email": r["email"], "role": r["role"], "resume": r["resume"] or ""} for r in rows]
+        return [{"name": r["name"], "email": r["email"], "role": r["role"], "reason": r["reason"]} for r in rows]
+
+    def backfill(self, reports_root: str) -> int:
+        """Index Campaign_* folders not in the catalog yet (from their handoff JSONs). Returns how many."""
+        if not os.path.isdir(reports_root):
+            return 0
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT campaign FROM campaigns")}
+        added = 0
+        for campaign in sorted(os.listdir(reports_root)):
+            report_dir = os.path.join(reports_root, campaign)
+            if campaign in known or not campaign.startswith("Campaign_") or not os.path.isdir(report_dir):
+                continue
+            lists = {}
+            for list_name, filename in _HANDOFF_FILES.items():
+                try:
+                    with open(os.path.join(report_dir, filename)) as f:
+                        lists[list_name] = json.load(f)
+                except (OSError, ValueError):
+                    lists[list_name] = []
+            try:
+                created_at = datetime.strptime(campaign[len("Campaign_"):], "%Y-%m-%d_%H-%M-%S").timestamp()
+            except ValueError:
+                created_at = os.path.getmtime(report_dir)
+            all_resumes = os.path.join(report_dir, "All_Resumes")
+            first = (lists[LIST_SELECTED] or lists[LIST_NOT_SELECTED] or [{}])[0]
+            self.record(
+                campaign, os.path.abspath(report_dir), first.get("role"), lists[LIST_SELECTED], lists[LIST_NOT_SELECTED],
+                total_files=len(os.listdir(all_resumes)) if os.path.isdir(all_resumes) else 0,
+                created_at=created_at,
+            )
+            added += 1
+        return added
+
+
+campaign_catalog = CampaignCatalog(settings.campaign_catalog_path)
@@ -0,0 +1,253 @@
+"""
+Candidate Records
+One slotted record per resume instead of an ad-hoc dict, collected in a per-job CandidatePool:
+  - filename / file_hash indexes (O(1) lookups; duplicate uploads share one stored text)
+  - resume text lives once in the pool's TextStore, not on the record: plain while the
+    pipeline still reads it, then zlib-compressed (or spilled to a temp file) after scoring
+Records keep dict-style access (c['score'], c.get('email'), 'role_match' in c) so stage code
+and the partial-row / report helpers work on them unchanged; to_dict() is the JSON form
+(every public field, unset ones as null; without text).
+
+Measure the difference on a synthetic 1000-resume job:
+
+    python -m app.services.candidate_pool [--resumes 1000]
+"""
+
+import os
+import zlib
+import tempfile
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional, Tuple
+
+TEXT_STORAGE_MODES = ("memory", "compress", "spill")
+
+
+class TextStore:
+    """Resume texts keyed by file hash. compact() packs them once the pipeline mostly stops reading."""
+
+    def __init__(self, mode: str = "compress", spill_dir: Optional[str] = None):
+        if mode not in TEXT_STORAGE_MODES:
+            raise ValueError(f"Unknown text storage mode: {mode}")
+        self.mode = mode
+        self.spill_dir = spill_dir
+        self._plain: Dict[str, str] = {}
+        self._packed: Dict[str, bytes] = {}
+        self._spilled: Dict[str, Tuple[int, int]] = {}  # key -> (offset, length) in the spill file
+        self._spill_file = None
+        self._lock = threading.Lock()
+
+    def put(self, key: str, text: str):
+        with self._lock:
+            if key in self._plain or key in self._packed or key in self._spilled:
+                return
+            self._plain[key] = text
+
+    def get(self, key: str) -> str:
+        with self._lock:
+            if key in self._plain:
+                return self._plain[key]
+            if key in self._packed:
+                return zlib.decompress(self._packed[key]).decode("utf-8")
+            if key in self._spilled:
+                offset, length = self._spilled[key]
+                self._spill_file.seek(offset)
+                return zlib.decompress(self._spill_file.read(length)).decode("utf-8")
+        return ""
+
+    def compact(self):
+        """Pack every plain text (no-op in "memory" mode). Later reads decompress on demand."""
+        with self._lock:
+            if self.mode == "memory" or not self._plain:
+                return
+            if self.mode == "spill" and self._spill_file is None:
+                self._spill_file = tempfile.TemporaryFile(dir=self.spill_dir, prefix="resume_texts_")
+            for key in list(self._plain):
+                # Pop as we go so plain and packed copies never coexist for the whole pool
+                blob = zlib.compress(self._plain.pop(key).encode("utf-8"), 6)
+                if self.mode == "spill":
+                    self._spill_file.seek(0, os.SEEK_END)
+                    self._spilled[key] = (self._spill_file.tell(), len(blob))
+                    self._spill_file.write(blob)
+                else:
+                    self._packed[key] = blob
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "texts": len(self._plain) + len(self._packed) + len(self._spilled),
+                "plain_chars": sum(len(t) for t in self._plain.values()),
+                "packed_bytes": sum(len(b) for b in self._packed.values()),
+                "spilled_bytes": sum(length for _, length in self._spilled.values()),
+            }
+
+    def close(self):
+        with self._lock:
+            self._plain.clear()
+            self._packed.clear()
+            self._spilled.clear()
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+
+
+@dataclass(slots=True, eq=False)
+class Candidate:
+    filename: str
+    name: str
+    score: Dict[str, Any]
+    status: str
+    file_hash: str
+    email: str = ""
+    name_source: str = ""  # extract_name_with_source(): "resume", "filename" or "unknown"
+    email_subject: Optional[str] = None
+    email_body: Optional[str] = None
+    extracted_skills: Optional[List[str]] = None
+    years_of_experience: Optional[float] = None
+    # Set by later stages (role match, AI verdict)
+    applied_for: Optional[str] = None
+    role_match: Optional[Dict[str, Any]] = None
+    ai_analyzed: Optional[bool] = None
+    analysis_method: Optional[str] = None
+    candidate_name: Optional[str] = None
+    phone: Optional[str] = None
+    reasoning: Optional[str] = None
+    strengths: Optional[List[str]] = None
+    weaknesses: Optional[List[str]] = None
+    hobbies_and_achievements: Optional[List[str]] = None
+    achievement_bonus: Optional[int] = None
+    _texts: Optional[TextStore] = field(default=None, repr=False)
+
+    @property
+    def text(self) -> str:
+        return self._texts.get(self.file_hash) if self._texts is not None else ""
+
+    # --- dict-style access (unset optional fields behave like missing keys) ---
+    def __getitem__(self, key: str):
+        if key == "text":
+            return self.text
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        if key == "text":
+            return self._texts is not None
+        return key in _FIELD_NAMES and getattr(self, key) is not None
+
+    def get(self, key: str, default=None):
+        if key == "text":
+            return self.text
+        value = getattr(self, key, None) if key in _FIELD_NAMES else None
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Every public field, unset ones as null: the frontend and exports read a fixed set of keys
+        return {name: getattr(self, name) for name in _FIELD_NAMES}
+
+
+_FIELD_NAMES = tuple(f.name for f in fields(Candidate) if not f.name.startswith("_"))
+
+
+class CandidatePool:
+    """The job's candidates, indexed by filename and by file hash, with their texts stored once."""
+
+    def __init__(self, text_storage: str = "compress", spill_dir: Optional[str] = None):
+        self.texts = TextStore(text_storage, spill_dir)
+        self._by_filename: Dict[str, Candidate] = {}
+        self._by_hash: Dict[str, List[Candidate]] = {}
+
+    def add(self, candidate: Candidate, text: Optional[str] = None) -> bool:
+        """Index a record (and store its text once per file hash). False if the filename is already in."""
+        if candidate.filename in self._by_filename:
+            return False
+        if text is not None:
+            self.texts.put(candidate.file_hash, text)
+            candidate._texts = self.texts
+        self._by_filename[candidate.filename] = candidate
+        self._by_hash.setdefault(candidate.file_hash, []).append(candidate)
+        return True
+
+    def get(self, filename: str) -> Optional[Candidate]:
+        return self._by_filename.get(filename)
+
+    def by_hash(self, file_hash: str) -> List[Candidate]:
+        return list(self._by_hash.get(file_hash, ()))
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._by_filename
+
+    def __len__(self) -> int:
+        return len(self._by_filename)
+
+    def close(self):
+        self.texts.close()
+
+
+def _measure(resumes: int, text_storage: str):
+    """Peak / retained traced memory of the old dict layout vs records on synthetic resumes."""
+    import random
+    import string
+    import tracemalloc
+
+    rng = random.Random(7)
+    vocab = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(400)]
+
+    def fake_resume(i: int) -> str:
+        return f"Candidate {i}\n" + " ".join(rng.choices(vocab, k=900))
+
+    def score_data() -> Dict[str, Any]:
+        return {"total": 0, "experience_score": 10, "matched_keywords": ["python", "aws"], "is_rejected": False}
+
+    texts = [fake_resume(i) for i in range(resumes)]
+
+    tracemalloc.start()
+    # Previous layout: one dict per candidate carrying its text (also referenced from resume_texts)
+    resume_texts = {}
+    candidates = []
+    for i, text in enumerate(texts):
+        fname = f"resume_{i}.pdf"
+        parsed = text.encode("utf-8").decode("utf-8")  # a fresh string, as a parse worker returns
+        resume_texts[fname] = parsed
+        candidates.append({
+            "filename": fname, "name": f"Candidate {i}", "score": score_data(), "text": parsed,
+            "status": "Pending", "extracted_skills": ["python"], "years_of_experience": 0.0,
+            "file_hash": f"{i:032x}", "email_subject": "", "email_body": "", "email": f"c{i}@example.com",
+        })
+    dict_current, dict_peak = tracemalloc.get_traced_memory()
+    del resume_texts, candidates
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    pool = CandidatePool(text_storage)
+    for i, text in enumerate(texts):
+        pool.add(Candidate(
+            filename=f"resume_{i}.pdf", name=f"Candidate {i}", score=score_data(), status="Pending",
+            file_hash=f"{i:032x}", email=f"c{i}@example.com", email_subject="", email_body="",
+            extracted_skills=["python"], years_of_experience=0.0,
+        ), text.encode("utf-8").decode("utf-8"))
+    pool.texts.compact()
+    pool_current, pool_peak = tracemalloc.get_traced_memory()
+    pool.close()
+    tracemalloc.stop()
+
+    mb = 1024 * 1024
+    print(f"{resumes} resumes (text storage: {text_storage})")
+    print(f"  dicts   : retained {dict_current / mb:7.1f} MB | peak {dict_peak / mb:7.1f} MB")
+    print(f"  records : retained {pool_current / mb:7.1f} MB | peak {pool_peak / mb:7.1f} MB")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="tracemalloc comparison of candidate layouts")
+    parser.add_argument("--resumes", type=int, default=1000)
+    parser.add_argument("--text-storage", choices=TEXT_STORAGE_MODES, default="compress")
+    args = parser.parse_args()
+    _measure(args.resumes, args.text_storage)
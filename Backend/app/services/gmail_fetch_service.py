@@ -1,47 +1,156 @@
 """
 Gmail Fetch Service using OAuth 2.0
 Fetches resume attachments from Gmail using OAuth credentials
+  - streaming: every result page is followed (nextPageToken) and each attachment is written to
+    the job's temp dir and yielded as soon as it downloads (bounded in-flight window)
+  - message metadata: messages.get calls grouped into Gmail batch HTTP requests
+  - attachments: downloaded on a bounded thread pool (one API client per thread;
+    googleapiclient service objects are not thread-safe)
+  - quota-aware backoff: 429 / 5xx / rate-limit 403s are retried with jitter (Retry-After
+    honoured) and pause every thread of the fetch, not just the one that hit the limit
 """
 
-import base64
+import os
+import re
+import time
 import email
+import base64
+import random
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timedelta
-from typing import List, Dict
-from googleapiclient.discovery import build
+from typing import Callable, Dict, Iterator, List, Optional
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
 
 from .gmail_oauth import gmail_oauth_service
+from .rate_limiter import parse_reset_duration
+from ..core.config import get_settings
 
 logger = logging.getLogger("GmailFetchService")
+settings = get_settings()
+
+DEFAULT_API_ROOT = "https://gmail.googleapis.com/"
+RESUME_EXTENSIONS = ('.pdf', '.txt', '.doc', '.docx')
+_RETRIABLE_STATUS = {429, 500, 502, 503, 504}
+_QUOTA_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded", "concurrentLimitExceeded")
+
+
+def _is_retriable(error: Exception) -> bool:
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    if status in _RETRIABLE_STATUS:
+        return True
+    # Gmail reports per-user quota exhaustion as 403 with a rate-limit reason
+    return status == 403 and any(reason in str(error.content) for reason in _QUOTA_REASONS)
+
+
+class _QuotaBackoff:
+    """Shared by every thread of one fetch: a rate-limited call pauses the others too."""
+
+    def __init__(self, max_retries: int):
+        self.max_retries = max_retries
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def penalize(self, attempt: int, error: Optional[HttpError] = None) -> float:
+        retry_after = parse_reset_duration(error.resp.get("retry-after")) if error is not None else None
+        delay = retry_after if retry_after else random.uniform(0, min(32.0, 2.0 ** attempt))
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + delay)
+        return delay
+
+    def call(self, request_fn: Callable):
+        for attempt in range(self.max_retries + 1):
+            self.wait()
+            try:
+                return request_fn()
+            except Exception as e:
+                if not _is_retriable(e) or attempt == self.max_retries:
+                    raise
+                delay = self.penalize(attempt, e)
+                logger.warning(f"Gmail API {e.resp.status}; backing off {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+
+
+class _FilenameClaims:
+    """Unique, path-safe filenames inside the destination dir (shared by the download threads)."""
+
+    def __init__(self, dest_dir: str, prefix: str = ""):
+        self.dest_dir = dest_dir
+        self.prefix = prefix
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def claim(self, filename: str) -> str:
+        # Attachment names come from senders: never let them leave dest_dir
+        original_filename = os.path.basename(filename.replace("\\", "/")).strip() or "attachment"
+        with self._lock:
+            filename = original_filename
+            counter = 1
+            while filename in self._seen:
+                # Split name and extension
+                name, ext = original_filename.rsplit('.', 1) if '.' in original_filename else (original_filename, '')
+                filename = f"{name}_{counter}.{ext}" if ext else f"{name}_{counter}"
+                counter += 1
+            self._seen.add(filename)
+        return f"{self.prefix}{filename}"
+
+    def write(self, claimed: str, content: bytes):
+        with open(os.path.join(self.dest_dir, claimed), "wb") as f:
+            f.write(content)
 
 
 class GmailFetchService:
     """
     Fetches resumes from Gmail using OAuth 2.0 authentication
     """
-    
+
     COMPANY_ID = "default_company"  # Single-tenant mode
-    
+
+    def __init__(self):
+        self._local = threading.local()
+
     def is_connected(self) -> bool:
         """
         Check if Gmail is connected for the default company
-        
+
         Returns:
             bool: True if Gmail is connected
         """
         return gmail_oauth_service.is_connected(self.COMPANY_ID)
-    
-    def fetch_resumes(self, start_date: str, end_date: str) -> List[Dict]:
+
+    def _build_service(self):
+        return gmail_oauth_service.get_gmail_service(self.COMPANY_ID, api_root=settings.gmail_api_root or None)
+
+    def _init_worker(self):
+        # Pool initializer: each download thread gets its own client (and HTTP connection)
+        self._local.service = self._build_service()
+
+    def iter_resumes(self, start_date: str, end_date: str, dest_dir: str, filename_prefix: str = "") -> Iterator[Dict]:
         """
-        Fetch resume attachments from Gmail
-        
+        Stream resume attachments from Gmail into dest_dir
+
+        Pages through every message in the range (nextPageToken), writes each attachment to
+        dest_dir as soon as it downloads and yields it right away, in completion order. Only a
+        bounded window of downloads is in flight, so memory does not grow with the mailbox.
+
         Args:
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
-        
-        Returns:
-            List of dicts with keys: filename, content, email_subject, email_body
-        
+            dest_dir: Directory the files are written to (the job's temp dir)
+            filename_prefix: Prepended to every written filename (e.g. "[Gmail] ")
+
+        Yields:
+            Dicts with keys: filename (as written in dest_dir), email_subject, email_body, sender
+
         Raises:
             ValueError: If Gmail is not connected
         """
@@ -50,11 +159,12 @@ class GmailFetchService:
                 "Gmail not connected. Please connect your Gmail account first at "
                 "http://localhost:8000/auth/gmail/start?company_id=default_company"
             )
-        
+
         try:
             # Get authenticated Gmail service
-            service = gmail_oauth_service.get_gmail_service(self.COMPANY_ID)
-            
+            service = self._build_service()
+            backoff = _QuotaBackoff(settings.gmail_max_retries)
+
             # CRITICAL FIX: Increment end_date by 1 day because Gmail 'before:' is exclusive.
             # If start=2026-02-14 and end=2026-02-14, query 'after:..14 before:..14' returns nothing.
             # We want 'after:..14 before:..15' to cover the 14th.
@@ -70,200 +180,286 @@ class GmailFetchService:
             # Build search query
             # Search for emails with attachments in date range
             query = f'has:attachment after:{start_date} before:{effective_end_date}'
-            
+
             logger.info(f"Searching Gmail with query: {query}")
-            
-            # Search messages
-            results = service.users().messages().list(
-                userId='me',
-                q=query,
-                maxResults=100  # Limit to prevent overwhelming
-            ).execute()
-            
-            messages = results.get('messages', [])
-            logger.info(f"Found {len(messages)} emails with attachments")
-            
-            if not messages:
-                logger.warning("No emails found in the specified date range")
-                return []
-            
-            resumes = []
-            seen_filenames = set()  # Track used filenames to prevent duplicates
-            
-            # Process each message
-            for msg_info in messages:
+
+            names = _FilenameClaims(dest_dir, filename_prefix)
+            window = max(1, settings.gmail_fetch_concurrency) * 2
+            message_count = 0
+            extracted = 0
+
+            with ThreadPoolExecutor(max_workers=max(1, settings.gmail_fetch_concurrency),
+                                    thread_name_prefix="gmail-fetch", initializer=self._init_worker) as pool:
+                in_flight = set()
                 try:
-                    msg_id = msg_info['id']
-                    
-                    # Get full message
-                    message = service.users().messages().get(
-                        userId='me',
-                        id=msg_id,
-                        format='full'
-                    ).execute()
-                    
-                    
-                    # Extract subject
-                    headers = message['payload'].get('headers', [])
-                    subject = next(
-                        (h['value'] for h in headers if h['name'].lower() == 'subject'),
-                        'No Subject'
-                    )
-                    
-                    # Extract Sender (From)
-                    sender_header = next(
-                        (h['value'] for h in headers if h['name'].lower() == 'from'),
-                        ''
-                    )
-                    # Extract pure email from "Name <email@domain.com>"
-                    import re
-                    sender_match = re.search(r'<(.+?)>', sender_header)
-                    sender_email = sender_match.group(1) if sender_match else sender_header
-                    # Cleanup if it's just the email or invalid
-                    if '@' not in sender_email:
-                        sender_email = ""
-                    else:
-                        sender_email = sender_email.strip()
-                    
-                    # Extract body (simplified - just get first text part)
-                    body = self._extract_body(message['payload'])
-                    
-                    # Process attachments
-                    parts = message['payload'].get('parts', [])
-                    attachments_in_email = []
-                    extracted_count = 0
-                    skipped_count = 0
-                    
-                    for part in parts:
-                        if part.get('filename'):
-                            filename = part['filename']
-                            mime_type = part.get('mimeType', '')
-                            attachments_in_email.append(filename)
-                            
-                            # Case 1: Direct Resume Files (PDF, TXT, DOC, DOCX)
-                            is_resume = (filename.lower().endswith('.pdf') or 
-                                       filename.lower().endswith('.txt') or
-                                       filename.lower().endswith('.doc') or
-                                       filename.lower().endswith('.docx'))
-                            
-                            # Case 2: Email Attachments (.eml) - May contain resumes inside
-                            is_email_attachment = (filename.lower().endswith('.eml') or 
-                                                 mime_type == 'message/rfc822')
-                            
-                            if is_resume:
-                                # Direct resume file
-                                if 'attachmentId' in part['body']:
-                                    attachment_id = part['body']['attachmentId']
-                                    attachment = service.users().messages().attachments().get(
-                                        userId='me',
-                                        messageId=msg_id,
-                                        id=attachment_id
-                                    ).execute()
-                                    
-                                    data = attachment['data']
-                                    file_data = base64.urlsafe_b64decode(data)
-                                    
-                                    # DEDUPLICATE FILENAME
-                                    original_filename = filename
-                                    counter = 1
-                                    while filename in seen_filenames:
-                                        # Split name and extension
-                                        name, ext = original_filename.rsplit('.', 1) if '.' in original_filename else (original_filename, '')
-                                        filename = f"{name}_{counter}.{ext}" if ext else f"{name}_{counter}"
-                                        counter += 1
-                                    
-                                    seen_filenames.add(filename)
-                                    
-                                    resumes.append({
-                                        'filename': filename,
-                                        'content': file_data,
-                                        'email_subject': subject,
-                                        'email_body': body,
-                                        'sender': sender_email
-                                    })
-                                    
-                                    logger.info(f"  ✅ Extracted: {filename} from '{subject}'")
-                                    extracted_count += 1
-                            
-                            elif is_email_attachment:
-                                # .eml file - Recursively extract resumes from inside
-                                logger.info(f"  📧 Found .eml attachment: {filename}. Parsing for nested resumes...")
-                                
-                                if 'attachmentId' in part['body']:
-                                    attachment_id = part['body']['attachmentId']
-                                    attachment = service.users().messages().attachments().get(
-                                        userId='me',
-                                        messageId=msg_id,
-                                        id=attachment_id
-                                    ).execute()
-                                    
-                                    data = attachment['data']
-                                    eml_content = base64.urlsafe_b64decode(data)
-                                    
-                                    # Parse the .eml file
-                                    try:
-                                        msg_obj = email.message_from_bytes(eml_content)
-                                        
-                                        # Extract Nested Sender
-                                        nested_sender = msg_obj.get('From', sender_email) # Fallback to outer sender
-                                        nested_match = re.search(r'<(.+?)>', nested_sender)
-                                        nested_email = nested_match.group(1) if nested_match else nested_sender
-                                        if '@' not in nested_email: nested_email = ""
-
-                                        # Walk through the email to find resume attachments
-                                        for sub_part in msg_obj.walk():
-                                            sub_fname = sub_part.get_filename()
-                                            if sub_fname:
-                                                is_nested_resume = (sub_fname.lower().endswith('.pdf') or 
-                                                                  sub_fname.lower().endswith('.txt') or
-                                                                  sub_fname.lower().endswith('.doc') or
-                                                                  sub_fname.lower().endswith('.docx'))
-                                                
-                                                if is_nested_resume:
-                                                    sub_content = sub_part.get_payload(decode=True)
-                                                    if sub_content:
-                                                        resumes.append({
-                                                            'filename': f"[Forwarded] {sub_fname}",
-                                                            'content': sub_content,
-                                                            'email_subject': subject,
-                                                            'email_body': body,
-                                                            'sender': nested_email
-                                                        })
-                                                        
-                                                        logger.info(f"    ✅ Extracted from .eml: {sub_fname}")
-                                                        extracted_count += 1
-                                    
-                                    except Exception as e:
-                                        logger.error(f"    ❌ Failed to parse .eml {filename}: {e}")
-                                        skipped_count += 1
-                            
-                            else:
-                                # Unsupported format
-                                logger.warning(f"  ⚠️ Skipped: {filename} (unsupported format) from '{subject}'")
-                                skipped_count += 1
-                    
-                    # Log summary for this email
-                    if len(attachments_in_email) > 0:
-                        logger.info(f"  📧 Email '{subject}': {extracted_count} extracted, {skipped_count} skipped (Total: {len(attachments_in_email)} attachments)")
-                
-                except Exception as e:
-                    logger.error(f"Error processing message {msg_info.get('id')}: {e}")
-                    continue
-            
-            logger.info(f"Successfully extracted {len(resumes)} resume files from Gmail")
-            return resumes
-        
+                    for message_ids in self._iter_message_ids(service, query, backoff):
+                        message_count += len(message_ids)
+                        logger.info(f"Found {message_count} emails with attachments so far")
+
+                        # Metadata for the page in a few batch round trips instead of one call each
+                        full_messages = self._batch_get_messages(service, message_ids, backoff)
+                        for msg_id in message_ids:
+                            message = full_messages.get(msg_id)
+                            if message is None:
+                                continue
+                            try:
+                                downloads = self._plan_message(message, names)
+                            except Exception as e:
+                                logger.error(f"Error processing message {msg_id}: {e}")
+                                continue
+                            for download in downloads:
+                                in_flight.add(pool.submit(self._download, download, names, backoff))
+                                # Hand finished files downstream before queueing more than the window
+                                while len(in_flight) >= window:
+                                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                                    for item in self._finished(done):
+                                        extracted += 1
+                                        yield item
+
+                    while in_flight:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for item in self._finished(done):
+                            extracted += 1
+                            yield item
+                finally:
+                    # Consumer stopped early (job cancelled): drop downloads not started yet
+                    for future in in_flight:
+                        future.cancel()
+
+            if message_count == 0:
+                logger.warning("No emails found in the specified date range")
+            logger.info(f"Successfully extracted {extracted} resume files from {message_count} Gmail messages")
+
         except Exception as e:
             logger.error(f"Gmail fetch failed: {e}")
             raise
-    
+
+    def _iter_message_ids(self, service, query: str, backoff: _QuotaBackoff) -> Iterator[List[str]]:
+        """Message ids matching the query, one list per result page (follows nextPageToken to the end)."""
+        page_token = None
+        while True:
+            results = backoff.call(lambda: service.users().messages().list(
+                userId='me',
+                q=query,
+                maxResults=settings.gmail_page_size,
+                pageToken=page_token
+            ).execute())
+            message_ids = [m['id'] for m in results.get('messages', [])]
+            if message_ids:
+                yield message_ids
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return
+
+    @staticmethod
+    def _finished(done) -> Iterator[Dict]:
+        for future in done:
+            yield from future.result()
+
+    def _batch_get_messages(self, service, message_ids: List[str], backoff: _QuotaBackoff) -> Dict[str, dict]:
+        """
+        messages.get(format='full') for many ids through the batch endpoint
+
+        Args:
+            service: Gmail API service (provides the authorized HTTP transport)
+            message_ids: Gmail message ids
+            backoff: Shared quota backoff of this fetch
+
+        Returns:
+            Dict of message id -> message (ids that kept failing are left out and logged)
+        """
+        batch_uri = (settings.gmail_api_root or DEFAULT_API_ROOT).rstrip("/") + "/batch/gmail/v1"
+        fetched: Dict[str, dict] = {}
+        remaining = list(message_ids)
+        attempt = 0
+
+        while remaining:
+            retry: List[str] = []
+            failures: Dict[str, Exception] = {}
+
+            def on_response(request_id, response, exception):
+                if exception is None:
+                    fetched[request_id] = response
+                elif _is_retriable(exception):
+                    retry.append(request_id)
+                    failures[request_id] = exception
+                else:
+                    logger.error(f"Error processing message {request_id}: {exception}")
+
+            def run_batch(chunk: List[str]):
+                batch = BatchHttpRequest(callback=on_response, batch_uri=batch_uri)
+                for msg_id in chunk:
+                    batch.add(service.users().messages().get(userId='me', id=msg_id, format='full'), request_id=msg_id)
+                batch.execute()
+
+            size = max(1, settings.gmail_batch_size)
+            for start in range(0, len(remaining), size):
+                chunk = remaining[start:start + size]
+                # The batch call itself can be rate-limited as a whole (then it is rebuilt and resent)
+                backoff.call(lambda: run_batch(chunk))
+
+            if not retry:
+                break
+            if attempt >= backoff.max_retries:
+                for msg_id in retry:
+                    logger.error(f"Error processing message {msg_id}: {failures[msg_id]}")
+                break
+            delay = backoff.penalize(attempt, next(iter(failures.values())))
+            logger.warning(f"{len(retry)} message fetches rate-limited; retrying in {delay:.1f}s")
+            remaining = retry
+            attempt += 1
+
+        return fetched
+
+    def _download(self, download: Dict, names: "_FilenameClaims", backoff: _QuotaBackoff) -> List[Dict]:
+        """
+        Runs on a pool thread with that thread's own API client: fetch one attachment and write
+        it (or the resumes nested in a forwarded .eml) to disk
+
+        Returns:
+            Dicts with keys: filename, email_subject, email_body, sender (empty on failure)
+        """
+        service = self._local.service
+        subject = download['email_subject']
+        try:
+            attachment = backoff.call(lambda: service.users().messages().attachments().get(
+                userId='me',
+                messageId=download['msg_id'],
+                id=download['attachment_id']
+            ).execute())
+            content = base64.urlsafe_b64decode(attachment.pop('data'))
+        except Exception as e:
+            logger.error(f"  ❌ Failed to download {download['filename']} from '{subject}': {e}")
+            return []
+
+        meta = {'email_subject': subject, 'email_body': download['email_body']}
+        if download['kind'] == "resume":
+            names.write(download['claimed'], content)
+            logger.info(f"  ✅ Extracted: {download['claimed']} from '{subject}'")
+            return [{'filename': download['claimed'], 'sender': download['sender'], **meta}]
+
+        # .eml file - Recursively extract resumes from inside
+        nested = self._extract_from_eml(content, download['filename'], download['sender']) or []
+        written = []
+        for item in nested:
+            claimed = names.claim(item['filename'])
+            names.write(claimed, item['content'])
+            written.append({'filename': claimed, 'sender': item['sender'], **meta})
+        return written
+
+    def _plan_message(self, message: dict, names: "_FilenameClaims") -> List[Dict]:
+        """
+        Read one message's headers/body and list the attachment downloads it needs
+
+        Returns:
+            Dicts with keys: msg_id, attachment_id, filename, kind ("resume" / "eml"),
+            claimed (final filename of a direct resume), email_subject, email_body, sender
+        """
+        msg_id = message['id']
+
+        # Extract subject
+        headers = message['payload'].get('headers', [])
+        subject = next(
+            (h['value'] for h in headers if h['name'].lower() == 'subject'),
+            'No Subject'
+        )
+
+        # Extract Sender (From)
+        sender_header = next(
+            (h['value'] for h in headers if h['name'].lower() == 'from'),
+            ''
+        )
+        sender_email = self._parse_sender(sender_header)
+
+        # Extract body (simplified - just get first text part)
+        body = self._extract_body(message['payload'])
+
+        downloads = []
+        for part in message['payload'].get('parts', []):
+            filename = part.get('filename')
+            if not filename:
+                continue
+            mime_type = part.get('mimeType', '')
+
+            # Case 1: Direct Resume Files (PDF, TXT, DOC, DOCX)
+            is_resume = filename.lower().endswith(RESUME_EXTENSIONS)
+
+            # Case 2: Email Attachments (.eml) - May contain resumes inside
+            is_email_attachment = filename.lower().endswith('.eml') or mime_type == 'message/rfc822'
+
+            if not (is_resume or is_email_attachment):
+                # Unsupported format
+                logger.warning(f"  ⚠️ Skipped: {filename} (unsupported format) from '{subject}'")
+                continue
+            if 'attachmentId' not in part['body']:
+                continue
+            if not is_resume:
+                logger.info(f"  📧 Found .eml attachment: {filename}. Parsing for nested resumes...")
+            downloads.append({
+                'msg_id': msg_id,
+                'attachment_id': part['body']['attachmentId'],
+                'filename': filename,
+                'kind': "resume" if is_resume else "eml",
+                # Claimed here, in message order, so duplicate names get stable suffixes
+                'claimed': names.claim(filename) if is_resume else None,
+                'email_subject': subject,
+                'email_body': body,
+                'sender': sender_email,
+            })
+        return downloads
+
+    @staticmethod
+    def _parse_sender(sender_header: str) -> str:
+        # Extract pure email from "Name <email@domain.com>"
+        sender_match = re.search(r'<(.+?)>', sender_header)
+        sender_email = sender_match.group(1) if sender_match else sender_header
+        # Cleanup if it's just the email or invalid
+        if '@' not in sender_email:
+            return ""
+        return sender_email.strip()
+
+    def _extract_from_eml(self, eml_content: bytes, filename: str, sender_email: str) -> Optional[List[Dict]]:
+        """
+        Resumes attached inside a forwarded .eml
+
+        Returns:
+            List of dicts with keys: filename, content, sender (None if the .eml can't be parsed)
+        """
+        found = []
+        try:
+            msg_obj = email.message_from_bytes(eml_content)
+
+            # Extract Nested Sender
+            nested_sender = msg_obj.get('From', sender_email) # Fallback to outer sender
+            nested_match = re.search(r'<(.+?)>', nested_sender)
+            nested_email = nested_match.group(1) if nested_match else nested_sender
+            if '@' not in nested_email: nested_email = ""
+
+            # Walk through the email to find resume attachments
+            for sub_part in msg_obj.walk():
+                sub_fname = sub_part.get_filename()
+                if sub_fname and sub_fname.lower().endswith(RESUME_EXTENSIONS):
+                    sub_content = sub_part.get_payload(decode=True)
+                    if sub_content:
+                        found.append({
+                            'filename': f"[Forwarded] {sub_fname}",
+                            'content': sub_content,
+                            'sender': nested_email
+                        })
+                        logger.info(f"    ✅ Extracted from .eml: {sub_fname}")
+
+        except Exception as e:
+            logger.error(f"    ❌ Failed to parse .eml {filename}: {e}")
+            return None
+        return found
+
     def _extract_body(self, payload: dict) -> str:
         """
         Extract email body from message payload
-        
+
         Args:
             payload: Message payload from Gmail API
-        
+
         Returns:
             Email body text
         """
@@ -273,7 +469,7 @@ class GmailFetchService:
                 data = payload['body']['data']
                 text = base64.urlsafe_b64decode(data).decode('utf-8', errors='ignore')
                 return text
-            
+
             # Look in parts
             if 'parts' in payload:
                 for part in payload['parts']:
@@ -282,9 +478,9 @@ class GmailFetchService:
                             data = part['body']['data']
                             text = base64.urlsafe_b64decode(data).decode('utf-8', errors='ignore')
                             return text
-            
+
             return ""
-        
+
         except Exception as e:
             logger.warning(f"Could not extract email body: {e}")
             return ""
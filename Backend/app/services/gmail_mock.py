@@ -0,0 +1,243 @@
+"""
+Local Gmail API Mock
+A small Gmail-compatible HTTP server for exercising GmailFetchService without a mailbox:
+  - messages.list with nextPageToken paging
+  - messages.get and the /batch/gmail/v1 multipart endpoint
+  - attachments.get with a configurable per-call latency
+  - injected 429s (with Retry-After) on the first try of every Nth attachment / batched get
+It counts what the client did (list pages, batch requests, peak concurrent downloads, 429s),
+so batching, backoff and the bounded download window can be checked end to end.
+
+Drive iter_resumes() against it (from the Backend/ directory):
+
+    python -m app.services.gmail_mock [--messages 300] [--page-size 100] [--batch-size 50] [--concurrency 8]
+"""
+
+import re
+import json
+import time
+import uuid
+import base64
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Tuple
+from urllib.parse import urlparse, parse_qs
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode()
+
+
+class MockGmailServer:
+    def __init__(self, messages: int = 300, page_size: int = 100, fail_every: int = 7,
+                 attachment_latency: float = 0.02, retry_after: float = 0.2):
+        self.messages = messages
+        self.page_size = page_size
+        self.fail_every = fail_every  # 0 disables the injected 429s
+        self.attachment_latency = attachment_latency
+        self.retry_after = retry_after
+        self.stats = {"list": 0, "get": 0, "batch": 0, "batch_items": 0, "attachments": 0,
+                      "429_batch_items": 0, "429_attachments": 0, "max_concurrent_attachments": 0}
+        self._failed = set()
+        self._active_attachments = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def api_root(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def start(self) -> "MockGmailServer":
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body, content_type: str = "application/json", headers: Dict = None):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, body = mock.route(url.path, parse_qs(url.query))
+                self._send(status, body, headers=mock._retry_headers(status))
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path != "/batch/gmail/v1":
+                    return self._send(404, {"error": {"code": 404, "message": url.path}})
+                raw = self.rfile.read(int(self.headers["Content-Length"])).decode()
+                boundary = re.search(r'boundary="?([^";]+)"?', self.headers["Content-Type"]).group(1)
+                payload, content_type = mock.batch(raw, boundary)
+                self._send(200, payload, content_type=content_type)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _retry_headers(self, status: int) -> Dict[str, str]:
+        return {"Retry-After": str(self.retry_after)} if status == 429 else {}
+
+    def _inject_429(self, key: str, n: int, counter: str) -> bool:
+        with self._lock:
+            if not self.fail_every or n % self.fail_every or key in self._failed:
+                return False
+            self._failed.add(key)
+            self.stats[counter] += 1
+            return True
+
+    def _message(self, i: int) -> Dict:
+        parts = [
+            {"mimeType": "text/plain", "filename": "", "body": {"data": _b64(f"Please find my resume attached ({i}).".encode())}},
+            # Every third sender calls it resume.pdf: exercises the unique-filename claims
+            {"mimeType": "application/pdf", "filename": "resume.pdf" if i % 3 == 0 else f"cv_{i}.pdf",
+             "body": {"attachmentId": f"a{i}"}},
+        ]
+        if i % 10 == 0:
+            # Signature image: not a resume, must be skipped
+            parts.append({"mimeType": "image/png", "filename": "logo.png", "body": {"attachmentId": f"p{i}"}})
+        return {
+            "id": f"m{i}",
+            "payload": {
+                "headers": [{"name": "Subject", "value": f"Application {i}"},
+                            {"name": "From", "value": f"Candidate {i} <candidate{i}@example.com>"}],
+                "parts": parts,
+            },
+        }
+
+    def route(self, path: str, query: Dict, batched: bool = False) -> Tuple[int, Dict]:
+        if re.fullmatch(r"/gmail/v1/users/me/messages/?", path):
+            with self._lock:
+                self.stats["list"] += 1
+            start = int(query.get("pageToken", ["0"])[0])
+            size = min(int(query.get("maxResults", ["100"])[0]), self.page_size)
+            page = {"messages": [{"id": f"m{i}"} for i in range(start, min(self.messages, start + size))]}
+            if start + size < self.messages:
+                page["nextPageToken"] = str(start + size)
+            return 200, page
+
+        match = re.fullmatch(r"/gmail/v1/users/me/messages/m(\d+)/attachments/(\w+)", path)
+        if match:
+            attachment_id = match.group(2)
+            with self._lock:
+                self.stats["attachments"] += 1
+                self._active_attachments += 1
+                self.stats["max_concurrent_attachments"] = max(self.stats["max_concurrent_attachments"], self._active_attachments)
+            try:
+                if self._inject_429(attachment_id, int(attachment_id[1:]), "429_attachments"):
+                    return 429, {"error": {"code": 429, "message": "Rate limit exceeded", "status": "rateLimitExceeded"}}
+                time.sleep(self.attachment_latency)
+                return 200, {"data": _b64(f"%PDF-1.4 mock resume {attachment_id}\n".encode() * 20)}
+            finally:
+                with self._lock:
+                    self._active_attachments -= 1
+
+        match = re.fullmatch(r"/gmail/v1/users/me/messages/m(\d+)", path)
+        if match:
+            if not batched:
+                with self._lock:
+                    self.stats["get"] += 1
+            return 200, self._message(int(match.group(1)))
+
+        return 404, {"error": {"code": 404, "message": path}}
+
+    def batch(self, raw: str, boundary: str) -> Tuple[bytes, str]:
+        with self._lock:
+            self.stats["batch"] += 1
+        out_boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in raw.split(f"--{boundary}")[1:]:
+            if part.startswith("--"):
+                break
+            content_id = re.search(r"Content-ID: <(.+?)>", part).group(1)
+            request_path = urlparse(re.search(r"\n\s*GET (\S+) HTTP", part).group(1))
+            with self._lock:
+                self.stats["batch_items"] += 1
+            match = re.fullmatch(r"/gmail/v1/users/me/messages/m(\d+)", request_path.path)
+            if match and self._inject_429(f"get-m{match.group(1)}", int(match.group(1)) + 1, "429_batch_items"):
+                status, body = 429, {"error": {"code": 429, "message": "Rate limit exceeded", "status": "rateLimitExceeded"}}
+            else:
+                status, body = self.route(request_path.path, parse_qs(request_path.query), batched=True)
+            headers = "".join(f"{name}: {value}\r\n" for name, value in self._retry_headers(status).items())
+            parts.append(
+                f"--{out_boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\nContent-Type: application/json\r\n{headers}\r\n"
+                f"{json.dumps(body)}\r\n"
+            )
+        payload = ("".join(parts) + f"--{out_boundary}--\r\n").encode()
+        return payload, f"multipart/mixed; boundary={out_boundary}"
+
+
+if __name__ == "__main__":
+    # Check run: stream a mock mailbox through iter_resumes and compare what the client did
+    import os
+    import math
+    import argparse
+    import tempfile
+    from google.oauth2.credentials import Credentials
+
+    from ..core.config import get_settings
+    from .gmail_oauth import gmail_oauth_service
+    from .gmail_fetch_service import gmail_fetch_service
+
+    parser = argparse.ArgumentParser(description="Drive GmailFetchService.iter_resumes against a local Gmail mock")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fail-every", type=int, default=7, help="Inject a 429 on every Nth attachment / batched get (0: none)")
+    args = parser.parse_args()
+
+    mock = MockGmailServer(args.messages, args.page_size, args.fail_every).start()
+    settings = get_settings()
+    settings.gmail_api_root = mock.api_root
+    settings.gmail_page_size = args.page_size
+    settings.gmail_batch_size = args.batch_size
+    settings.gmail_fetch_concurrency = args.concurrency
+    # The mock accepts any bearer token: no OAuth round trip
+    gmail_oauth_service.get_credentials = lambda company_id: Credentials(token="mock-token")
+
+    started = time.perf_counter()
+    first_item_at = None
+    with tempfile.TemporaryDirectory() as dest_dir:
+        items = []
+        for item in gmail_fetch_service.iter_resumes("2026-01-01", "2026-01-31", dest_dir, filename_prefix="[Gmail] "):
+            first_item_at = first_item_at or time.perf_counter() - started
+            items.append(item)
+        written = sorted(os.listdir(dest_dir))
+    elapsed = time.perf_counter() - started
+    mock.stop()
+
+    pages = max(1, math.ceil(args.messages / args.page_size))
+    checks = {
+        "every resume written once": len(written) == len(items) == args.messages == len(set(written)),
+        "no signature images": not any(name.endswith(".png") for name in written),
+        "list pages followed": mock.stats["list"] == pages,
+        "gets batched": mock.stats["get"] == 0 and mock.stats["batch"] >= pages * math.ceil(min(args.messages, args.page_size) / args.batch_size),
+        # Each injected 429 costs exactly one extra request, and nothing was dropped
+        "batch 429s retried": mock.stats["batch_items"] == args.messages + mock.stats["429_batch_items"],
+        "attachment 429s retried": mock.stats["attachments"] == args.messages + mock.stats["429_attachments"],
+        "download window bounded": mock.stats["max_concurrent_attachments"] <= args.concurrency,
+    }
+    print(json.dumps({
+        "files": len(written),
+        "seconds": round(elapsed, 2),
+        "first_file_after_seconds": round(first_item_at or 0.0, 2),
+        "server": mock.stats,
+        "checks": checks,
+    }, indent=2))
+    raise SystemExit(0 if all(checks.values()) else 1)
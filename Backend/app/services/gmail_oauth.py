@@ -6,6 +6,7 @@ Handles Google OAuth flow and token management for Gmail access
 import os
 import json
 import pickle
+import logging
 from pathlib import Path
 from typing import Optional, Dict
 from google.auth.transport.requests import Request
@@ -13,6 +14,8 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 
+logger = logging.getLogger(__name__)
+
 
 class GmailOAuthService:
     """
@@ -33,8 +36,10 @@ class GmailOAuthService:
         
         # Verify client_secret.json exists (Warn instead of crash at startup)
         if not self.client_secret_path.exists():
-            print(f"⚠️  WARNING: client_secret.json not found at {self.client_secret_path}")
-            print("   Gmail integration will be disabled. Download it from Google Cloud Console to enable.")
+            logger.warning(
+                f"client_secret.json not found at {self.client_secret_path}. "
+                "Gmail integration will be disabled. Download it from Google Cloud Console to enable."
+            )
     
     def get_authorization_url(self, company_id: str, redirect_uri: str) -> tuple[str, str]:
         """
@@ -154,12 +159,13 @@ class GmailOAuthService:
         with open(token_file, 'wb') as f:
             pickle.dump(credentials, f)
     
-    def get_gmail_service(self, company_id: str):
+    def get_gmail_service(self, company_id: str, api_root: Optional[str] = None):
         """
         Get authenticated Gmail service for a company
         
         Args:
             company_id: Unique identifier for the company
+            api_root: Optional API root URL overriding Google's endpoint
         
         Returns:
             Gmail API service object
@@ -172,7 +178,8 @@ class GmailOAuthService:
         if not credentials:
             raise ValueError(f"No Gmail credentials found for company {company_id}. Please connect Gmail first.")
         
-        return build('gmail', 'v1', credentials=credentials)
+        client_options = {"api_endpoint": api_root} if api_root else None
+        return build('gmail', 'v1', credentials=credentials, client_options=client_options)
     
     def revoke_access(self, company_id: str) -> bool:
         """
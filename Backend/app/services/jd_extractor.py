@@ -5,6 +5,11 @@ import re
 from typing import List, Optional
 from pydantic import BaseModel
 from .ai_service import ai_service # Use existing singleton instance
+from .jd_profile_store import jd_profile_store, fingerprint_jd
+from .prompt_builder import prompt_builder
+from ..core.config import get_settings
+
+settings = get_settings()
 
 # Define Pydantic Models for Output Validation
 class ExtractedJD(BaseModel):
@@ -22,17 +27,33 @@ class JDExtractor:
         self.ai_service = ai_service
         self.logger = logging.getLogger(__name__)
 
-    async def extract_structured_jd(self, jd_text: str) -> ExtractedJD:
+    def get_profile(self, profile_id: str) -> Optional[ExtractedJD]:
+        """Load a previously stored JD profile by id (None if unknown)."""
+        stored = jd_profile_store.get(profile_id)
+        if stored is None:
+            return None
+        return ExtractedJD(**stored["profile"])
+
+    async def extract_structured_jd(self, jd_text: str, use_store: bool = True) -> ExtractedJD:
         """
         Extract structured data from raw JD using LLM (One-Time Cost).
+        Repeat JDs (same text modulo whitespace/case) are served from the JD profile store.
         """
+        if use_store:
+            stored = jd_profile_store.get_by_fingerprint(fingerprint_jd(jd_text))
+            if stored is not None:
+                self.logger.info(f"⚡ JD Profile Hit ({stored['id']}): {stored['job_title']} | Skipping LLM extraction.")
+                return ExtractedJD(**stored["profile"])
+
         self.logger.info("🧠 Extracting structured JD data via LLM...")
         
+        jd_excerpt = prompt_builder.truncate_to_tokens(jd_text, settings.jd_token_budget)
+        
         prompt = f"""
         You are an expert Technical Recruiter. Extract key requirements from this Job Description.
         
         JOB DESCRIPTION:
-        {jd_text[:3000]}
+        {jd_excerpt}
         
         TASK:
         Return a Strict JSON object with the following fields:
@@ -57,8 +78,12 @@ class JDExtractor:
         """
         
         try:
-            # Call AI Service with JSON Mode
-            response_json_str = self.ai_service.query(prompt, temperature=0.1, json_mode=True)
+            # Call AI Service with JSON Mode (temp=0 -> deterministic & served from the LLM cache on re-runs)
+            # Only a reply that validates as ExtractedJD is cached
+            response_json_str = await self.ai_service.aquery(
+                prompt, temperature=0.0, json_mode=True, call_type="jd_extraction",
+                validate=lambda reply: ExtractedJD(**json.loads(reply))
+            )
             
             # Groq JSON Mode returns clean JSON string
             data = json.loads(response_json_str)
@@ -66,6 +91,13 @@ class JDExtractor:
             # Validate with Pydantic
             extracted = ExtractedJD(**data)
             self.logger.info(f"✅ Extracted JD: {extracted.job_title} | Skills: {len(extracted.technical_skills)}")
+            
+            # Persist (fallback results below are never stored)
+            try:
+                profile_id = jd_profile_store.save(jd_text, extracted.model_dump())
+                self.logger.info(f"💾 Stored JD Profile: {profile_id}")
+            except Exception as e:
+                self.logger.warning(f"Could not store JD profile: {e}")
             return extracted
             
         except Exception as e:
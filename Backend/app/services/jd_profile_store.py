@@ -0,0 +1,129 @@
+"""
+JD Profile Store (SQLite)
+Persists structured JD extractions under a fingerprint of the normalized JD text,
+so re-running the same JD skips the LLM and keeps the skill list stable.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, List, Dict
+
+from ..core.config import get_settings
+
+settings = get_settings()
+
+
+def fingerprint_jd(jd_text: str) -> str:
+    """Whitespace- and case-insensitive hash of a JD."""
+    normalized = " ".join(jd_text.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class JDProfileStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jd_profiles (
+                id TEXT PRIMARY KEY,
+                fingerprint TEXT UNIQUE NOT NULL,
+                job_title TEXT,
+                jd_text TEXT NOT NULL,
+                profile_json TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                use_count INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        self._conn.commit()
+
+    def get_by_fingerprint(self, fingerprint: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jd_profiles WHERE fingerprint = ?", (fingerprint,)).fetchone()
+            if row is None:
+                return None
+            self._touch_locked(row["id"])
+            return self._row_to_dict(row)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jd_profiles WHERE id = ?", (profile_id,)).fetchone()
+            if row is None:
+                return None
+            self._touch_locked(row["id"])
+            return self._row_to_dict(row)
+
+    def save(self, jd_text: str, profile: Dict) -> str:
+        """Insert (or refresh) the profile for this JD. Returns the profile id."""
+        fingerprint = fingerprint_jd(jd_text)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM jd_profiles WHERE fingerprint = ?", (fingerprint,)).fetchone()
+            profile_id = row["id"] if row else uuid.uuid4().hex[:12]
+            self._conn.execute(
+                """INSERT INTO jd_profiles (id, fingerprint, job_title, jd_text, profile_json, created_at, last_used_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(fingerprint) DO UPDATE SET
+                       job_title = excluded.job_title,
+                       profile_json = excluded.profile_json,
+                       last_used_at = excluded.last_used_at""",
+                (profile_id, fingerprint, profile.get("job_title"), jd_text, json.dumps(profile), now, now)
+            )
+            self._conn.commit()
+        return profile_id
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        """Most recently used first, without the raw JD text."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jd_profiles ORDER BY last_used_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        summaries = []
+        for row in rows:
+            profile = json.loads(row["profile_json"])
+            summaries.append({
+                "id": row["id"],
+                "job_title": row["job_title"],
+                "technical_skills": profile.get("technical_skills", []),
+                "required_years_experience": profile.get("required_years_experience", 0),
+                "created_at": row["created_at"],
+                "last_used_at": row["last_used_at"],
+                "use_count": row["use_count"],
+            })
+        return summaries
+
+    def _touch_locked(self, profile_id: str):
+        self._conn.execute(
+            "UPDATE jd_profiles SET last_used_at = ?, use_count = use_count + 1 WHERE id = ?",
+            (time.time(), profile_id)
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        return {
+            "id": row["id"],
+            "fingerprint": row["fingerprint"],
+            "job_title": row["job_title"],
+            "jd_text": row["jd_text"],
+            "profile": json.loads(row["profile_json"]),
+            "created_at": row["created_at"],
+            "last_used_at": row["last_used_at"],
+            "use_count": row["use_count"],
+        }
+
+
+jd_profile_store = JDProfileStore(settings.jd_profile_db_path)
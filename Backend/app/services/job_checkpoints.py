@@ -0,0 +1,139 @@
+"""
+Job Checkpoints (SQLite)
+Durable per-stage outputs of a running analysis, so a job re-claimed after a crash or deploy
+resumes instead of starting over:
+  jd          structured JD extraction (one LLM call)
+  gmail       metadata of each Gmail attachment already written to the job's temp dir
+  parse       per-resume parse + fast-scan results
+  role_match  per-resume role detection
+  score       semantic scores of every ranked candidate (stage is all-or-nothing)
+  ai_verdict  per-candidate LLM verdicts (the paid part)
+Checkpoints are dropped once the job reaches a terminal state.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Any, Dict
+
+from ..core.config import get_settings
+
+settings = get_settings()
+
+STAGE_JD = "jd"
+STAGE_GMAIL = "gmail"
+STAGE_PARSE = "parse"
+STAGE_ROLE_MATCH = "role_match"
+STAGE_SCORE = "score"
+STAGE_AI_VERDICT = "ai_verdict"
+
+
+class CheckpointStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            dirname = os.path.dirname(path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_checkpoints (
+                job_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                item_key TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                saved_at REAL NOT NULL,
+                PRIMARY KEY (job_id, stage, item_key)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_stages_done (
+                job_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (job_id, stage)
+            )
+        """)
+        self._conn.commit()
+
+    def save(self, job_id: str, stage: str, item_key: str, payload: Any):
+        self.save_many(job_id, stage, {item_key: payload})
+
+    def save_many(self, job_id: str, stage: str, items: Dict[str, Any]):
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (job_id, stage, key, zlib.compress(json.dumps(value, default=str).encode("utf-8")), now)
+            for key, value in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO job_checkpoints (job_id, stage, item_key, payload, saved_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def load(self, job_id: str, stage: str) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_key, payload FROM job_checkpoints WHERE job_id = ? AND stage = ?", (job_id, stage)
+            ).fetchall()
+        return {key: json.loads(zlib.decompress(blob).decode("utf-8")) for key, blob in rows}
+
+    def mark_done(self, job_id: str, stage: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_stages_done (job_id, stage, completed_at) VALUES (?, ?, ?)",
+                (job_id, stage, time.time())
+            )
+            self._conn.commit()
+
+    def is_done(self, job_id: str, stage: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM job_stages_done WHERE job_id = ? AND stage = ?", (job_id, stage)
+            ).fetchone()
+        return row is not None
+
+    def clear(self, job_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM job_checkpoints WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM job_stages_done WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    def for_job(self, job_id: str) -> "JobCheckpoint":
+        return JobCheckpoint(self, job_id)
+
+
+class JobCheckpoint:
+    """CheckpointStore bound to one job (what the pipeline passes around)."""
+
+    def __init__(self, store: CheckpointStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+
+    def save(self, stage: str, item_key: str, payload: Any):
+        self.store.save(self.job_id, stage, item_key, payload)
+
+    def save_many(self, stage: str, items: Dict[str, Any]):
+        self.store.save_many(self.job_id, stage, items)
+
+    def load(self, stage: str) -> Dict[str, Any]:
+        return self.store.load(self.job_id, stage)
+
+    def mark_done(self, stage: str):
+        self.store.mark_done(self.job_id, stage)
+
+    def is_done(self, stage: str) -> bool:
+        return self.store.is_done(self.job_id, stage)
+
+
+checkpoint_store = CheckpointStore(":memory:" if settings.job_store_backend == "memory" else settings.job_store_path)
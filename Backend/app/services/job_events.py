@@ -0,0 +1,108 @@
+"""
+Job Event Bus - Server-Sent Events for analysis progress
+Pipeline hooks (update_job_progress, publish_candidates, complete/fail) publish small events;
+every open /jobs/{job_id}/events stream gets them pushed instead of re-polling /status.
+A short per-job history lets a reconnecting client resume from its Last-Event-ID.
+"""
+
+import json
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Dict, List, Optional
+
+TERMINAL_EVENTS = ("complete", "error", "cancelled")
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+
+    def push(self, event: dict):
+        # Publishers may run in worker threads; always hand over on the subscriber's loop
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict):
+        if self.queue.full():
+            # Slow consumer: drop the oldest delta rather than grow without bound
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class JobEventBus:
+    def __init__(self, history_size: int = 500, max_jobs: int = 200):
+        self._history: "OrderedDict[str, deque]" = OrderedDict()
+        self._seq: Dict[str, int] = {}
+        self._subscribers: Dict[str, List[_Subscriber]] = {}
+        self._history_size = history_size
+        self._max_jobs = max_jobs  # Replay history is kept for the most recently active jobs only
+        self._lock = threading.Lock()
+
+    def publish(self, job_id: str, event: str, data: dict):
+        with self._lock:
+            seq = self._seq.get(job_id, 0) + 1
+            self._seq[job_id] = seq
+            message = {"id": seq, "event": event, "data": data}
+            self._history.setdefault(job_id, deque(maxlen=self._history_size)).append(message)
+            self._history.move_to_end(job_id)
+            while len(self._history) > self._max_jobs:
+                # Keep the seq counter so a revived job never reuses event ids
+                self._history.popitem(last=False)
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for subscriber in subscribers:
+            subscriber.push(message)
+
+    def last_terminal(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            history = self._history.get(job_id)
+            if history and history[-1]["event"] in TERMINAL_EVENTS:
+                return history[-1]
+        return None
+
+    async def subscribe(self, job_id: str, last_event_id: int = 0, keepalive: float = 15.0) -> AsyncIterator[Optional[dict]]:
+        """Yield missed events after last_event_id, then live ones; None means "send a keep-alive"."""
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            backlog = [m for m in self._history.get(job_id, ()) if m["id"] > last_event_id]
+            self._subscribers.setdefault(job_id, []).append(subscriber)
+        try:
+            for message in backlog:
+                yield message
+                if message["event"] in TERMINAL_EVENTS:
+                    return
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if message["id"] <= last_event_id:
+                    continue
+                last_event_id = message["id"]
+                yield message
+                if message["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(job_id, [])
+                if subscriber in subscribers:
+                    subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+    def discard(self, job_id: str):
+        with self._lock:
+            self._history.pop(job_id, None)
+            self._seq.pop(job_id, None)
+
+
+def format_sse(message: Optional[dict]) -> str:
+    if message is None:
+        return ": keep-alive\n\n"
+    # Unnumbered messages (the connect snapshot) must not move the client's Last-Event-ID
+    id_line = f"id: {message['id']}\n" if message.get("id") else ""
+    return f"{id_line}event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+
+
+job_events = JobEventBus()
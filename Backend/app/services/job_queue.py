@@ -0,0 +1,198 @@
+"""
+Shared Job Queue (SQLite)
+Every analysis job is admitted through this queue (priority first, then FIFO), and at most
+max_concurrent_jobs run at once across all consumers. With job_queue_mode = "worker",
+`python -m app.worker` processes claim and run them and every API replica reads status from
+the shared job store; in "inline" mode the API process runs the same dispatcher itself. Claims are leases kept alive by heartbeats, so a job held by a
+crashed worker goes back to the queue once its lease expires.
+The queue shares the job store's database file (one file to mount/back up per deployment).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Optional
+
+from ..core.config import get_settings
+from .job_store import job_store
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised by the pipeline at a stage boundary once /cancel was requested."""
+
+
+class JobQueue:
+    def __init__(self, path: str, lease_seconds: int, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        # isolation_level=None: transactions are explicit (BEGIN IMMEDIATE) so claims are atomic across processes
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_queue (
+                job_id TEXT PRIMARY KEY,
+                payload_json TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'queued',
+                priority INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_id TEXT,
+                enqueued_at REAL NOT NULL,
+                claimed_at REAL,
+                heartbeat_at REAL,
+                finished_at REAL,
+                cancel_requested INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(job_queue)")}
+        if "cancel_requested" not in columns:  # Queue files created before cancellation support
+            self._conn.execute("ALTER TABLE job_queue ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_pending ON job_queue(state, priority, enqueued_at)")
+
+    def enqueue(self, job_id: str, payload: Dict, priority: int = 0):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_queue (job_id, payload_json, state, priority, enqueued_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, json.dumps(payload), priority, time.time())
+            )
+
+    def claim(self, worker_id: str, max_running: Optional[int] = None) -> Optional[Dict]:
+        """
+        Atomically take the next queued job (highest priority, then oldest).
+        None if the queue is empty or max_running jobs are already running across all workers.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                abandoned = self._requeue_expired_locked(now)
+                row = None
+                running = self._conn.execute("SELECT COUNT(*) AS n FROM job_queue WHERE state = 'running'").fetchone()["n"]
+                if max_running is None or running < max_running:
+                    row = self._conn.execute(
+                        "SELECT job_id, payload_json, attempts FROM job_queue WHERE state = 'queued' "
+                        "ORDER BY priority DESC, enqueued_at LIMIT 1"
+                    ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE job_queue SET state = 'running', worker_id = ?, claimed_at = ?, heartbeat_at = ?, attempts = attempts + 1 WHERE job_id = ?",
+                        (worker_id, now, now, row["job_id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        for job_id, status, error in abandoned:
+            job_store.update(job_id, status=status, error=error)
+        if row is None:
+            return None
+        return {"job_id": row["job_id"], "payload": json.loads(row["payload_json"]), "attempt": row["attempts"] + 1}
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease. False if the job was taken away (lease expired and re-claimed)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE job_queue SET heartbeat_at = ? WHERE job_id = ? AND worker_id = ? AND state = 'running'",
+                (time.time(), job_id, worker_id)
+            )
+            return cursor.rowcount > 0
+
+    def finish(self, job_id: str, state: str = "done"):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_queue SET state = ?, finished_at = ? WHERE job_id = ?",
+                (state, time.time(), job_id)
+            )
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place in the pending queue (None once the job is running or finished)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, priority, enqueued_at FROM job_queue WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None or row["state"] != "queued":
+                return None
+            ahead = self._conn.execute(
+                "SELECT COUNT(*) AS n FROM job_queue WHERE state = 'queued' "
+                "AND (priority > ? OR (priority = ? AND enqueued_at < ?))",
+                (row["priority"], row["priority"], row["enqueued_at"])
+            ).fetchone()["n"]
+        return ahead + 1
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Queued jobs are dropped at once ("cancelled"); running jobs are flagged and stop at their
+        next stage boundary ("cancelling"). None if the job is not (or no longer) in the queue.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT state FROM job_queue WHERE job_id = ?", (job_id,)).fetchone()
+                outcome = None
+                if row is not None and row["state"] == "queued":
+                    self._conn.execute(
+                        "UPDATE job_queue SET state = 'cancelled', cancel_requested = 1, finished_at = ? WHERE job_id = ?",
+                        (time.time(), job_id)
+                    )
+                    outcome = "cancelled"
+                elif row is not None and row["state"] == "running":
+                    self._conn.execute("UPDATE job_queue SET cancel_requested = 1 WHERE job_id = ?", (job_id,))
+                    outcome = "cancelling"
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return outcome
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM job_queue WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def _requeue_expired_locked(self, now: float) -> list:
+        """Return expired leases to the queue; returns (job_id, status, error) for jobs that end here."""
+        cutoff = now - self.lease_seconds
+        expired = self._conn.execute(
+            "SELECT job_id, attempts, cancel_requested FROM job_queue WHERE state = 'running' AND heartbeat_at < ?", (cutoff,)
+        ).fetchall()
+        abandoned = []
+        for row in expired:
+            if row["cancel_requested"]:
+                state = "cancelled"
+                abandoned.append((row["job_id"], "cancelled", None))
+            elif row["attempts"] < self.max_attempts:
+                state = "queued"
+            else:
+                state = "failed"
+                abandoned.append((row["job_id"], "error", f"Job abandoned after {self.max_attempts} worker crashes"))
+            logger.warning(f"⏰ Lease expired for job {row['job_id']} (attempt {row['attempts']}). -> {state}")
+            self._conn.execute(
+                "UPDATE job_queue SET state = ?, worker_id = NULL WHERE job_id = ?", (state, row["job_id"])
+            )
+        return abandoned
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) AS n FROM job_queue GROUP BY state").fetchall()
+            workers = self._conn.execute(
+                "SELECT COUNT(DISTINCT worker_id) AS n FROM job_queue WHERE state = 'running' AND heartbeat_at >= ?",
+                (time.time() - self.lease_seconds,)
+            ).fetchone()
+        return {"states": {r["state"]: r["n"] for r in rows}, "active_workers": workers["n"]}
+
+
+# Same backend switch as the job store: "memory" keeps the queue in-process too (inline mode only)
+job_queue = JobQueue(":memory:" if settings.job_store_backend == "memory" else settings.job_store_path, settings.job_lease_seconds)
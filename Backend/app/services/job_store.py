@@ -0,0 +1,290 @@
+"""
+Job Store (SQLite + in-memory LRU)
+Replaces the module-level jobs dict:
+  - Status/progress rows are written through to SQLite, so results survive a restart.
+  - Final results are stored zlib-compressed with resume text stripped; decoded results of
+    recently read finished jobs stay in a small LRU so repeated /status calls skip the decode.
+  - Partial (per-stage) candidate rows live in their own table, keyed by a per-job seq cursor.
+  - Finished jobs are evicted by TTL and by total count / compressed size.
+Backend "memory" keeps the same behaviour in a private in-memory database (nothing persisted).
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from ..core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "error", "cancelled")
+
+# Per-candidate fields never kept in stored results (multi-KB each, unused by the UI)
+_HEAVY_CANDIDATE_FIELDS = ("text",)
+
+
+def _compress(payload) -> bytes:
+    return zlib.compress(json.dumps(payload, default=str).encode("utf-8"), 6)
+
+
+def _decompress(blob: Optional[bytes]):
+    if blob is None:
+        return None
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def _strip_result(result: Dict) -> Dict:
+    """Copy of the result payload without per-candidate resume text."""
+    stripped = dict(result)
+    if isinstance(result.get("candidates"), list):
+        stripped["candidates"] = [
+            {k: v for k, v in c.items() if k not in _HEAVY_CANDIDATE_FIELDS} if isinstance(c, dict) else c
+            for c in result["candidates"]
+        ]
+    return stripped
+
+
+class JobStore:
+    def __init__(self, path: str, cache_size: int, ttl_seconds: int, max_jobs: int, max_bytes: int):
+        self.path = path
+        self.cache_size = cache_size
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()  # job_id -> finished job (with result)
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            dirname = os.path.dirname(path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+
+        # timeout: API replicas and workers write the same file; wait out their short write locks
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                progress INTEGER NOT NULL DEFAULT 0,
+                current_step TEXT NOT NULL DEFAULT '',
+                error TEXT,
+                stage TEXT,
+                partial_seq INTEGER NOT NULL DEFAULT 0,
+                result_blob BLOB,
+                result_size INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_candidates (
+                job_id TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                row_json TEXT NOT NULL,
+                PRIMARY KEY (job_id, filename)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_candidates_seq ON job_candidates(job_id, seq)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at)")
+        self._conn.commit()
+
+    # --- Job lifecycle ---
+    def create(self, job_id: str, current_step: str = "Uploading Files..."):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, status, progress, current_step, created_at, updated_at) VALUES (?, 'processing', 0, ?, ?, ?)",
+                (job_id, current_step, now, now)
+            )
+            self._conn.execute("DELETE FROM job_candidates WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+            self._cache.pop(job_id, None)
+
+    def exists(self, job_id: str) -> bool:
+        with self._lock:
+            if job_id in self._cache:
+                return True
+            return self._conn.execute("SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)).fetchone() is not None
+
+    def update(self, job_id: str, **fields) -> bool:
+        """Set status columns (status, progress, current_step, error). False if the job is unknown."""
+        allowed = {k: v for k, v in fields.items() if k in ("status", "progress", "current_step", "error", "stage")}
+        if not allowed:
+            return self.exists(job_id)
+        assignments = ", ".join(f"{k} = ?" for k in allowed)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE job_id = ?",
+                (*allowed.values(), time.time(), job_id)
+            )
+            self._conn.commit()
+            self._cache.pop(job_id, None)
+            return cursor.rowcount > 0
+
+    def complete(self, job_id: str, result: Dict, current_step: str = "Analysis Complete") -> bool:
+        blob = _compress(_strip_result(result))
+        with self._lock:
+            cursor = self._conn.execute(
+                """UPDATE jobs SET status = 'completed', progress = 100, current_step = ?,
+                       result_blob = ?, result_size = ?, updated_at = ? WHERE job_id = ?""",
+                (current_step, blob, len(blob), time.time(), job_id)
+            )
+            self._conn.commit()
+            self._cache.pop(job_id, None)
+            found = cursor.rowcount > 0
+        self.evict()
+        return found
+
+    def get(self, job_id: str, with_result: bool = True) -> Optional[Dict]:
+        with self._lock:
+            cached = self._cache.get(job_id)
+            if cached is not None:
+                self._cache.move_to_end(job_id)
+                return cached if with_result else {k: v for k, v in cached.items() if k != "result"}
+
+            columns = "job_id, status, progress, current_step, error, stage, created_at, updated_at"
+            if with_result:
+                columns += ", result_blob"
+            row = self._conn.execute(f"SELECT {columns} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row["job_id"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "current_step": row["current_step"],
+            "error": row["error"],
+            "stage": row["stage"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        if with_result:
+            job["result"] = _decompress(row["result_blob"])
+            # Only finished jobs are immutable enough to cache (other writers may still update live ones)
+            if job["status"] in TERMINAL_STATUSES:
+                with self._lock:
+                    self._cache[job_id] = job
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return job
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM job_candidates WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+            self._cache.pop(job_id, None)
+
+    # --- Partial results ---
+    def upsert_candidates(self, job_id: str, stage: str, rows: List[Dict]) -> List[Dict]:
+        """Stamp rows with the job's next seqs and persist them. Returns the stamped rows."""
+        if not rows:
+            return []
+        with self._lock:
+            found = self._conn.execute("SELECT partial_seq FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if found is None:
+                return []
+            seq = found["partial_seq"]
+            stamped = []
+            for row in rows:
+                seq += 1
+                stamped.append(dict(row, seq=seq))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO job_candidates (job_id, filename, seq, row_json) VALUES (?, ?, ?, ?)",
+                [(job_id, row["filename"], row["seq"], json.dumps(row, default=str)) for row in stamped]
+            )
+            self._conn.execute(
+                "UPDATE jobs SET partial_seq = ?, stage = ?, updated_at = ? WHERE job_id = ?",
+                (seq, stage, time.time(), job_id)
+            )
+            self._conn.commit()
+        return stamped
+
+    def candidates(self, job_id: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row_json FROM job_candidates WHERE job_id = ? ORDER BY seq", (job_id,)
+            ).fetchall()
+        return [json.loads(r["row_json"]) for r in rows]
+
+    def candidates_since(self, job_id: str, cursor: int, limit: int = 500) -> List[Dict]:
+        """Rows changed after seq `cursor`, oldest change first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row_json FROM job_candidates WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, cursor, limit)
+            ).fetchall()
+        return [json.loads(r["row_json"]) for r in rows]
+
+    # --- Eviction ---
+    def evict(self):
+        """Drop finished jobs past the TTL, then the oldest ones beyond the count/size limits."""
+        with self._lock:
+            doomed = []
+            if self.ttl_seconds:
+                cutoff = time.time() - self.ttl_seconds
+                doomed += [r["job_id"] for r in self._conn.execute(
+                    "SELECT job_id FROM jobs WHERE status IN ('completed', 'error', 'cancelled') AND updated_at < ?", (cutoff,)
+                )]
+
+            finished = self._conn.execute(
+                "SELECT job_id, result_size FROM jobs WHERE status IN ('completed', 'error', 'cancelled') ORDER BY updated_at DESC"
+            ).fetchall()
+            kept, kept_bytes = 0, 0
+            for row in finished:
+                if row["job_id"] in doomed:
+                    continue
+                kept += 1
+                kept_bytes += row["result_size"]
+                if kept > self.max_jobs or (self.max_bytes and kept_bytes > self.max_bytes):
+                    doomed.append(row["job_id"])
+
+            if doomed:
+                self._conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(j,) for j in doomed])
+                self._conn.executemany("DELETE FROM job_candidates WHERE job_id = ?", [(j,) for j in doomed])
+                self._conn.commit()
+                for job_id in doomed:
+                    self._cache.pop(job_id, None)
+                logger.info(f"🧹 Job store evicted {len(doomed)} finished jobs")
+            return len(doomed)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS jobs, COALESCE(SUM(result_size), 0) AS result_bytes, "
+                "SUM(CASE WHEN status IN ('queued', 'processing') THEN 1 ELSE 0 END) AS active FROM jobs"
+            ).fetchone()
+            return {
+                "backend": "memory" if self.path == ":memory:" else "sqlite",
+                "jobs": row["jobs"],
+                "active": row["active"] or 0,
+                "result_bytes": row["result_bytes"],
+                "cached": len(self._cache),
+            }
+
+
+def create_job_store() -> JobStore:
+    path = ":memory:" if settings.job_store_backend == "memory" else settings.job_store_path
+    store = JobStore(
+        path,
+        cache_size=settings.job_cache_size,
+        ttl_seconds=settings.job_ttl_seconds,
+        max_jobs=settings.job_store_max_jobs,
+        max_bytes=settings.job_store_max_bytes
+    )
+    store.evict()
+    return store
+
+
+job_store = create_job_store()
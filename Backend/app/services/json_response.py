@@ -0,0 +1,55 @@
+"""
+Compact JSON responses for large result payloads
+  - orjson serialization when installed (falls back to the stdlib json encoder)
+  - gzip or brotli (if the `brotli` package is installed) per the client's Accept-Encoding,
+    only for bodies big enough to be worth it
+"""
+
+import gzip
+import json
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=str, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _accepted_encodings(request: Request) -> set:
+    header = request.headers.get("accept-encoding", "")
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if token and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(token.lower())
+    return accepted
+
+
+def compact_json_response(request: Request, payload: Any, status_code: int = 200) -> Response:
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= MIN_COMPRESS_BYTES:
+        accepted = _accepted_encodings(request)
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=5)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
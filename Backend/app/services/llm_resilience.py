@@ -0,0 +1,287 @@
+"""
+Resilient LLM Calls - Timeouts, Deadlines, Circuit Breaker, Hedging
+  - Every call gets a timeout, capped by the caller's deadline (deadline_scope) so a hung
+    request can never outlive the stage that issued it.
+  - A provider-wide circuit breaker fails fast once calls keep failing; the pipeline then
+    falls back to base scores instead of waiting on a degraded API.
+  - Short interactive calls can be hedged: a duplicate is fired if the first is slower than
+    the call type's recent p95, and whichever finishes first wins.
+  - Latency (p50/p99) is recorded per call type.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+from openai import APIConnectionError, APIStatusError
+
+from ..core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the breaker is open."""
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The enclosing deadline_scope ran out before the call could start."""
+
+
+# --- Deadline Propagation ---
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """All LLM calls inside (incl. spawned tasks) must finish within `seconds` from now."""
+    if not seconds:
+        yield
+        return
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(min(current, new_deadline) if current else new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_timeout(timeout: float) -> float:
+    """Per-call timeout clipped to the remaining deadline budget."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("LLM deadline exceeded before call")
+    return min(timeout, remaining)
+
+
+# --- Circuit Breaker ---
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_inflight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_inflight = False
+            if self.state == "half_open" and not self._trial_inflight:
+                self._trial_inflight = True  # Let exactly one probe through
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("✅ LLM circuit closed (provider recovered)")
+            self.state = "closed"
+            self._failures = 0
+            self._trial_inflight = False
+
+    def release_trial(self):
+        """Hand back the half-open probe without judging the provider (call ended for unrelated reasons)."""
+        with self._lock:
+            self._trial_inflight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_inflight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"🔌 LLM circuit OPEN after {self._failures} failures. Failing fast for {self.reset_timeout}s.")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self._failures}
+
+
+# --- Latency Recording ---
+class LatencyRecorder:
+    def __init__(self, window: int = 500):
+        self._samples: Dict[str, deque] = {}
+        self._errors: Dict[str, int] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, call_type: str, seconds: float, ok: bool = True):
+        with self._lock:
+            self._samples.setdefault(call_type, deque(maxlen=self._window)).append(seconds)
+            if not ok:
+                self._errors[call_type] = self._errors.get(call_type, 0) + 1
+
+    def count(self, call_type: str) -> int:
+        with self._lock:
+            return len(self._samples.get(call_type, ()))
+
+    def percentile(self, call_type: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(call_type, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            call_types = list(self._samples)
+        report = {}
+        for call_type in call_types:
+            p50 = self.percentile(call_type, 50)
+            p99 = self.percentile(call_type, 99)
+            report[call_type] = {
+                "count": self.count(call_type),
+                "errors": self._errors.get(call_type, 0),
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            }
+        return report
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Only timeouts, connection errors and 5xx say the provider is unhealthy. 429s are paced and
+    retried by the rate limiter; other 4xx (bad request, auth) are the request's fault."""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+llm_circuit_breaker = CircuitBreaker(settings.llm_breaker_failure_threshold, settings.llm_breaker_reset_seconds)
+llm_latency = LatencyRecorder()
+
+
+def _hedge_delay(call_type: str) -> float:
+    """Fire the duplicate once the first call is slower than this call type's recent p95."""
+    p95 = llm_latency.percentile(call_type, 95)
+    if p95 is None or llm_latency.count(call_type) < 20:
+        return settings.llm_hedge_delay_seconds
+    return max(0.2, p95)
+
+
+async def resilient_call(
+    call_type: str,
+    make_call: Callable[[float], Awaitable],
+    timeout: Optional[float] = None,
+    hedge: bool = False
+):
+    """
+    Run one provider call with timeout, deadline, breaker and optional hedging.
+
+    Args:
+        call_type: Label for latency stats (e.g. "analysis", "jd_extraction", "run_code")
+        make_call: Factory taking the effective timeout (seconds) and returning a fresh awaitable
+        timeout: Per-call timeout; defaults to settings.llm_timeout_seconds
+        hedge: Send a duplicate request if the first is slow (use for short interactive calls only)
+    """
+    requested_timeout = timeout or settings.llm_timeout_seconds
+    # Before allow(): a spent deadline must not take (and leak) the half-open probe slot
+    effective_timeout = remaining_timeout(requested_timeout)
+    if not llm_circuit_breaker.allow():
+        raise CircuitOpenError("LLM provider circuit is open")
+
+    started = time.monotonic()
+    verdict = None  # "success" / "failure"; anything else just releases the probe slot
+    try:
+        if hedge:
+            result = await hedged(call_type, make_call, effective_timeout)
+        else:
+            result = await asyncio.wait_for(make_call(effective_timeout), effective_timeout)
+        verdict = "success"
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # Running out of the caller's deadline says nothing about provider health
+        deadline_cut = isinstance(e, asyncio.TimeoutError) and effective_timeout < requested_timeout
+        if is_provider_failure(e) and not deadline_cut:
+            verdict = "failure"
+        llm_latency.record(call_type, time.monotonic() - started, ok=False)
+        raise
+    finally:
+        _settle(verdict)
+    llm_latency.record(call_type, time.monotonic() - started)
+    return result
+
+
+def _settle(verdict: Optional[str]):
+    if verdict == "success":
+        llm_circuit_breaker.record_success()
+    elif verdict == "failure":
+        llm_circuit_breaker.record_failure()
+    else:
+        llm_circuit_breaker.release_trial()
+
+
+async def hedged(call_type: str, make_call: Callable[[float], Awaitable], timeout: Optional[float] = None):
+    """
+    First-wins race: start a duplicate if the first call is still running after the hedge
+    delay, then cancel the loser. No breaker/latency bookkeeping (the inner calls do that).
+    """
+    timeout = remaining_timeout(timeout or settings.llm_timeout_seconds)
+    return await asyncio.wait_for(_race(call_type, make_call, timeout), timeout)
+
+
+async def _race(call_type: str, make_call: Callable[[float], Awaitable], timeout: float):
+    primary = asyncio.ensure_future(make_call(timeout))
+    done, _ = await asyncio.wait({primary}, timeout=_hedge_delay(call_type))
+    if done:
+        return primary.result()
+
+    logger.info(f"🪁 Hedging slow '{call_type}' call with a duplicate request")
+    backup = asyncio.ensure_future(make_call(timeout))
+    pending = {primary, backup}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def call_sync(call_type: str, make_call: Callable[[], object]):
+    """Blocking variant (no hedging): breaker + latency around a sync SDK call."""
+    if not llm_circuit_breaker.allow():
+        raise CircuitOpenError("LLM provider circuit is open")
+    started = time.monotonic()
+    verdict = None
+    try:
+        result = make_call()
+        verdict = "success"
+    except Exception as e:
+        if is_provider_failure(e):
+            verdict = "failure"
+        llm_latency.record(call_type, time.monotonic() - started, ok=False)
+        raise
+    finally:
+        _settle(verdict)
+    llm_latency.record(call_type, time.monotonic() - started)
+    return result
+
+
+def health_snapshot() -> dict:
+    return {"circuit": llm_circuit_breaker.snapshot(), "latency": llm_latency.snapshot()}
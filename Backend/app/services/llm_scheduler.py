@@ -0,0 +1,177 @@
+"""
+Process-Wide LLM Scheduler
+All jobs and the JD / Aptitude sub-apps share one OpenAI key. This scheduler bounds the
+number of calls in flight and decides who goes next:
+  1. Priority class: interactive endpoints (/generate-jd, /run-code, ...) before batch screening
+  2. Within a class: weighted fair queuing per flow (one flow per job), so a 300-resume
+     campaign cannot starve a smaller job that started later.
+Every grant records how long the request waited in the queue.
+"""
+
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+import contextvars
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ..core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+_PRIORITY_RANK = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 1}
+
+
+@dataclass
+class LLMFlow:
+    """Who an LLM call belongs to. Bound per task via bind_llm_flow (inherited by child tasks)."""
+    priority: str = PRIORITY_BATCH
+    flow: str = "default"
+    weight: float = 1.0
+
+
+_current_flow: contextvars.ContextVar[LLMFlow] = contextvars.ContextVar("llm_flow", default=LLMFlow())
+
+
+def bind_llm_flow(priority: str = PRIORITY_BATCH, flow: str = "default", weight: float = 1.0):
+    """Tag every LLM call made from the current task (and tasks it spawns) with this flow."""
+    return _current_flow.set(LLMFlow(priority=priority, flow=flow, weight=weight))
+
+
+def current_llm_flow() -> LLMFlow:
+    return _current_flow.get()
+
+
+@dataclass
+class LLMTicket:
+    priority: str
+    flow: str
+    cost: float
+    enqueued_at: float = field(default_factory=time.monotonic)
+    granted_at: Optional[float] = None
+
+    @property
+    def wait_seconds(self) -> float:
+        return (self.granted_at or time.monotonic()) - self.enqueued_at
+
+
+class LLMScheduler:
+    def __init__(self, max_inflight: int):
+        self.max_inflight = max(1, max_inflight)
+        self._inflight = 0
+        self._heap = []  # (priority_rank, finish_tag, seq, future, ticket, start_tag)
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._flow_finish = {}  # flow -> finish tag of its last queued request
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=200)
+        self._totals = {p: {"requests": 0, "wait_total": 0.0, "wait_max": 0.0} for p in _PRIORITY_RANK}
+
+    async def acquire(self, priority: str = PRIORITY_BATCH, flow: str = "default", cost: float = 1.0, weight: float = 1.0) -> LLMTicket:
+        """Wait for an in-flight slot. Pair every acquire with release()."""
+        if priority not in _PRIORITY_RANK:
+            priority = PRIORITY_BATCH
+        ticket = LLMTicket(priority=priority, flow=flow, cost=cost)
+        future = asyncio.get_running_loop().create_future()
+
+        with self._lock:
+            # WFQ tags: a flow's next request starts after its previous one (or now, if idle)
+            start_tag = max(self._virtual_time, self._flow_finish.get(flow, 0.0))
+            finish_tag = start_tag + max(cost, 1.0) / max(weight, 0.01)
+            self._flow_finish[flow] = finish_tag
+
+            if self._inflight < self.max_inflight and not self._heap:
+                self._grant_locked(ticket, start_tag)
+                return ticket
+            heapq.heappush(self._heap, (_PRIORITY_RANK[priority], finish_tag, next(self._seq), future, ticket, start_tag))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = ticket.granted_at is not None
+            if granted:
+                self.release()  # Slot was handed to us while we were being cancelled
+            raise
+        return ticket
+
+    def release(self):
+        with self._lock:
+            self._inflight = max(0, self._inflight - 1)
+            self._dispatch_locked()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None, flow: Optional[str] = None, cost: float = 1.0, weight: Optional[float] = None):
+        """async with llm_scheduler.slot(...): <one LLM call>. Unset fields come from the bound flow."""
+        bound = current_llm_flow()
+        ticket = await self.acquire(
+            priority=priority or bound.priority,
+            flow=flow or bound.flow,
+            cost=cost,
+            weight=weight if weight is not None else bound.weight
+        )
+        try:
+            yield ticket
+        finally:
+            self.release()
+
+    def _dispatch_locked(self):
+        while self._heap and self._inflight < self.max_inflight:
+            _, _, _, future, ticket, start_tag = heapq.heappop(self._heap)
+            if future.done():  # Waiter was cancelled
+                continue
+            self._grant_locked(ticket, start_tag)
+            future.get_loop().call_soon_threadsafe(self._wake, future)
+        if not self._heap:
+            # Idle flows can't bank credit; forget tags that are already in the past
+            self._flow_finish = {f: t for f, t in self._flow_finish.items() if t > self._virtual_time}
+
+    @staticmethod
+    def _wake(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    def _grant_locked(self, ticket: LLMTicket, start_tag: float):
+        self._inflight += 1
+        self._virtual_time = max(self._virtual_time, start_tag)
+        ticket.granted_at = time.monotonic()
+        wait = ticket.wait_seconds
+        totals = self._totals[ticket.priority]
+        totals["requests"] += 1
+        totals["wait_total"] += wait
+        totals["wait_max"] = max(totals["wait_max"], wait)
+        self._recent.append({"priority": ticket.priority, "flow": ticket.flow, "wait_ms": round(wait * 1000, 1)})
+        if wait > 1.0:
+            logger.info(f"⏳ LLM queue wait {wait:.1f}s ({ticket.priority}, flow={ticket.flow})")
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = {p: 0 for p in _PRIORITY_RANK}
+            for entry in self._heap:
+                if not entry[3].done():
+                    queued[entry[4].priority] += 1
+            classes = {}
+            for p, t in self._totals.items():
+                classes[p] = {
+                    "requests": t["requests"],
+                    "queued": queued[p],
+                    "avg_wait_ms": round(t["wait_total"] / t["requests"] * 1000, 1) if t["requests"] else 0.0,
+                    "max_wait_ms": round(t["wait_max"] * 1000, 1),
+                }
+            return {
+                "max_inflight": self.max_inflight,
+                "inflight": self._inflight,
+                "classes": classes,
+                "recent": list(self._recent)[-20:],
+            }
+
+
+llm_scheduler = LLMScheduler(settings.llm_max_inflight)
@@ -1,7 +1,10 @@
 
 import io
+import logging
 from pypdf import PdfReader
 
+logger = logging.getLogger(__name__)
+
 class PDFService:
     def extract_text(self, file_content: bytes) -> tuple[str, int]:
         """
@@ -28,7 +31,7 @@ class PDFService:
             pass
         except Exception as e:
             # Fallback if pdfplumber fails on specific PDF
-            print(f"pdfplumber failed: {e}. Falling back to pypdf.")
+            logger.warning(f"pdfplumber failed: {e}. Falling back to pypdf.")
             pass
 
         # Method 2: pypdf (Fallback)
@@ -49,7 +52,7 @@ class PDFService:
             return self._clean_text(text), page_count
             
         except Exception as e:
-            print(f"PDF Extraction Failed: {e}")
+            logger.error(f"PDF Extraction Failed: {e}")
             return "", 0
 
     def _clean_text(self, text: str) -> str:
@@ -125,7 +128,7 @@ class PDFService:
             return ""
             
         except Exception as e:
-            print(f"Advanced Email Extraction Failed: {e}")
+            logger.warning(f"Advanced Email Extraction Failed: {e}")
             return ""
 
 pdf_service = PDFService()
@@ -0,0 +1,295 @@
+"""
+Pipeline Stage Graph
+Runs the analysis pipeline as named stages with declared inputs and outputs:
+  - A stage starts as soon as its inputs exist, so independent stages overlap.
+  - executor "async" runs on the event loop; "thread" runs each call in a worker thread.
+  - Item stages (per_item=True) take their first input one item at a time - from a list or from
+    the stream an upstream item stage is still filling - with up to `concurrency` calls in flight,
+    and emit results into their own output stream. Parsed resumes therefore flow into role
+    matching while the rest are still being parsed.
+  - A batch stage that lists a stream as an input gets it as a list once the stream closes.
+  - Source stages (source=True) produce a stream from nothing upstream: fn(ctx) returns an iterator
+    ("thread": iterated in a worker thread) and every item goes downstream as soon as it is yielded.
+Every stage records wall-clock time, CPU time and items processed (see StageGraph.timings).
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ("async", "thread")
+
+_CLOSED = object()
+
+
+class Stream:
+    """Unbounded channel between an item stage and the one stage that consumes it."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, item: Any):
+        self._queue.put_nowait(item)
+
+    def close(self):
+        self._queue.put_nowait(_CLOSED)
+
+    async def get(self) -> Any:
+        item = await self._queue.get()
+        if item is _CLOSED:
+            # Leave the marker in place so every concurrent reader sees the end
+            self._queue.put_nowait(_CLOSED)
+        return item
+
+    async def collect(self) -> List[Any]:
+        items = []
+        while (item := await self.get()) is not _CLOSED:
+            items.append(item)
+        return items
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable  # batch: fn(ctx) -> {output: value}; item: fn(ctx, item) -> item to emit (None drops it); source: fn(ctx) -> iterator
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    executor: str = "async"
+    concurrency: int = 1
+    per_item: bool = False
+    source: bool = False
+
+
+@dataclass
+class StageTiming:
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    items: int = 0
+    started_at: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_cpu(self, seconds: float):
+        with self._lock:
+            self.cpu_seconds += seconds
+
+    def as_dict(self) -> Dict:
+        return {
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "items": self.items,
+        }
+
+
+class _CpuTimed:
+    """Await a coroutine, charging the CPU time of each of its event-loop steps to `timing`."""
+
+    def __init__(self, coro, timing: StageTiming):
+        self.coro = coro
+        self.timing = timing
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            started = time.thread_time()
+            try:
+                if error is not None:
+                    yielded = self.coro.throw(error)
+                else:
+                    yielded = self.coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.timing.add_cpu(time.thread_time() - started)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class _CpuTimedIter:
+    """Async-iterate an async generator, charging the CPU time of its steps to `timing`."""
+
+    def __init__(self, agen, timing: StageTiming):
+        self.agen = agen
+        self.timing = timing
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await _CpuTimed(self.agen.__anext__(), self.timing)
+
+
+def _call_in_thread(fn: Callable, args: tuple, timing: StageTiming):
+    started = time.thread_time()
+    try:
+        return fn(*args)
+    finally:
+        timing.add_cpu(time.thread_time() - started)
+
+
+class StageGraph:
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self.streams = {out for s in stages if s.per_item or s.source for out in s.outputs}
+        self._timings: Dict[str, StageTiming] = {}
+
+        produced = {}
+        consumed_streams = set()
+        for s in stages:
+            if s.executor not in EXECUTORS:
+                raise ValueError(f"Stage '{s.name}': unknown executor '{s.executor}'")
+            if s.per_item and (not s.inputs or len(s.outputs) > 1):
+                raise ValueError(f"Item stage '{s.name}' needs an item input and at most one output stream")
+            if s.source and (s.per_item or len(s.outputs) != 1):
+                raise ValueError(f"Source stage '{s.name}' needs exactly one output stream (and no item input)")
+            for name in s.inputs:
+                if name in self.streams:
+                    if name in consumed_streams:
+                        raise ValueError(f"Stream '{name}' has more than one consumer")
+                    consumed_streams.add(name)
+            for out in s.outputs:
+                if out in produced:
+                    raise ValueError(f"'{out}' is produced by both '{produced[out]}' and '{s.name}'")
+                produced[out] = s.name
+        self.produced = produced
+
+    async def run(self, ctx: Dict[str, Any], before_stage: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Run every stage against ctx (pre-filled with the job's initial values) and return ctx.
+        before_stage(name) is called as each stage starts; an exception there (or in any stage)
+        cancels the stages still running and propagates.
+        """
+        missing = {n for s in self.stages for n in s.inputs if n not in self.produced and n not in ctx}
+        if missing:
+            raise ValueError(f"Pipeline inputs not provided: {sorted(missing)}")
+
+        self._timings = {s.name: StageTiming() for s in self.stages}
+        ready = {name: asyncio.Event() for name in self.produced}
+        for name in self.streams:
+            ctx[name] = Stream()
+            ready[name].set()
+
+        async def run_stage(stage: Stage):
+            for name in stage.inputs:
+                if name in ready:
+                    await ready[name].wait()
+            if not stage.per_item and not stage.source:
+                # Batch stages see upstream streams as complete lists (not timed: that is upstream's work)
+                for name in stage.inputs:
+                    if name in self.streams and isinstance(ctx[name], Stream):
+                        ctx[name] = await ctx[name].collect()
+            if before_stage is not None:
+                before_stage(stage.name)
+
+            timing = self._timings[stage.name]
+            timing.started_at = time.perf_counter()
+            try:
+                if stage.per_item:
+                    await self._run_items(stage, ctx, timing)
+                elif stage.source:
+                    await self._run_source(stage, ctx, timing)
+                else:
+                    outputs = await self._call(stage, (ctx,), timing) or {}
+                    timing.items = 1
+                    for name in stage.outputs:
+                        ctx[name] = outputs[name]
+                        ready[name].set()
+            finally:
+                timing.wall_seconds = time.perf_counter() - timing.started_at
+
+        tasks = [asyncio.create_task(run_stage(s), name=f"stage:{s.name}") for s in self.stages]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return ctx
+
+    async def _call(self, stage: Stage, args: tuple, timing: StageTiming):
+        if stage.executor == "thread":
+            return await asyncio.to_thread(_call_in_thread, stage.fn, args, timing)
+        result = stage.fn(*args)
+        if asyncio.iscoroutine(result):
+            result = await _CpuTimed(result, timing)
+        return result
+
+    async def _run_items(self, stage: Stage, ctx: Dict[str, Any], timing: StageTiming):
+        source = ctx[stage.inputs[0]]
+        if not isinstance(source, Stream):
+            items, source = source, Stream()
+            for item in items:
+                source.put(item)
+            source.close()
+        sink = ctx[stage.outputs[0]] if stage.outputs else None
+
+        async def worker():
+            while (item := await source.get()) is not _CLOSED:
+                result = await self._call(stage, (ctx, item), timing)
+                timing.items += 1
+                if result is not None and sink is not None:
+                    sink.put(result)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, stage.concurrency))))
+        finally:
+            if sink is not None:
+                sink.close()
+
+    async def _run_source(self, stage: Stage, ctx: Dict[str, Any], timing: StageTiming):
+        sink = ctx[stage.outputs[0]]
+        try:
+            if stage.executor == "thread":
+                loop = asyncio.get_running_loop()
+                stop = threading.Event()
+
+                def pump():
+                    started = time.thread_time()
+                    iterator = iter(stage.fn(ctx))
+                    try:
+                        for item in iterator:
+                            loop.call_soon_threadsafe(sink.put, item)
+                            timing.items += 1
+                            if stop.is_set():
+                                break
+                    finally:
+                        # Closing a generator runs its cleanup (e.g. shuts down its download pool)
+                        if hasattr(iterator, "close"):
+                            iterator.close()
+                        timing.add_cpu(time.thread_time() - started)
+
+                try:
+                    await asyncio.to_thread(pump)
+                finally:
+                    # Cancelled: the thread stops at its next item
+                    stop.set()
+            else:
+                async for item in _CpuTimedIter(stage.fn(ctx), timing):
+                    sink.put(item)
+                    timing.items += 1
+        finally:
+            sink.close()
+
+    def timings(self) -> Dict[str, Dict]:
+        return {name: t.as_dict() for name, t in self._timings.items()}
+
+    def describe(self) -> List[Dict]:
+        """The declared graph (for logs / debugging endpoints)."""
+        return [
+            {
+                "stage": s.name,
+                "inputs": list(s.inputs),
+                "outputs": list(s.outputs),
+                "executor": s.executor,
+                "concurrency": s.concurrency,
+                "streaming": s.per_item or s.source,
+            }
+            for s in self.stages
+        ]
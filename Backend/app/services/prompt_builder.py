@@ -0,0 +1,150 @@
+"""
+Prompt Builder - Token-Accurate Budgets & Relevance-Based Compression
+Counts real tokens with a local tokenizer (tiktoken) and packs the resume chunks
+most similar to the JD summary into a fixed token budget, instead of cutting
+resumes at a character offset.
+"""
+
+import re
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+from ..core.config import get_settings
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a ~4 chars/token estimate
+    tiktoken = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Section headers that usually start a new block in a resume (works on clean_text() output too)
+SECTION_RE = re.compile(
+    r'\b(?:professional experience|work experience|work history|employment history|experience|'
+    r'internships?|projects|personal projects|academic projects|education|technical skills|skills|'
+    r'certifications?|achievements|awards|publications|summary|profile|objective)\b',
+    re.IGNORECASE
+)
+
+
+class PromptBuilder:
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._encoding_loaded = False
+
+    @property
+    def encoding(self):
+        """Lazy-load the tokenizer for the configured model (None if tiktoken is unavailable)."""
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            if tiktoken is not None:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except Exception:
+                    try:
+                        self._encoding = tiktoken.get_encoding("o200k_base")
+                    except Exception as e:
+                        logger.warning(f"Tokenizer unavailable ({e}). Using char estimate.")
+        return self._encoding
+
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(text) // 4 + 1
+
+    def truncate_to_tokens(self, text: str, budget: int) -> str:
+        """Keep the head of text that fits in budget tokens."""
+        if not text or self.count_tokens(text) <= budget:
+            return text
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return self.encoding.decode(tokens[:budget]) + " [...Truncated...]"
+        return text[:budget * 4] + " [...Truncated...]"
+
+    def split_chunks(self, text: str, max_chunk_tokens: int = 200) -> List[str]:
+        """Split a resume at section headers, then window long sections by words."""
+        starts = sorted({0, *(m.start() for m in SECTION_RE.finditer(text))})
+        sections = [text[a:b].strip() for a, b in zip(starts, starts[1:] + [len(text)])]
+
+        chunks = []
+        for section in sections:
+            if not section:
+                continue
+            # Glue tiny fragments (a header word on its own) onto the previous chunk
+            if chunks and self.count_tokens(section) < 20:
+                chunks[-1] = f"{chunks[-1]} {section}"
+                continue
+            words = section.split()
+            window = max(1, int(max_chunk_tokens * 0.75))  # ~0.75 words per token
+            for i in range(0, len(words), window):
+                chunks.append(" ".join(words[i:i + window]))
+        return chunks
+
+    def compress_resume(
+        self,
+        text: str,
+        jd_summary: str,
+        budget: int,
+        jd_embedding: Optional[List[float]] = None
+    ) -> str:
+        """
+        Fit a resume into budget tokens, keeping the chunks most relevant to the JD.
+
+        The first chunk (name/title/summary header) is always kept; the rest are ranked by
+        cosine similarity to the JD summary using the MiniLM embeddings and re-emitted in
+        original order so the LLM still reads a chronological resume.
+        Embeds the chunks (blocking, CPU-bound): call it from a worker thread, not the event loop.
+        """
+        if self.count_tokens(text) <= budget:
+            return text
+
+        chunks = self.split_chunks(text)
+        if len(chunks) <= 1:
+            return self.truncate_to_tokens(text, budget)
+
+        try:
+            from .vector_service import vector_service
+            embeddings = vector_service.embeddings
+            if jd_embedding is None:
+                jd_embedding = embeddings.embed_query(jd_summary)
+            chunk_matrix = np.array(embeddings.embed_documents(chunks))
+            jd_vec = np.array(jd_embedding)
+            chunk_matrix = chunk_matrix / (np.linalg.norm(chunk_matrix, axis=1, keepdims=True) + 1e-9)
+            jd_vec = jd_vec / (np.linalg.norm(jd_vec) + 1e-9)
+            similarities = chunk_matrix @ jd_vec
+        except Exception as e:
+            logger.warning(f"Chunk ranking failed ({e}). Falling back to head truncation.")
+            return self.truncate_to_tokens(text, budget)
+
+        chunk_tokens = [self.count_tokens(c) for c in chunks]
+        # Header first, then most relevant
+        order = [0] + sorted(range(1, len(chunks)), key=lambda i: similarities[i], reverse=True)
+
+        selected = set()
+        used = 0
+        for i in order:
+            if used + chunk_tokens[i] <= budget:
+                selected.add(i)
+                used += chunk_tokens[i]
+
+        if not selected:
+            return self.truncate_to_tokens(text, budget)
+
+        dropped = len(chunks) - len(selected)
+        packed = []
+        for i in range(len(chunks)):
+            if i in selected:
+                packed.append(chunks[i])
+            elif packed and packed[-1] != "[...]":
+                packed.append("[...]")
+        logger.info(f"   ✂️ Compressed resume: {sum(chunk_tokens)} -> {used} tokens ({dropped} low-relevance chunks dropped)")
+        return " ".join(packed)
+
+
+prompt_builder = PromptBuilder(settings.llm_model)
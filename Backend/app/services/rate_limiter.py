@@ -0,0 +1,142 @@
+"""
+Header-Aware Token-Bucket Rate Limiter
+Tracks requests-per-minute and tokens-per-minute budgets for the shared OpenAI key.
+Buckets refill continuously and are corrected from the provider's x-ratelimit-* headers,
+so calls are scheduled just in time instead of sleeping on a fixed interval.
+"""
+
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset values like '1s', '6m0s', '20ms' into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)  # Plain seconds (retry-after style)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(num) * _UNIT_SECONDS[unit] for num, unit in parts)
+
+
+class RateLimiter:
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm_capacity = float(rpm)
+        self.tpm_capacity = float(tpm)
+        self._requests = self.rpm_capacity
+        self._tokens = self.tpm_capacity
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        # threading.Lock (not asyncio.Lock): state updates never await, and the sync query() path shares it
+        self._lock = threading.Lock()
+
+    def _refill_locked(self, now: float):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._requests = min(self.rpm_capacity, self._requests + elapsed * self.rpm_capacity / 60.0)
+            self._tokens = min(self.tpm_capacity, self._tokens + elapsed * self.tpm_capacity / 60.0)
+            self._last_refill = now
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Consume budget if available. Returns 0 on success, else seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._refill_locked(now)
+            # A single request larger than the whole TPM bucket only needs a full bucket
+            needed_tokens = min(tokens, self.tpm_capacity)
+            if self._requests >= 1 and self._tokens >= needed_tokens:
+                self._requests -= 1
+                self._tokens -= needed_tokens
+                return 0.0
+            wait_requests = (1 - self._requests) * 60.0 / self.rpm_capacity if self._requests < 1 else 0.0
+            wait_tokens = (needed_tokens - self._tokens) * 60.0 / self.tpm_capacity if self._tokens < needed_tokens else 0.0
+            return max(wait_requests, wait_tokens, 0.01)
+
+    async def acquire(self, tokens: int):
+        """Wait (without blocking the event loop) until a request of `tokens` fits both budgets."""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, tokens: int):
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Sync buckets with the provider's view (x-ratelimit-limit/remaining-*)."""
+        if not headers:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._refill_locked(now)
+            try:
+                limit_requests = headers.get("x-ratelimit-limit-requests")
+                limit_tokens = headers.get("x-ratelimit-limit-tokens")
+                if limit_requests:
+                    self.rpm_capacity = float(limit_requests)
+                if limit_tokens:
+                    self.tpm_capacity = float(limit_tokens)
+
+                remaining_requests = headers.get("x-ratelimit-remaining-requests")
+                remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+                # Provider is authoritative when it has less left than we think (other clients share the key)
+                if remaining_requests is not None:
+                    self._requests = min(self.rpm_capacity, float(remaining_requests))
+                if remaining_tokens is not None:
+                    self._tokens = min(self.tpm_capacity, float(remaining_tokens))
+            except ValueError as e:
+                logger.debug(f"Ignoring malformed rate-limit header: {e}")
+
+    def penalize(self, retry_after: Optional[float]):
+        """After a 429: hold all callers until the provider's reset (or a short default)."""
+        with self._lock:
+            wait = retry_after if retry_after and retry_after > 0 else 1.0
+            self._blocked_until = max(self._blocked_until, time.monotonic() + wait)
+            self._requests = 0.0
+
+    def backoff_delay(self, attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """Retry delay for a 429: provider hint if present, else exponential with full jitter."""
+        if headers:
+            for key in ("retry-after-ms", "retry-after", "x-ratelimit-reset-tokens", "x-ratelimit-reset-requests"):
+                value = headers.get(key)
+                if value:
+                    seconds = parse_reset_duration(value)
+                    if key == "retry-after-ms" and seconds is not None:
+                        seconds /= 1000.0
+                    if seconds is not None:
+                        # Small jitter so concurrent retries don't land on the same instant
+                        return seconds + random.uniform(0, 0.5)
+        return random.uniform(0, min(30.0, 1.0 * (2 ** attempt)))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            return {
+                "rpm_capacity": self.rpm_capacity,
+                "tpm_capacity": self.tpm_capacity,
+                "requests_available": round(self._requests, 2),
+                "tokens_available": round(self._tokens),
+                "blocked_for_seconds": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+            }
@@ -0,0 +1,211 @@
+"""
+Report Storage (content-addressed)
+Every resume is stored once, as a blob named by its content hash, no matter how many campaigns
+(or campaign folders) it appears in:
+  blobs/ab/ab12...      one file per unique resume (hardlinked from the upload when possible)
+  Campaign_*/<Folder>/  hardlinks to the blobs, so /reports keeps serving real files
+  Campaign_*/manifest.json
+                        folder/filename -> hash for every entry; when the filesystem can't
+                        hardlink (e.g. blobs on another volume), entries stay manifest-only
+                        and readers resolve them through blob_path()
+stream_campaign_zip() packs a campaign into a ZIP as it is read (constant memory, nothing
+written to disk), for the /reports/{campaign}/archive download.
+All of this does blocking disk I/O: call it from a worker thread, not the event loop.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..core.config import get_settings
+
+settings = get_settings()
+
+MANIFEST_NAME = "manifest.json"
+LINK_MODES = ("hardlink", "manifest")
+RESUME_FOLDERS = ("All_Resumes", "Shortlisted_Resumes", "Not_Selected_Resumes")
+HANDOFF_FILES = ("selected_candidates.json", "not_selected_candidates.json")
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """md5 of the file's raw bytes, streamed: the same digest the parse stage records as file_hash."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def blob_path(self, file_hash: str) -> str:
+        return os.path.join(self.root, file_hash[:2], file_hash)
+
+    def __contains__(self, file_hash: str) -> bool:
+        return os.path.exists(self.blob_path(file_hash))
+
+    def put(self, src_path: str, file_hash: Optional[str] = None) -> Tuple[str, bool]:
+        """Store src_path under its hash. Returns (hash, written); an already-stored blob is not rewritten."""
+        file_hash = file_hash or hash_file(src_path)
+        dest = self.blob_path(file_hash)
+        if os.path.exists(dest):
+            return file_hash, False
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with self._lock:
+            if os.path.exists(dest):
+                return file_hash, False
+            try:
+                # The upload is already on disk: link it instead of writing the bytes again
+                os.link(src_path, dest)
+            except OSError:
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), prefix=".incoming_")
+                os.close(fd)
+                try:
+                    shutil.copyfile(src_path, tmp)
+                    os.replace(tmp, dest)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    raise
+        return file_hash, True
+
+
+class CampaignWriter:
+    """Populates one campaign folder from the blob store and records it in manifest.json."""
+
+    def __init__(self, blobs: BlobStore, report_dir: str, link_mode: str = "hardlink"):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown report link mode: {link_mode}")
+        self.blobs = blobs
+        self.report_dir = report_dir
+        self.entries: List[Dict] = []
+        self.stats = {"blobs_written": 0, "blobs_reused": 0, "linked": 0, "manifest_only": 0}
+        # Flips to False after the first failed link; the rest of the campaign goes manifest-only
+        self._can_link = link_mode == "hardlink"
+        os.makedirs(report_dir, exist_ok=True)
+
+    def store(self, src_path: str, file_hash: Optional[str] = None) -> str:
+        """Put one source file into the blob store (once per content). Returns its hash."""
+        file_hash, written = self.blobs.put(src_path, file_hash)
+        self.stats["blobs_written" if written else "blobs_reused"] += 1
+        return file_hash
+
+    def add(self, folder: str, filename: str, file_hash: str) -> str:
+        """Expose a stored blob as <report_dir>/<folder>/<filename>. Returns the path to hand out."""
+        blob = self.blobs.blob_path(file_hash)
+        dest = os.path.join(self.report_dir, folder, filename)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        linked = False
+        if self._can_link:
+            try:
+                if os.path.lexists(dest):
+                    os.remove(dest)
+                os.link(blob, dest)
+                linked = True
+            except OSError:
+                self._can_link = False
+        self.stats["linked" if linked else "manifest_only"] += 1
+        self.entries.append({"folder": folder, "filename": filename, "file_hash": file_hash, "linked": linked})
+        return dest if linked else blob
+
+    def write_manifest(self):
+        manifest = {"blob_root": os.path.abspath(self.blobs.root), "files": self.entries}
+        with open(os.path.join(self.report_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+
+def load_manifest(report_dir: str) -> Optional[Dict]:
+    path = os.path.join(report_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def iter_campaign_files(report_dir: str, blobs: BlobStore, folders: Tuple[str, ...] = RESUME_FOLDERS) -> Iterator[Tuple[str, str]]:
+    """(path inside the campaign, readable path) for each resume. Manifest-only entries resolve to
+    their blob; campaigns written before manifests existed are listed from their folders."""
+    manifest = load_manifest(report_dir)
+    if manifest is not None:
+        for folder in folders:
+            for entry in manifest["files"]:
+                if entry["folder"] != folder:
+                    continue
+                local = os.path.join(report_dir, folder, entry["filename"])
+                yield f"{folder}/{entry['filename']}", local if entry["linked"] else blobs.blob_path(entry["file_hash"])
+        return
+    for folder in folders:
+        folder_path = os.path.join(report_dir, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for name in sorted(os.listdir(folder_path)):
+            path = os.path.join(folder_path, name)
+            if os.path.isfile(path):
+                yield f"{folder}/{name}", path
+
+
+class _ZipSink:
+    """Write-only, unseekable file object: zipfile writes into it, the generator drains it."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_campaign_zip(report_dir: str, blobs: BlobStore, shortlisted_only: bool = False,
+                        chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+    """Yield a ZIP of the campaign's resumes plus its handoff JSONs, one file chunk at a time.
+    Memory stays around chunk_size whatever the campaign size; no archive is built on disk."""
+    folders = ("Shortlisted_Resumes",) if shortlisted_only else RESUME_FOLDERS
+    members = [(name, os.path.join(report_dir, name), zipfile.ZIP_DEFLATED)
+               for name in HANDOFF_FILES if os.path.isfile(os.path.join(report_dir, name))]
+    # Resumes (PDF/DOCX) are already compressed: store them as-is
+    members += [(arcname, path, zipfile.ZIP_STORED) for arcname, path in iter_campaign_files(report_dir, blobs, folders)]
+
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w") as archive:
+        for arcname, path, compression in members:
+            try:
+                src = open(path, "rb")
+            except OSError:
+                continue
+            with src:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                info.compress_type = compression
+                with archive.open(info, mode="w", force_zip64=True) as dest:
+                    for chunk in iter(lambda: src.read(chunk_size), b""):
+                        dest.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+    # Trailing data descriptor + central directory
+    yield sink.drain()
+
+
+blob_store = BlobStore(settings.report_blob_dir)
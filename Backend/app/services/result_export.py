@@ -0,0 +1,211 @@
+"""
+Columnar Result Export
+Flattens a finished job's result into one row per candidate (score components, matched/missing
+skills, role match, AI verdict) for analytics tools:
+  - per job: CSV, XLSX (openpyxl) or Parquet (pyarrow) download
+  - across campaigns: an append-only Parquet dataset, one file per job under
+    <dataset_dir>/date=YYYY-MM-DD/ (readable as a whole with pyarrow.dataset / pandas / DuckDB)
+pyarrow and openpyxl are optional; formats whose package is missing raise ExportUnavailable.
+"""
+
+import io
+import os
+import csv
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency
+    pa = pq = None
+
+try:
+    import openpyxl
+except ImportError:  # Optional dependency
+    openpyxl = None
+
+EXPORT_FORMATS = ("csv", "xlsx", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# (column, type) in output order; types drive the Parquet schema so every job appends the same one
+COLUMNS: List[Tuple[str, str]] = [
+    ("job_id", "string"),
+    ("campaign", "string"),
+    ("jd_title", "string"),
+    ("rank", "int"),
+    ("filename", "string"),
+    ("name", "string"),
+    ("email", "string"),
+    ("status", "string"),
+    ("total_score", "float"),
+    ("semantic_score", "float"),
+    ("semantic_points", "float"),
+    ("keyword_score", "float"),
+    ("experience_score", "float"),
+    ("achievement_bonus", "int"),
+    ("years_of_experience", "float"),
+    ("matched_skills", "list"),
+    ("missing_skills", "list"),
+    ("extracted_skills", "list"),
+    ("applied_for", "string"),
+    ("detected_role", "string"),
+    ("role_match", "bool"),
+    ("role_similarity", "float"),
+    ("is_rejected", "bool"),
+    ("rejection_reason", "string"),
+    ("ai_analyzed", "bool"),
+    ("analysis_method", "string"),
+    ("reasoning", "string"),
+]
+
+
+class ExportUnavailable(RuntimeError):
+    """The package needed for this export format is not installed."""
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return None if value is None else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def candidate_rows(result: Dict, job_id: Optional[str] = None, jd_title: Optional[str] = None) -> List[Dict]:
+    """Ranked candidates first (rank 1..N), then the hard rejections (no rank, zero score)."""
+    campaign = result.get("campaign_folder")
+    rows = []
+    for rank, c in enumerate(result.get("candidates", []), start=1):
+        score = c.get("score") or {}
+        role = c.get("role_match") or {}
+        rows.append({
+            "job_id": job_id,
+            "campaign": campaign,
+            "jd_title": jd_title,
+            "rank": rank,
+            "filename": c.get("filename"),
+            "name": c.get("candidate_name") or c.get("name"),
+            "email": c.get("email") or None,
+            "status": c.get("status"),
+            "total_score": _float(score.get("total")),
+            "semantic_score": _float(score.get("semantic_score")),
+            "semantic_points": _float(score.get("semantic_points")),
+            "keyword_score": _float(score.get("keyword_score")),
+            "experience_score": _float(score.get("experience_score")),
+            "achievement_bonus": _int(c.get("achievement_bonus")),
+            # The scorer / AI verdict keep the real figure in score["years"]; the top-level field stays 0.0
+            "years_of_experience": _float(score.get("years", c.get("years_of_experience"))),
+            "matched_skills": list(score.get("matched_keywords") or []),
+            "missing_skills": list(score.get("missing_keywords") or []),
+            "extracted_skills": list(c.get("extracted_skills") or []),
+            "applied_for": c.get("applied_for"),
+            "detected_role": role.get("detected_role"),
+            "role_match": role.get("is_match"),
+            "role_similarity": _float(role.get("similarity")),
+            "is_rejected": bool(score.get("is_rejected", False)),
+            "rejection_reason": score.get("rejection_reason"),
+            "ai_analyzed": bool(c.get("ai_analyzed", False)),
+            "analysis_method": c.get("analysis_method"),
+            "reasoning": c.get("reasoning"),
+        })
+    for r in result.get("rejected_candidates", []):
+        row = {name: None for name, _ in COLUMNS}
+        row.update({
+            "job_id": job_id, "campaign": campaign, "jd_title": jd_title,
+            "filename": r.get("filename"), "name": r.get("name"), "status": "Rejected",
+            "total_score": 0.0, "matched_skills": [], "missing_skills": [], "extracted_skills": [],
+            "is_rejected": True, "rejection_reason": r.get("reason"), "ai_analyzed": False,
+        })
+        rows.append(row)
+    return rows
+
+
+def _flat(value: Any) -> Any:
+    # Spreadsheet cells can't hold lists
+    return "; ".join(value) if isinstance(value, list) else value
+
+
+def to_csv(rows: List[Dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in COLUMNS])
+    for row in rows:
+        writer.writerow(["" if row[name] is None else _flat(row[name]) for name, _ in COLUMNS])
+    # BOM so Excel opens UTF-8 names correctly
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def to_xlsx(rows: List[Dict]) -> bytes:
+    if openpyxl is None:
+        raise ExportUnavailable("XLSX export needs the 'openpyxl' package")
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("candidates")
+    sheet.append([name for name, _ in COLUMNS])
+    for row in rows:
+        sheet.append([_flat(row[name]) for name, _ in COLUMNS])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _arrow_schema():
+    types = {"string": pa.string(), "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_(), "list": pa.list_(pa.string())}
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def _arrow_table(rows: List[Dict]):
+    if pa is None:
+        raise ExportUnavailable("Parquet export needs the 'pyarrow' package")
+    schema = _arrow_schema()
+    return pa.Table.from_pydict({name: [row[name] for row in rows] for name in schema.names}, schema=schema)
+
+
+def to_parquet(rows: List[Dict]) -> bytes:
+    table = _arrow_table(rows)
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+def export(rows: List[Dict], fmt: str) -> Tuple[bytes, str]:
+    """(body, media type) for one of EXPORT_FORMATS."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    body = {"csv": to_csv, "xlsx": to_xlsx, "parquet": to_parquet}[fmt](rows)
+    return body, MEDIA_TYPES[fmt]
+
+
+def append_to_dataset(rows: List[Dict], dataset_dir: str, part_name: str) -> Optional[str]:
+    """Add one job's rows to the cross-campaign dataset as a new file (existing files are never rewritten).
+    Returns the file path, or None if the part already exists or there is nothing to write."""
+    if not rows:
+        return None
+    table = _arrow_table(rows)
+    partition = os.path.join(dataset_dir, f"date={datetime.now().strftime('%Y-%m-%d')}")
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"{part_name}.parquet")
+    if os.path.exists(path):
+        return None
+    # Write aside, then rename: readers scanning the dataset never see a half-written file
+    fd, tmp = tempfile.mkstemp(dir=partition, prefix=".incoming_", suffix=".parquet")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
@@ -2,12 +2,15 @@
 import re
 import spacy
 from typing import Set, Tuple
+import logging
 import subprocess
 
+logger = logging.getLogger(__name__)
+
 try:
     nlp = spacy.load("en_core_web_sm")
 except OSError:
-    print("Downloading Spacy Model 'en_core_web_sm'...")
+    logger.warning("Downloading Spacy Model 'en_core_web_sm'...")
     subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
     nlp = spacy.load("en_core_web_sm")
 
@@ -163,6 +166,10 @@ def extract_education_level(text: str) -> int:
 
 def extract_name(text: str, filename: str = "") -> str:
     """Extract candidate name with robust filtering."""
+    return extract_name_with_source(text, filename)[0]
+
+def extract_name_with_source(text: str, filename: str = "") -> Tuple[str, str]:
+    """extract_name(), plus where the name came from: "resume" (NER), "filename" or "unknown"."""
     
     # Common False Positives (Job Titles, Headers)
     IGNORE_NAMES = {
@@ -195,7 +202,7 @@ def extract_name(text: str, filename: str = "") -> str:
                             break
                     
                     if is_valid:
-                        return clean_name.title()
+                        return clean_name.title(), "resume"
     except:
         pass
 
@@ -218,6 +225,6 @@ def extract_name(text: str, filename: str = "") -> str:
         clean = re.sub(r'\s+', ' ', clean).strip()
         
         if len(clean) > 2:
-            return clean.title()
+            return clean.title(), "filename"
 
-    return "Unknown Candidate"
+    return "Unknown Candidate", "unknown"
@@ -4,8 +4,10 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from ..core.config import get_settings
 import os
 import shutil
+import logging
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 class VectorService:
     def __init__(self):
@@ -121,7 +123,7 @@ class VectorService:
                     found.add(skill)
                     
         except Exception as e:
-            print(f"Semantic Check Error: {e}")
+            logger.error(f"Semantic Check Error: {e}")
             # Fallback to just text match results
             
         # Calculate final missing based on original set
@@ -3,6 +3,7 @@
 import sys
 import os
 import importlib.util
+import logging
 import traceback
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -21,6 +22,8 @@ sys.path.append(project_root)
 # --- Load Resume App ---
 from .main import app as resume_app
 
+logger = logging.getLogger("RecruitAI")
+
 # --- Load JD Generator App ---
 jd_backend_path = os.path.join(project_root, "JD_Generator", "backend")
 sys.path.insert(0, jd_backend_path) # Priority Path
@@ -36,9 +39,9 @@ try:
     sys.modules["jd_main_pkg"] = jd_module
     spec.loader.exec_module(jd_module)
     jd_app = jd_module.app
-    print("✅ JD App Loaded Successfully")
+    logger.info("✅ JD App Loaded Successfully")
 except Exception as e:
-    print(f"❌ Failed to load JD App: {e}")
+    logger.error(f"❌ Failed to load JD App: {e}")
     jd_app = FastAPI()
 finally:
     # Cleanup path to avoid leaking into Aptitude
@@ -59,9 +62,9 @@ try:
     sys.modules["aptitude_main_pkg"] = aptitude_module
     spec.loader.exec_module(aptitude_module)
     aptitude_app = aptitude_module.app
-    print("✅ Aptitude App Loaded Successfully")
+    logger.info("✅ Aptitude App Loaded Successfully")
 except Exception as e:
-    print(f"❌ Failed to load Aptitude App: {e}")
+    logger.error(f"❌ Failed to load Aptitude App: {e}")
     traceback.print_exc()
     aptitude_app = FastAPI()
 finally:
@@ -79,6 +82,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Mounted apps don't receive startup events: start the resume app's job dispatcher here
+from .main import start_job_dispatcher
+
+@app.on_event("startup")
+async def start_resume_job_dispatcher():
+    start_job_dispatcher()
+
 # 4. Gmail OAuth Endpoints
 from fastapi import HTTPException, Query
 from fastapi.responses import RedirectResponse, HTMLResponse
@@ -284,9 +294,9 @@ app.mount("/jd-api", jd_app)
 jd_frontend_path = os.path.join(project_root, "JD_Generator", "frontend")
 if os.path.exists(jd_frontend_path):
     app.mount("/jd-tools", StaticFiles(directory=jd_frontend_path, html=True), name="jd_frontend")
-    print(f"✅ JD Frontend mounted at /jd-tools (Path: {jd_frontend_path})")
+    logger.info(f"✅ JD Frontend mounted at /jd-tools (Path: {jd_frontend_path})")
 else:
-    print(f"⚠️ Warning: JD Frontend path not found: {jd_frontend_path}")
+    logger.warning(f"⚠️ Warning: JD Frontend path not found: {jd_frontend_path}")
 
 # Mount Aptitude App
 app.mount("/aptitude-api", aptitude_app)
@@ -295,9 +305,9 @@ app.mount("/aptitude-api", aptitude_app)
 aptitude_frontend_path = os.path.join(project_root, "Aptitude_Generator", "frontend")
 if os.path.exists(aptitude_frontend_path):
     app.mount("/aptitude", StaticFiles(directory=aptitude_frontend_path, html=True), name="aptitude_frontend")
-    print(f"✅ Aptitude Frontend mounted at /aptitude (Path: {aptitude_frontend_path})")
+    logger.info(f"✅ Aptitude Frontend mounted at /aptitude (Path: {aptitude_frontend_path})")
 else:
-    print(f"⚠️ Warning: Aptitude Frontend path not found: {aptitude_frontend_path}")
+    logger.warning(f"⚠️ Warning: Aptitude Frontend path not found: {aptitude_frontend_path}")
 
 # Explicitly Mount Reports Directory (Fix for PDF Links)
 reports_dir = os.path.join(current_dir, "Reports") # Backend/app/../Reports -> Backend/Reports actually?
@@ -307,15 +317,15 @@ reports_dir = os.path.join(current_dir, "Reports") # Backend/app/../Reports -> B
 reports_path = os.path.abspath("Reports") 
 if not os.path.exists(reports_path): os.makedirs(reports_path)
 app.mount("/reports", StaticFiles(directory=reports_path), name="reports")
-print(f"✅ Reports mounted at /reports (Path: {reports_path})")
+logger.info(f"✅ Reports mounted at /reports (Path: {reports_path})")
 
 # Mount Resume Frontend
 resume_frontend_path = os.path.join(project_root, "Frontend")
 if os.path.exists(resume_frontend_path):
     app.mount("/resume", StaticFiles(directory=resume_frontend_path, html=True), name="resume_frontend")
-    print(f"✅ Resume Frontend mounted at /resume (Path: {resume_frontend_path})")
+    logger.info(f"✅ Resume Frontend mounted at /resume (Path: {resume_frontend_path})")
 else:
-    print(f"⚠️ Warning: Resume Frontend path not found: {resume_frontend_path}")
+    logger.warning(f"⚠️ Warning: Resume Frontend path not found: {resume_frontend_path}")
 
 # Mount Resume App Routes at /api to avoid root conflict
 app.mount("/api", resume_app)
@@ -324,4 +334,4 @@ app.mount("/api", resume_app)
 if os.path.exists(resume_frontend_path):
     app.mount("/", StaticFiles(directory=resume_frontend_path, html=True), name="resume_frontend_root")
 
-print("✅ Unified Server Started: Resume API at /api + JD at /jd-api + Aptitude at /aptitude-api")
+logger.info("✅ Unified Server Started: Resume API at /api + JD at /jd-api + Aptitude at /aptitude-api")
@@ -0,0 +1,107 @@
+"""
+Analysis Worker
+Claims jobs from the shared job queue and runs the analysis pipeline.
+worker_loop is also the API's embedded dispatcher in job_queue_mode = "inline".
+For job_queue_mode = "worker" (config.ini [jobs] queue_mode), start one or more per node
+from the Backend/ directory so temp/ and Reports/ resolve to the same folders as the API:
+
+    python -m app.worker [--concurrency 1] [--worker-id NAME]
+"""
+
+import os
+import uuid
+import socket
+import asyncio
+import logging
+import argparse
+import threading
+
+from .core.config import get_settings
+from .services.job_queue import job_queue
+from .services.job_store import job_store
+from .main import _run_async_analysis, fail_job
+
+settings = get_settings()
+logger = logging.getLogger("ResumeAgent.worker")
+
+
+def _keep_lease(job_id: str, worker_id: str, stop: threading.Event, on_lost):
+    # A thread, not a task: parts of the pipeline block the event loop for longer than a lease
+    interval = max(1.0, settings.job_lease_seconds / 4)
+    while not stop.wait(interval):
+        if not job_queue.heartbeat(job_id, worker_id):
+            logger.warning(f"Lost lease on job {job_id} (another worker may have taken it over). Stopping this run.")
+            on_lost()
+            return
+
+
+async def run_claimed_job(item: dict, worker_id: str):
+    job_id = item["job_id"]
+    logger.info(f"🛠️ [{worker_id}] Running job {job_id} (attempt {item['attempt']})")
+    job_store.update(job_id, status="processing", current_step="Starting analysis...")
+    loop = asyncio.get_running_loop()
+    run = asyncio.ensure_future(_run_async_analysis(job_id, **item["payload"]))
+    lease_lost = threading.Event()
+
+    def on_lost():
+        lease_lost.set()
+        loop.call_soon_threadsafe(run.cancel)
+
+    stop_lease = threading.Event()
+    threading.Thread(target=_keep_lease, args=(job_id, worker_id, stop_lease, on_lost), daemon=True).start()
+    try:
+        await run
+    except asyncio.CancelledError:
+        if not lease_lost.is_set():
+            raise
+        # The job now belongs to the worker that re-claimed it: leave its status and queue row alone
+        logger.warning(f"🛑 [{worker_id}] Abandoned job {job_id} after losing its lease")
+        return
+    except Exception as e:
+        # _run_async_analysis reports its own failures; this only catches crashes around it
+        fail_job(job_id, str(e))
+    finally:
+        stop_lease.set()
+
+    job = job_store.get(job_id, with_result=False)
+    status = job["status"] if job else "error"
+    job_queue.finish(job_id, {"completed": "done", "cancelled": "cancelled"}.get(status, "failed"))
+
+
+async def worker_loop(worker_id: str, concurrency: int = 1):
+    slots = asyncio.Semaphore(max(1, concurrency))
+    running = set()
+    logger.info(f"👷 Worker {worker_id} started (concurrency={concurrency}, store={settings.job_store_path})")
+    while True:
+        await slots.acquire()
+        # Admission control: the running-job cap is global, shared by every worker and the inline dispatcher
+        item = job_queue.claim(worker_id, max_running=settings.max_concurrent_jobs)
+        if item is None:
+            slots.release()
+            await asyncio.sleep(settings.job_poll_interval_seconds)
+            continue
+        task = asyncio.create_task(run_claimed_job(item, worker_id))
+        running.add(task)
+        task.add_done_callback(running.discard)
+        task.add_done_callback(lambda _: slots.release())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume analysis worker")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs run at once by this process")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}")
+    args = parser.parse_args()
+
+    if settings.job_store_backend == "memory":
+        raise SystemExit("Workers need a shared job store: set job_store_backend = sqlite")
+    if settings.job_queue_mode != "worker":
+        logger.warning("job_queue_mode is not 'worker': the API will not enqueue jobs for this process")
+
+    try:
+        asyncio.run(worker_loop(args.worker_id, args.concurrency))
+    except KeyboardInterrupt:
+        logger.info("Worker stopped.")
+
+
+if __name__ == "__main__":
+    main()
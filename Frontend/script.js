@@ -270,8 +270,8 @@ analyzeBtn.addEventListener('click', async () => {
         const data = await response.json();
         const jobId = data.job_id;
 
-        // 2. Poll for Updates
-        await pollJob(jobId);
+        // 2. Stream Updates (falls back to polling if SSE is unavailable)
+        watchJob(jobId);
 
     } catch (error) {
         showCustomModal({
@@ -285,13 +285,116 @@ analyzeBtn.addEventListener('click', async () => {
     }
 });
 
+// Finished results: the summary from /status (without candidates), then the candidate list
+// page by page. The first page is rendered as soon as it arrives; the rest follow in the background.
+const CANDIDATE_PAGE_SIZE = 100;
+
+async function loadJobResult(jobId, onFirstPage) {
+    const res = await fetch(`/api/status/${jobId}?candidates=false`);
+    if (!res.ok) throw new Error("Status check failed");
+    const statusData = await res.json();
+    const result = statusData.result;
+    if (!result) return;
+
+    result.candidates = [];
+    let offset = 0;
+    while (true) {
+        const pageRes = await fetch(`/api/jobs/${jobId}/candidates?offset=${offset}&limit=${CANDIDATE_PAGE_SIZE}`);
+        if (!pageRes.ok) throw new Error("Loading candidates failed");
+        const page = await pageRes.json();
+        result.candidates.push(...page.items);
+        offset += page.items.length;
+        if (offset === page.items.length) onFirstPage(result);
+        if (!page.has_more || page.items.length === 0) break;
+    }
+    // Re-render once the whole list is in (Not Selected tab, details)
+    if (offset > CANDIDATE_PAGE_SIZE) renderResults(result);
+}
+
+// Push channel: progress/stage/candidate events over SSE instead of polling /status every 2s.
+// The result is loaded once (summary + candidate pages), when the "complete" event arrives.
+function watchJob(jobId) {
+    if (!window.EventSource) {
+        pollJob(jobId);
+        return;
+    }
+
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+    let receivedEvent = false;
+    let finished = false;
+
+    const fail = (message) => {
+        if (finished) return;
+        finished = true;
+        source.close();
+        document.getElementById('loader').classList.add('hidden');
+        analyzeBtn.disabled = false;
+        showCustomModal({
+            title: 'Analysis Error',
+            message: message || "Unknown analysis error",
+            icon: 'alert-circle',
+            showCancel: false
+        });
+    };
+
+    const complete = async () => {
+        if (finished) return;
+        finished = true;
+        source.close();
+        updateLoaderUI(100, "Analysis complete!");
+        try {
+            await loadJobResult(jobId, (result) => {
+                document.getElementById('loader').classList.add('hidden');
+                analyzeBtn.disabled = false;
+                renderResults(result);
+            });
+        } catch (err) {
+            fail(err.message);
+        }
+    };
+
+    source.addEventListener('snapshot', (e) => {
+        receivedEvent = true;
+        const snap = JSON.parse(e.data);
+        updateLoaderUI(snap.progress, snap.current_step);
+        if (snap.status === "completed") complete();
+        if (snap.status === "error") fail(snap.error);
+        if (snap.status === "cancelled") fail("The analysis was cancelled.");
+    });
+
+    source.addEventListener('progress', (e) => {
+        receivedEvent = true;
+        const data = JSON.parse(e.data);
+        updateLoaderUI(data.progress, data.current_step);
+    });
+
+    source.addEventListener('error', (e) => {
+        // Server-sent "error" event carries data; a transport error does not
+        if (e.data) fail(JSON.parse(e.data).error);
+    });
+
+    source.addEventListener('cancelled', () => fail("The analysis was cancelled."));
+
+    source.addEventListener('complete', complete);
+
+    source.onerror = () => {
+        if (finished) return;
+        // Stream never opened (proxy/server without SSE): fall back to the old polling loop.
+        // Otherwise EventSource reconnects by itself and resumes from Last-Event-ID.
+        if (!receivedEvent) {
+            source.close();
+            pollJob(jobId);
+        }
+    };
+}
+
 async function pollJob(jobId) {
     const loaderTitle = document.querySelector('#loader h3');
     const loaderDesc = document.querySelector('#loader p');
 
     const pollInterval = setInterval(async () => {
         try {
-            const res = await fetch(`/api/status/${jobId}`);
+            const res = await fetch(`/api/status/${jobId}?candidates=false`);
             if (!res.ok) throw new Error("Status check failed");
 
             const statusData = await res.json();
@@ -302,14 +405,19 @@ async function pollJob(jobId) {
             if (statusData.status === "completed") {
                 clearInterval(pollInterval);
                 updateLoaderUI(100, "Analysis complete!");
-                setTimeout(() => {
+                await loadJobResult(jobId, (result) => {
                     document.getElementById('loader').classList.add('hidden');
                     analyzeBtn.disabled = false;
-                    if (statusData.result) renderResults(statusData.result);
-                }, 800);
+                    renderResults(result);
+                });
             } else if (statusData.status === "error") {
                 clearInterval(pollInterval);
                 throw new Error(statusData.error || "Unknown analysis error");
+            } else if (statusData.status === "cancelled") {
+                clearInterval(pollInterval);
+                throw new Error("The analysis was cancelled.");
+            } else if (statusData.status === "queued" && statusData.queue_position) {
+                updateLoaderUI(statusData.progress, `Queued (position ${statusData.queue_position})...`);
             }
 
         } catch (e) {
@@ -742,7 +850,7 @@ if (rejectProceedBtn) {
         const reportFolder = lastAnalysisData.campaign_folder;
 
         try {
-            const resp = await fetch(`http://localhost:8000/reports/${reportFolder}/not_selected_candidates.json`);
+            const resp = await fetch(`/api/campaigns/${reportFolder}/not_selected`);
             if (!resp.ok) throw new Error("Could not find rejection list.");
             const rejectedList = await resp.json();
             const emails = rejectedList.map(c => c.email).filter(e => e);
@@ -761,7 +869,7 @@ if (rejectProceedBtn) {
                 }
             }
 
-            localStorage.setItem('aptitude_candidates_url', `http://localhost:8000/reports/${reportFolder}/selected_candidates.json`);
+            localStorage.setItem('aptitude_candidates_url', `/api/campaigns/${reportFolder}/selected`);
             window.location.href = '/aptitude/index.html';
         } catch (e) {
             showCustomModal({ title: 'Handover Error', message: e.message, icon: 'alert-octagon', showCancel: false });
@@ -1,11 +1,27 @@
 import os
-from openai import OpenAI
+import contextlib
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 # Load environment variables
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, "../../.env"))
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Async client: generate_jd_ai runs on the event loop, a blocking call would stall the server
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60")))
+
+# Shared LLM scheduler from the Resume backend (only importable inside the unified server)
+try:
+    from app.services.llm_scheduler import llm_scheduler, PRIORITY_INTERACTIVE
+    from app.services.llm_resilience import resilient_call
+except ImportError:
+    llm_scheduler = None
+    resilient_call = None
+
+def _llm_slot():
+    """Interactive-priority slot in the process-wide LLM queue (no-op when running standalone)."""
+    if llm_scheduler is None:
+        return contextlib.nullcontext()
+    return llm_scheduler.slot(priority=PRIORITY_INTERACTIVE, flow="jd-generator")
 
 async def generate_jd_ai(data: dict):
     """
@@ -66,7 +82,7 @@ async def generate_jd_ai(data: dict):
     """
 
     try:
-        completion = client.chat.completions.create(
+        request = dict(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a professional JD writer robot."},
@@ -75,6 +91,15 @@ async def generate_jd_ai(data: dict):
             temperature=0.7,
             max_tokens=1000,
         )
+        async with _llm_slot():
+            if resilient_call is None:
+                completion = await client.chat.completions.create(**request)
+            else:
+                # Shared circuit breaker + latency stats; a degraded API fails fast instead of hanging the form
+                completion = await resilient_call(
+                    "jd_generation",
+                    lambda timeout: client.chat.completions.create(**request, timeout=timeout)
+                )
         
         return completion.choices[0].message.content
     except Exception as e: